@@ -6,9 +6,14 @@ Tìm kiếm tất cả các tổ hợp có thể để gán môn học vào lị
 """
 
 import random
-from typing import Dict, List, Optional, Tuple
+import time
+from typing import Dict, List, Optional, Set, Tuple
 from core.model import Schedule, Assignment, Course, Room, Teacher, Timeslot
 from core.constraint import ConstraintChecker
+from core.room_matching import RoomMatcher
+from core.room_index import RoomIndex
+from core.presolve import PresolveAnalyzer, PresolveReport
+from core.coloring import DSaturColoring
 
 
 class BacktrackingSolver:
@@ -41,6 +46,19 @@ class BacktrackingSolver:
         
         # Tạo mapping từ tên môn đến danh sách giáo viên có thể dạy
         self.course_to_teachers = self._build_course_teacher_mapping(teachers)
+        self.room_index = RoomIndex(rooms)
+        
+        # Timeslot giáo viên rảnh (lọc trước theo bitmask thay vì kiểm tra sau)
+        self.teacher_timeslots = {
+            teacher_id: [tid for bit, tid in enumerate(timeslots) if teacher.is_available(bit)]
+            for teacher_id, teacher in teachers.items()
+        }
+        self.timeslot_hints: Dict[str, str] = {}
+        self._fixed_busy: Set[Tuple[str, str, str]] = set()
+        self._room_rank: Dict[str, Dict[str, int]] = {}
+        self._deadline: Optional[float] = None
+        self.timed_out = False
+        self.presolve_report: Optional[PresolveReport] = None
 
     def _build_course_teacher_mapping(self, teachers: Dict[str, Teacher]) -> Dict[str, List[str]]:
         """
@@ -57,32 +75,166 @@ class BacktrackingSolver:
                 mapping[course_name].append(teacher_id)
         return mapping
 
-    def solve(self, max_iterations: int = 10000, verbose: bool = False) -> Optional[Schedule]:
+    def solve(self, max_iterations: int = 10000, verbose: bool = False,
+              decompose_rooms: bool = False, course_order: Optional[List[str]] = None,
+              timeslot_hints: Optional[Dict[str, str]] = None,
+              time_limit: Optional[float] = None, presolve: bool = True,
+              fixed: Optional[Schedule] = None, coloring: bool = True) -> Optional[Schedule]:
         """
         Giải bài toán bằng Backtracking
         
         Args:
             max_iterations: Số lần thử tối đa (không dùng trong backtracking nhưng giữ để tương thích)
             verbose: In thông tin debug
+            decompose_rooms: Chỉ tìm (giáo viên, timeslot) cho từng môn, phòng được
+                             phân sau bằng ghép cặp cực đại trong từng timeslot
+            course_order: Thứ tự xử lý môn, mặc định thứ tự tô màu DSatur (xem coloring)
+                          hoặc theo độ khó
+            timeslot_hints: {course_id: timeslot_id} được thử trước, mặc định màu DSatur
+            time_limit: Giới hạn thời gian (giây), None nếu không giới hạn.
+                        Hết giờ thì trả về None và đặt self.timed_out
+            presolve: Kiểm tra điều kiện cần trước (PresolveAnalyzer), trả về None
+                      ngay nếu bài toán chắc chắn vô nghiệm (lý do trong self.presolve_report)
+            fixed: Các assignment giữ nguyên (ví dụ phần lịch không bị phá trong LNS).
+                   Chỉ các môn chưa có trong fixed được xếp (hoặc các môn trong
+                   course_order), lịch trả về gồm cả fixed. Không dùng cùng decompose_rooms
+            coloring: Tô màu đồ thị xung đột bằng DSaturColoring và dùng thứ tự tô màu
+                      làm course_order, màu làm timeslot_hints (chỉ cho tham số không
+                      được truyền). Bỏ qua khi có fixed hoặc số màu vượt số timeslot
             
         Returns:
             Schedule hợp lệ nếu tìm được, None nếu không
         """
-        schedule = Schedule()
-        course_ids = list(self.courses.keys())
+        if fixed is not None and decompose_rooms:
+            raise ValueError("fixed không dùng được cùng decompose_rooms")
+        schedule = fixed.copy() if fixed is not None else Schedule()
+        if coloring and fixed is None and (course_order is None or timeslot_hints is None):
+            dsatur = DSaturColoring(self.courses, self.teachers, self.timeslots)
+            colored = dsatur.to_timeslots()
+            if colored is not None:
+                course_order = course_order if course_order is not None else dsatur.order
+                timeslot_hints = timeslot_hints if timeslot_hints is not None else colored
+        self.timeslot_hints = timeslot_hints or {}
         
-        # Sắp xếp môn học theo độ khó (môn có ít lựa chọn hơn trước)
-        # Điều này giúp phát hiện xung đột sớm hơn
-        course_ids.sort(key=lambda cid: self._calculate_course_difficulty(cid))
+        # Tài nguyên đã bị phần cố định chiếm: loại bỏ trước các lựa chọn chắc chắn xung đột
+        self._fixed_busy = set()
+        for a in schedule.assignments:
+            course = self.courses.get(a.course_id)
+            self._fixed_busy.add(("T", a.teacher_id, a.timeslot_id))
+            self._fixed_busy.add(("R", a.room_id, a.timeslot_id))
+            if course:
+                self._fixed_busy.add(("C", course.student_class, a.timeslot_id))
+        self._deadline = time.time() + time_limit if time_limit is not None else None
+        self.timed_out = False
+        
+        if presolve:
+            self.presolve_report = PresolveAnalyzer(self.courses, self.rooms, self.teachers,
+                                                    self.timeslots).analyze()
+            if not self.presolve_report.feasible:
+                if verbose:
+                    print("  ✗ Bài toán vô nghiệm (presolve):")
+                    print("  " + self.presolve_report.summary().replace("\n", "\n  "))
+                return None
+        
+        if course_order is not None:
+            course_ids = list(course_order)
+        else:
+            course_ids = [cid for cid in self.courses
+                          if fixed is None or fixed.get_assignment(cid) is None]
+            # Sắp xếp môn học theo độ khó (môn có ít lựa chọn hơn trước)
+            # Điều này giúp phát hiện xung đột sớm hơn
+            course_ids.sort(key=lambda cid: self._calculate_course_difficulty(cid))
         
         if verbose:
             print(f"  Đang tìm lịch cho {len(course_ids)} môn học...")
             print(f"  Thứ tự xử lý: {[self.courses[cid].name for cid in course_ids[:5]]}...")
         
+        if decompose_rooms:
+            return self._solve_decomposed(course_ids, verbose)
+        
+        # Thứ hạng phòng của từng môn (phòng nhỏ nhất vừa đủ trước), tính một lần
+        self._room_rank = {
+            cid: {room_id: rank for rank, room_id in enumerate(self._get_available_rooms(self.courses[cid]))}
+            for cid in course_ids
+        }
         if self._backtrack(schedule, course_ids, 0, verbose):
             return schedule
         return None
 
+    def _solve_decomposed(self, course_ids: List[str], verbose: bool = False) -> Optional[Schedule]:
+        """
+        Chế độ phân rã: tìm (giáo viên, timeslot), phòng được ghép cặp theo slot
+        
+        Returns:
+            Schedule hợp lệ nếu tìm được, None nếu không
+        """
+        candidate_rooms = {cid: self._get_available_rooms(course)
+                           for cid, course in self.courses.items()}
+        matcher = RoomMatcher(self.courses, self.rooms, self.constraint_checker, candidate_rooms)
+        
+        # Trạng thái: (giáo viên, timeslot) và (lớp, timeslot) đã dùng, các môn trong từng slot
+        chosen: Dict[str, Tuple[str, str]] = {}
+        slot_courses: Dict[str, List[str]] = {tid: [] for tid in self.timeslots}
+        busy = set()
+        
+        def backtrack(index: int) -> bool:
+            if index >= len(course_ids):
+                return True
+            if self._is_out_of_time():
+                return False
+            
+            course_id = course_ids[index]
+            course = self.courses[course_id]
+            options = [(teacher_id, timeslot_id)
+                       for teacher_id in self.course_to_teachers.get(course.name, [])
+                       for timeslot_id in self.teacher_timeslots[teacher_id]]
+            if not options or not matcher.eligible_rooms[course_id]:
+                if verbose:
+                    print(f"  Không có lựa chọn cho môn: {course.name} - {course.student_class}")
+                return False
+            random.shuffle(options)
+            hint = self.timeslot_hints.get(course_id)
+            if hint:
+                options.sort(key=lambda option: option[1] != hint)
+            
+            for teacher_id, timeslot_id in options:
+                teacher_key = ("T", teacher_id, timeslot_id)
+                class_key = ("C", course.student_class, timeslot_id)
+                if teacher_key in busy or class_key in busy:
+                    continue
+                
+                # Kiểm tra phòng bằng ghép cặp (đa thức) thay vì thử từng phòng
+                slot_courses[timeslot_id].append(course_id)
+                if matcher.is_feasible(slot_courses[timeslot_id]):
+                    busy.add(teacher_key)
+                    busy.add(class_key)
+                    chosen[course_id] = (teacher_id, timeslot_id)
+                    if backtrack(index + 1):
+                        return True
+                    del chosen[course_id]
+                    busy.discard(teacher_key)
+                    busy.discard(class_key)
+                slot_courses[timeslot_id].pop()
+                if self.timed_out:
+                    return False
+            
+            return False
+        
+        if not backtrack(0):
+            return None
+        
+        # Phân phòng cuối cùng cho từng timeslot
+        schedule = Schedule()
+        for timeslot_id, slot_course_ids in slot_courses.items():
+            if not slot_course_ids:
+                continue
+            rooms = matcher.match(slot_course_ids)
+            for course_id in slot_course_ids:
+                teacher_id, _ = chosen[course_id]
+                schedule.add_assignment(Assignment(course_id, rooms[course_id],
+                                                   teacher_id, timeslot_id))
+        return schedule
+
     def _backtrack(self, schedule: Schedule, course_ids: List[str], 
                    index: int, verbose: bool = False) -> bool:
         """
@@ -100,6 +252,8 @@ class BacktrackingSolver:
         # Điều kiện dừng: đã gán hết tất cả môn
         if index >= len(course_ids):
             return True
+        if self._is_out_of_time():
+            return False
         
         course_id = course_ids[index]
         course = self.courses[course_id]
@@ -111,8 +265,12 @@ class BacktrackingSolver:
                 print(f"  Không có lựa chọn cho môn: {course.name} - {course.student_class}")
             return False
         
-        # Sắp xếp ngẫu nhiên để tăng tính đa dạng
+        # Sắp xếp ngẫu nhiên để tăng tính đa dạng, sau đó ưu tiên timeslot gợi ý
+        # và phòng nhỏ nhất vừa đủ (thứ tự của _get_available_rooms)
         random.shuffle(available_options)
+        room_rank = self._room_rank[course_id]
+        hint = self.timeslot_hints.get(course_id)
+        available_options.sort(key=lambda option: (option[2] != hint, room_rank[option[1]]))
         
         # Thử từng lựa chọn
         for teacher_id, room_id, timeslot_id in available_options:
@@ -133,10 +291,18 @@ class BacktrackingSolver:
                     return True
                 
                 # Quay lui: xóa assignment vừa thêm
-                schedule.assignments.pop()
+                schedule.pop_assignment()
+                if self.timed_out:
+                    return False
         
         return False
 
+    def _is_out_of_time(self) -> bool:
+        """Kiểm tra đã quá hạn time_limit chưa (đặt self.timed_out nếu quá)"""
+        if self._deadline is not None and time.time() > self._deadline:
+            self.timed_out = True
+        return self.timed_out
+
     def _get_available_options(self, course: Course) -> List[Tuple[str, str, str]]:
         """
         Lấy tất cả các tổ hợp (giáo viên, phòng, timeslot) có thể cho môn học
@@ -149,36 +315,32 @@ class BacktrackingSolver:
         """
         available_teachers = self.course_to_teachers.get(course.name, [])
         available_rooms = self._get_available_rooms(course)
-        available_timeslots = list(self.timeslots.keys())
         
-        # Tạo tất cả tổ hợp có thể
+        # Tạo tất cả tổ hợp có thể (chỉ các timeslot giáo viên rảnh)
         options = []
+        busy = self._fixed_busy
         for teacher_id in available_teachers:
             for room_id in available_rooms:
-                for timeslot_id in available_timeslots:
+                for timeslot_id in self.teacher_timeslots[teacher_id]:
+                    if busy and (("T", teacher_id, timeslot_id) in busy or
+                                 ("R", room_id, timeslot_id) in busy or
+                                 ("C", course.student_class, timeslot_id) in busy):
+                        continue
                     options.append((teacher_id, room_id, timeslot_id))
         
         return options
 
     def _get_available_rooms(self, course: Course) -> List[str]:
         """
-        Lấy danh sách phòng phù hợp với ràng buộc địa điểm của môn học
+        Lấy danh sách phòng phù hợp với ràng buộc địa điểm và sức chứa của môn học
         
         Args:
             course: Môn học cần kiểm tra
             
         Returns:
-            Danh sách ID phòng phù hợp
+            Danh sách ID phòng phù hợp, phòng nhỏ nhất vừa đủ trước
         """
-        available_rooms = []
-        required_location = course.required_location
-        
-        for room_id, room in self.rooms.items():
-            # Kiểm tra ràng buộc địa điểm
-            if self._is_room_location_valid(room.location, required_location):
-                available_rooms.append(room_id)
-        
-        return available_rooms
+        return self.room_index.candidates(course.required_location, course.class_size)
 
     def _is_room_location_valid(self, room_location: str, required_location: str) -> bool:
         """
@@ -211,12 +373,12 @@ class BacktrackingSolver:
             Điểm độ khó (số càng nhỏ càng khó)
         """
         course = self.courses[course_id]
-        num_teachers = len(self.course_to_teachers.get(course.name, []))
+        num_teacher_slots = sum(len(self.teacher_timeslots[teacher_id])
+                                for teacher_id in self.course_to_teachers.get(course.name, []))
         num_rooms = len(self._get_available_rooms(course))
-        num_timeslots = len(self.timeslots)
         
         # Tổng số lựa chọn
-        total_options = num_teachers * num_rooms * num_timeslots
+        total_options = num_teacher_slots * num_rooms
         
         # Trả về số âm để sắp xếp giảm dần (môn khó trước)
         return -total_options
@@ -0,0 +1,133 @@
+"""
+Tô màu đồ thị xung đột (DSatur) để gán trước timeslot
+
+Hai môn xung đột (không được học cùng timeslot) nếu cùng lớp sinh viên hoặc
+chỉ có thể được dạy bởi cùng một giáo viên duy nhất. Mỗi màu ứng với một
+timeslot; số màu DSatur dùng là cận trên, kích thước clique tìm được là cận
+dưới cho số timeslot cần thiết.
+"""
+
+from typing import Dict, List, Optional, Set
+from core.model import Course, Teacher, Timeslot
+
+
+class DSaturColoring:
+    """
+    Lớp tô màu đồ thị xung đột bằng thuật toán DSatur
+
+    Thuật toán:
+    1. Chọn môn có độ bão hòa (số màu khác nhau ở hàng xóm) lớn nhất,
+       hòa thì chọn môn có bậc lớn nhất
+    2. Gán màu nhỏ nhất chưa bị hàng xóm dùng
+    3. Lặp lại cho đến khi tô hết
+    """
+
+    def __init__(self, courses: Dict[str, Course], teachers: Dict[str, Teacher],
+                 timeslots: Dict[str, Timeslot]):
+        self.courses = courses
+        self.teachers = teachers
+        self.timeslots = timeslots
+
+        course_to_teachers: Dict[str, List[str]] = {}
+        for teacher_id, teacher in teachers.items():
+            for course_name in teacher.courses:
+                course_to_teachers.setdefault(course_name, []).append(teacher_id)
+        self.course_to_teachers = course_to_teachers
+
+        self.graph = self._build_conflict_graph()
+        self.coloring: Dict[str, int] = {}
+        self.order: List[str] = []
+
+    def _build_conflict_graph(self) -> Dict[str, Set[str]]:
+        """
+        Dựng đồ thị xung đột
+
+        Returns:
+            Dictionary: {course_id: {course_id kề, ...}}
+        """
+        graph: Dict[str, Set[str]] = {cid: set() for cid in self.courses}
+        groups: Dict[tuple, List[str]] = {}
+        for course_id, course in self.courses.items():
+            groups.setdefault(("class", course.student_class), []).append(course_id)
+            teachers = self.course_to_teachers.get(course.name, [])
+            if len(teachers) == 1:
+                groups.setdefault(("teacher", teachers[0]), []).append(course_id)
+
+        for members in groups.values():
+            for i, u in enumerate(members):
+                for v in members[i + 1:]:
+                    graph[u].add(v)
+                    graph[v].add(u)
+        return graph
+
+    def color(self) -> Dict[str, int]:
+        """
+        Tô màu bằng DSatur
+
+        Returns:
+            Dictionary: {course_id: chỉ số màu (bắt đầu từ 0)}
+        """
+        coloring: Dict[str, int] = {}
+        neighbour_colors: Dict[str, Set[int]] = {cid: set() for cid in self.graph}
+        order: List[str] = []
+        uncolored = set(self.graph)
+
+        while uncolored:
+            course_id = max(uncolored, key=lambda c: (len(neighbour_colors[c]),
+                                                      len(self.graph[c]), c))
+            used = neighbour_colors[course_id]
+            color = 0
+            while color in used:
+                color += 1
+            coloring[course_id] = color
+            order.append(course_id)
+            uncolored.discard(course_id)
+            for neighbour in self.graph[course_id]:
+                neighbour_colors[neighbour].add(color)
+
+        self.coloring = coloring
+        self.order = order
+        return coloring
+
+    def num_colors(self) -> int:
+        """Số màu đã dùng (cận trên cho số timeslot cần thiết)"""
+        if not self.coloring:
+            self.color()
+        return max(self.coloring.values(), default=-1) + 1
+
+    def lower_bound(self) -> int:
+        """Cận dưới cho số timeslot cần thiết (kích thước clique của find_clique)"""
+        return len(self.find_clique())
+
+    def find_clique(self) -> Set[str]:
+        """
+        Tìm tham lam một clique lớn (các môn đôi một phải khác timeslot)
+
+        Mỗi lớp/giáo viên duy nhất tạo một clique, sau đó thử mở rộng
+        clique lớn nhất bằng các đỉnh kề với mọi phần tử.
+        """
+        best: Set[str] = set()
+        for start in sorted(self.graph, key=lambda c: len(self.graph[c]), reverse=True):
+            clique = {start}
+            candidates = set(self.graph[start])
+            while candidates:
+                node = max(candidates, key=lambda c: (len(self.graph[c] & candidates), c))
+                clique.add(node)
+                candidates &= self.graph[node]
+            if len(clique) > len(best):
+                best = clique
+        return best
+
+    def to_timeslots(self) -> Optional[Dict[str, str]]:
+        """
+        Chuyển màu thành timeslot
+
+        Returns:
+            Dictionary {course_id: timeslot_id}, None nếu số màu vượt số timeslot
+        """
+        if not self.coloring:
+            self.color()
+        timeslot_ids = list(self.timeslots.keys())
+        if self.num_colors() > len(timeslot_ids):
+            return None
+        return {cid: timeslot_ids[color] for cid, color in self.coloring.items()}
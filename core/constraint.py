@@ -1,6 +1,6 @@
 
 
-from typing import Dict, Set
+from typing import Dict, Optional, Set
 from core.model import Assignment, Schedule, Course, Room, Teacher, Timeslot
 
 
@@ -14,6 +14,7 @@ class ConstraintChecker:
         self.rooms = rooms
         self.teachers = teachers
         self.timeslots = timeslots
+        self.slot_bits = {timeslot_id: bit for bit, timeslot_id in enumerate(timeslots)}
 
     def check_all_constraints(self, schedule: Schedule, new_assignment: Assignment) -> bool:
        
@@ -31,6 +32,12 @@ class ConstraintChecker:
         if not self.check_location_constraint(new_assignment):
             return False
         
+        if not self.check_capacity_constraint(new_assignment):
+            return False
+        
+        if not self.check_teacher_availability(new_assignment):
+            return False
+        
         return True
 
     def check_teacher_conflict(self, schedule: Schedule, new_assignment: Assignment) -> bool:
@@ -97,6 +104,35 @@ class ConstraintChecker:
         # Các môn còn lại chỉ được học tại cơ sở B
         return room_location == "B"
 
+    def check_capacity_constraint(self, assignment: Assignment) -> bool:
+        
+       # Ràng buộc 5: Sức chứa phòng phải đủ cho sĩ số lớp
+        
+        course = self.courses.get(assignment.course_id)
+        room = self.rooms.get(assignment.room_id)
+        
+        if not course or not room:
+            return False
+        
+        return room.capacity >= course.class_size
+
+    def check_teacher_availability(self, assignment: Assignment) -> bool:
+        
+       # Ràng buộc 6: Giáo viên phải rảnh tại timeslot được gán
+        
+        teacher = self.teachers.get(assignment.teacher_id)
+        slot_bit = self.slot_bits.get(assignment.timeslot_id)
+        
+        if not teacher or slot_bit is None:
+            return False
+        
+        return teacher.is_available(slot_bit)
+
+    def is_room_suitable(self, course_id: str, room_id: str) -> bool:
+        """Phòng có thỏa ràng buộc địa điểm và sức chứa cho môn hay không"""
+        probe = Assignment(course_id, room_id, "", "")
+        return self.check_location_constraint(probe) and self.check_capacity_constraint(probe)
+
     def is_valid_schedule(self, schedule: Schedule) -> bool:
         """
         Kiểm tra xem một lịch có hợp lệ và hoàn chỉnh hay không
@@ -134,3 +170,97 @@ class ConstraintChecker:
         assigned_courses = {a.course_id for a in schedule.assignments}
         all_courses = set(self.courses.keys())
         return all_courses - assigned_courses
+
+
+class HardConstraintPenalty:
+    """
+    Đếm vi phạm ràng buộc cứng của một lịch (có thể chưa hợp lệ), cập nhật tăng dần
+
+    Mỗi cặp (giáo viên, timeslot), (phòng, timeslot), (lớp, timeslot) có k môn
+    tính k - 1 vi phạm; mỗi assignment sai địa điểm/sức chứa/lịch rảnh tính 1
+    vi phạm "assignment"; mỗi môn chưa gán tính 1 vi phạm "unassigned".
+    update chỉ tốn thời gian theo số assignment thay đổi.
+    """
+
+    KINDS = ("teacher", "room", "class", "assignment", "unassigned")
+
+    def __init__(self, checker: ConstraintChecker, assignments=(),
+                 unary_cache: Optional[Dict[Assignment, bool]] = None):
+        """
+        Args:
+            unary_cache: Cache kết quả kiểm tra địa điểm/sức chứa/lịch rảnh theo
+                         assignment, có thể dùng chung giữa nhiều lịch
+        """
+        self.checker = checker
+        self.unary_cache = unary_cache if unary_cache is not None else {}
+        self.counts: Dict[tuple, int] = {}  # (loại, tài nguyên, timeslot) -> số môn
+        self.course_counts: Dict[str, int] = {}  # course_id -> số lần được gán
+        self.violations: Dict[str, int] = dict.fromkeys(self.KINDS, 0)
+        self.reset(assignments)
+
+    def reset(self, assignments):
+        """Đếm lại từ đầu cho danh sách assignment mới"""
+        self.counts = {}
+        self.course_counts = {}
+        self.violations = dict.fromkeys(self.KINDS, 0)
+        self.violations["unassigned"] = len(self.checker.courses)
+        self.update((), assignments)
+
+    def _keys(self, a: Assignment):
+        course = self.checker.courses.get(a.course_id)
+        keys = [("teacher", a.teacher_id, a.timeslot_id), ("room", a.room_id, a.timeslot_id)]
+        if course:
+            keys.append(("class", course.student_class, a.timeslot_id))
+        return keys
+
+    def _is_unary_valid(self, a: Assignment) -> bool:
+        valid = self.unary_cache.get(a)
+        if valid is None:
+            valid = (self.checker.check_location_constraint(a) and
+                     self.checker.check_capacity_constraint(a) and
+                     self.checker.check_teacher_availability(a))
+            self.unary_cache[a] = valid
+        return valid
+
+    def cost(self, a: Assignment) -> int:
+        """Số vi phạm tăng thêm nếu thêm assignment a (không đổi trạng thái)"""
+        added = sum(1 for key in self._keys(a) if self.counts.get(key))
+        if not self._is_unary_valid(a):
+            added += 1
+        return added
+
+    def update(self, removed, added):
+        """Bỏ các assignment removed và thêm các assignment added"""
+        violations = self.violations
+        for a in removed:
+            for key in self._keys(a):
+                count = self.counts[key] - 1
+                if count:
+                    self.counts[key] = count
+                    violations[key[0]] -= 1
+                else:
+                    del self.counts[key]
+            if not self._is_unary_valid(a):
+                violations["assignment"] -= 1
+            count = self.course_counts[a.course_id] - 1
+            if count:
+                self.course_counts[a.course_id] = count
+            else:
+                del self.course_counts[a.course_id]
+                violations["unassigned"] += 1
+        for a in added:
+            for key in self._keys(a):
+                count = self.counts.get(key, 0)
+                if count:
+                    violations[key[0]] += 1
+                self.counts[key] = count + 1
+            if not self._is_unary_valid(a):
+                violations["assignment"] += 1
+            count = self.course_counts.get(a.course_id, 0)
+            if not count:
+                violations["unassigned"] -= 1
+            self.course_counts[a.course_id] = count + 1
+
+    def total(self) -> int:
+        """Tổng số vi phạm mọi loại"""
+        return sum(self.violations.values())
@@ -0,0 +1,239 @@
+"""
+Dựng và sửa lịch khả thi (dùng chung cho GWO và LNS)
+
+ScheduleBuilder gom các bước không phụ thuộc thuật toán tìm kiếm: dựng lịch
+tham lam ngẫu nhiên, dựng lịch ngẫu nhiên, sửa lịch (bỏ xung đột, gán các
+môn còn thiếu) và chuẩn hóa một lịch ngoài làm lịch khởi tạo ấm.
+"""
+
+import random
+from typing import Dict, List, Optional, Tuple
+from core.model import Schedule, Assignment, Course, Room, Teacher, Timeslot
+from core.constraint import ConstraintChecker
+from core.room_index import RoomIndex
+
+
+class ScheduleBuilder:
+    """Lớp dựng, sửa và chuẩn hóa lịch thỏa ràng buộc cứng"""
+
+    def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
+                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot],
+                 constraint_checker: Optional[ConstraintChecker] = None):
+        """
+        Args:
+            constraint_checker: Bộ kiểm tra ràng buộc cứng dùng chung, mặc định tạo mới
+        """
+        self.courses = courses
+        self.rooms = rooms
+        self.teachers = teachers
+        self.timeslots = timeslots
+        self.constraint_checker = constraint_checker or ConstraintChecker(courses, rooms, teachers, timeslots)
+
+        # Tạo mapping từ tên môn đến danh sách giáo viên có thể dạy
+        self.course_to_teachers: Dict[str, List[str]] = {}
+        for teacher_id, teacher in teachers.items():
+            for course_name in teacher.courses:
+                self.course_to_teachers.setdefault(course_name, []).append(teacher_id)
+        self.room_index = RoomIndex(rooms)
+
+        # Timeslot giáo viên rảnh (lọc trước theo bitmask)
+        self.teacher_timeslots = {
+            teacher_id: [tid for bit, tid in enumerate(timeslots) if teacher.is_available(bit)]
+            for teacher_id, teacher in teachers.items()
+        }
+        self._options_cache: Optional[Dict[str, Tuple[List[Tuple[str, str]], List[str]]]] = None
+
+    def constructive(self, max_restarts: int = 5, order: Optional[List[str]] = None,
+                     timeslot_hints: Optional[Dict[str, str]] = None) -> Schedule:
+        """
+        Dựng một lịch bằng tham lam ngẫu nhiên: môn ít lựa chọn nhất trước
+
+        Trạng thái bận của giáo viên, phòng và lớp được giữ trong các set nên
+        mỗi lần thử là O(1) thay vì quét toàn bộ lịch. Môn nào không xếp được
+        sẽ được đưa lên đầu thứ tự ở lần dựng lại tiếp theo (squeaky wheel),
+        tối đa max_restarts lần; trả về lịch đầy đủ đầu tiên hoặc lịch gán được
+        nhiều môn nhất.
+
+        Args:
+            order: Thứ tự dựng ban đầu (ví dụ thứ tự tô màu DSatur)
+            timeslot_hints: {course_id: timeslot_id} được thử trước (ví dụ từ DSaturColoring)
+        """
+        options = self.options()
+        if order is None:
+            # Thứ tự: ít lựa chọn trước, ngẫu nhiên giữa các môn ngang nhau
+            order = sorted(self.courses, key=lambda cid: (len(options[cid][0]) * len(options[cid][1]),
+                                                          random.random()))
+        best: Optional[Schedule] = None
+        for _ in range(max_restarts + 1):
+            schedule, failed = self._construct_greedy(order, options, timeslot_hints or {})
+            if best is None or len(schedule.assignments) > len(best.assignments):
+                best = schedule
+            if not failed:
+                break
+            failed_set = set(failed)
+            order = failed + [cid for cid in order if cid not in failed_set]
+        return best
+
+    def options(self) -> Dict[str, Tuple[List[Tuple[str, str]], List[str]]]:
+        """{course_id: ([(giáo viên, timeslot) khả dĩ], [phòng phù hợp, nhỏ trước])}, tính một lần"""
+        cached = self._options_cache
+        if cached is None:
+            cached = {}
+            for course_id, course in self.courses.items():
+                pairs = [(teacher_id, timeslot_id)
+                         for teacher_id in self.course_to_teachers.get(course.name, [])
+                         for timeslot_id in self.teacher_timeslots.get(teacher_id, [])]
+                cached[course_id] = (pairs, self.available_rooms(course))
+            self._options_cache = cached
+        return cached
+
+    def _construct_greedy(self, order: List[str],
+                          options: Dict[str, Tuple[List[Tuple[str, str]], List[str]]],
+                          timeslot_hints: Dict[str, str]) -> Tuple[Schedule, List[str]]:
+        """Một lượt dựng tham lam theo thứ tự cho trước, trả về (lịch, các môn không xếp được)"""
+        schedule = Schedule()
+        teacher_busy = set()
+        room_busy = set()
+        class_busy = set()
+        failed = []
+
+        for course_id in order:
+            pairs, rooms = options[course_id]
+            student_class = self.courses[course_id].student_class
+            placed = False
+            # Duyệt (giáo viên, timeslot) theo thứ tự ngẫu nhiên (timeslot gợi ý trước),
+            # phòng nhỏ nhất còn trống
+            indices = random.sample(range(len(pairs)), len(pairs))
+            hint = timeslot_hints.get(course_id)
+            if hint:
+                indices.sort(key=lambda i: pairs[i][1] != hint)
+            for index in indices:
+                teacher_id, timeslot_id = pairs[index]
+                if (teacher_id, timeslot_id) in teacher_busy or (student_class, timeslot_id) in class_busy:
+                    continue
+                room_id = next((rid for rid in rooms if (rid, timeslot_id) not in room_busy), None)
+                if room_id is None:
+                    continue
+                schedule.add_assignment(Assignment(course_id, room_id, teacher_id, timeslot_id))
+                teacher_busy.add((teacher_id, timeslot_id))
+                room_busy.add((room_id, timeslot_id))
+                class_busy.add((student_class, timeslot_id))
+                placed = True
+                break
+            if not placed:
+                failed.append(course_id)
+
+        return schedule, failed
+
+    def random_schedule(self) -> Schedule:
+        """Tạo một lịch ngẫu nhiên hợp lệ (môn theo thứ tự ngẫu nhiên, gen thử ngẫu nhiên)"""
+        schedule = Schedule()
+        course_ids = list(self.courses.keys())
+        random.shuffle(course_ids)
+
+        for course_id in course_ids:
+            assignment = self.try_assignment(course_id, self.courses[course_id], schedule)
+            if assignment:
+                schedule.add_assignment(assignment)
+
+        return schedule
+
+    def sanitize(self, schedule: Schedule) -> Schedule:
+        """
+        Chuẩn hóa một lịch ngoài cho bài toán hiện tại: bỏ các assignment
+        tham chiếu môn/giáo viên/phòng/timeslot không tồn tại hoặc giáo viên
+        không dạy được môn, rồi sửa (bỏ xung đột, gán các môn còn thiếu)
+        """
+        kept = Schedule()
+        seen = set()
+        for a in schedule.assignments:
+            course = self.courses.get(a.course_id)
+            if (course is None or a.course_id in seen or a.room_id not in self.rooms
+                    or a.timeslot_id not in self.timeslots
+                    or a.teacher_id not in self.course_to_teachers.get(course.name, [])):
+                continue
+            seen.add(a.course_id)
+            kept.add_assignment(a)
+        return self.repair(kept)
+
+    def perturb(self, schedule: Schedule, rate: float) -> Schedule:
+        """Biến thể của một lịch: bỏ ngẫu nhiên một tỉ lệ môn rồi gán lại"""
+        assignments = schedule.assignments
+        drop = max(1, int(round(len(assignments) * rate))) if assignments else 0
+        dropped = set(random.sample(range(len(assignments)), min(drop, len(assignments))))
+        variant = Schedule([a for i, a in enumerate(assignments) if i not in dropped])
+        return self.repair(variant)
+
+    def repair(self, schedule: Schedule) -> Schedule:
+        """Giữ các assignment không xung đột (theo thứ tự), rồi thử gán các môn còn thiếu"""
+        repaired = Schedule()
+
+        # Bước 1: Giữ lại các assignment hợp lệ từ lịch cũ
+        for assignment in schedule.assignments:
+            if self.constraint_checker.check_all_constraints(repaired, assignment):
+                repaired.add_assignment(assignment)
+
+        # Bước 2: Thêm các môn chưa được gán
+        assigned_courses = {a.course_id for a in repaired.assignments}
+
+        for course_id, course in self.courses.items():
+            if course_id not in assigned_courses:
+                assignment = self.try_assignment(course_id, course, repaired, max_tries=300)
+                if assignment:
+                    repaired.add_assignment(assignment)
+
+        return repaired
+
+    def try_assignment(self, course_id: str, course: Course,
+                       schedule: Schedule, max_tries: int = 200) -> Optional[Assignment]:
+        """
+        Thử tạo một assignment hợp lệ cho môn học
+
+        Args:
+            course_id: ID môn học
+            course: Đối tượng Course
+            schedule: Lịch hiện tại
+            max_tries: Số lần thử tối đa
+
+        Returns:
+            Assignment nếu thành công, None nếu không
+        """
+        available_teachers = [teacher_id for teacher_id in self.course_to_teachers.get(course.name, [])
+                              if self.teacher_timeslots[teacher_id]]
+        available_rooms = self.available_rooms(course)
+
+        if not available_teachers or not available_rooms:
+            return None
+
+        # Thử ngẫu nhiên (chỉ trong các timeslot giáo viên rảnh)
+        for _ in range(max_tries):
+            teacher_id = random.choice(available_teachers)
+            room_id = random.choice(available_rooms)
+            timeslot_id = random.choice(self.teacher_timeslots[teacher_id])
+
+            assignment = Assignment(
+                course_id=course_id,
+                room_id=room_id,
+                teacher_id=teacher_id,
+                timeslot_id=timeslot_id
+            )
+
+            if self.constraint_checker.check_all_constraints(schedule, assignment):
+                return assignment
+
+        return None
+
+    def random_assignment(self, course_id: str, course: Course) -> Optional[Assignment]:
+        """Assignment ngẫu nhiên không kiểm tra xung đột"""
+        available_teachers = [teacher_id for teacher_id in self.course_to_teachers.get(course.name, [])
+                              if self.teacher_timeslots[teacher_id]]
+        available_rooms = self.available_rooms(course)
+        if not available_teachers or not available_rooms:
+            return None
+        teacher_id = random.choice(available_teachers)
+        return Assignment(course_id, random.choice(available_rooms), teacher_id,
+                          random.choice(self.teacher_timeslots[teacher_id]))
+
+    def available_rooms(self, course: Course) -> List[str]:
+        """Lấy danh sách phòng phù hợp với ràng buộc địa điểm và sức chứa, phòng nhỏ trước"""
+        return self.room_index.candidates(course.required_location, course.class_size)
@@ -0,0 +1,221 @@
+"""
+Phân rã bài toán thành các thành phần độc lập và giải song song
+
+Các môn chỉ tương tác với nhau qua giáo viên dùng chung (Teacher.courses),
+lớp sinh viên dùng chung (Course.student_class) và nhóm phòng theo cơ sở.
+Bước tiền xử lý này dựng đồ thị tương tác, tìm các thành phần liên thông,
+giải mỗi thành phần trong một process riêng rồi ghép các lịch con lại.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+from core.model import Schedule, Assignment, Course, Room, Teacher, Timeslot
+from core.constraint import ConstraintChecker
+from core.room_matching import RoomMatcher
+
+
+def _solve_component(args) -> Tuple[Optional[Schedule], bool]:
+    """
+    Giải một thành phần (hàm cấp module để chạy được trong process khác)
+
+    Returns:
+        (lịch hoặc None, solver có hết giờ hay không)
+    """
+    solver_name, courses, rooms, teachers, timeslots, solver_kwargs, soft_weights = args
+    if solver_name in ("gwo", "lns"):
+        from core.evaluator import ScheduleEvaluator
+        evaluator = ScheduleEvaluator(courses, rooms, teachers, timeslots, weights=soft_weights)
+    if solver_name == "gwo":
+        from core.gwo import GWOSolver
+        solver = GWOSolver(courses, rooms, teachers, timeslots, evaluator)
+        # Các thành phần đã được giải song song: mỗi thành phần dựng đàn tuần tự
+        schedule = solver.solve(verbose=False, **dict(solver_kwargs, init_workers=1))
+    elif solver_name == "lns":
+        from core.lns import LNSSolver
+        solver = LNSSolver(courses, rooms, teachers, timeslots, evaluator)
+        schedule = solver.solve(verbose=False, **solver_kwargs)
+    else:
+        from core.backtracking import BacktrackingSolver
+        solver = BacktrackingSolver(courses, rooms, teachers, timeslots)
+        schedule = solver.solve(verbose=False, **solver_kwargs)
+    return schedule, solver.timed_out
+
+
+class ProblemDecomposer:
+    """
+    Lớp phân rã bài toán xếp lịch
+
+    Hai môn được nối với nhau nếu cùng lớp, có chung giáo viên có thể dạy,
+    hoặc (khi couple_rooms=True) có chung phòng hợp lệ. Mặc định
+    (couple_rooms=False) các thành phần chỉ liên kết yếu qua phòng: phòng được
+    phân lại bằng ghép cặp theo từng timeslot khi ghép lịch, và nếu không phân
+    đủ phòng thì giải lại toàn bộ bài toán chung một lần.
+    """
+
+    def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
+                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot],
+                 soft_weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            soft_weights: Trọng số ràng buộc mềm cho GWO/LNS của từng thành phần
+                          (xem ScheduleEvaluator), mặc định trọng số mặc định
+        """
+        self.courses = courses
+        self.rooms = rooms
+        self.teachers = teachers
+        self.timeslots = timeslots
+        self.constraint_checker = ConstraintChecker(courses, rooms, teachers, timeslots)
+        self.soft_weights = soft_weights
+        self.timed_out = False
+
+        self.course_teachers: Dict[str, List[str]] = {}
+        for course_id, course in courses.items():
+            self.course_teachers[course_id] = [tid for tid, t in teachers.items()
+                                               if course.name in t.courses]
+        self.course_rooms: Dict[str, List[str]] = {
+            course_id: [rid for rid, room in rooms.items()
+                        if self._is_room_location_valid(room.location, course.required_location)
+                        and self.constraint_checker.is_room_suitable(course_id, rid)]
+            for course_id, course in courses.items()
+        }
+
+    def _is_room_location_valid(self, room_location: str, required_location: str) -> bool:
+        """Kiểm tra vị trí phòng có phù hợp không"""
+        if "|" in required_location:
+            return room_location in required_location.split("|")
+        return room_location == required_location
+
+    def find_components(self, couple_rooms: bool = False) -> List[List[str]]:
+        """
+        Tìm các thành phần liên thông của đồ thị tương tác
+
+        Args:
+            couple_rooms: Coi phòng dùng chung là một liên kết
+
+        Returns:
+            Danh sách các thành phần (mỗi thành phần là list course_id),
+            sắp xếp theo kích thước giảm dần
+        """
+        parent = {cid: cid for cid in self.courses}
+
+        def find(x: str) -> str:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        def union_all(members: List[str]):
+            for other in members[1:]:
+                ra, rb = find(members[0]), find(other)
+                if ra != rb:
+                    parent[rb] = ra
+
+        # Gom các môn theo từng tài nguyên dùng chung rồi hợp nhất
+        groups: Dict[Tuple[str, str], List[str]] = {}
+        for course_id, course in self.courses.items():
+            groups.setdefault(("class", course.student_class), []).append(course_id)
+            for teacher_id in self.course_teachers[course_id]:
+                groups.setdefault(("teacher", teacher_id), []).append(course_id)
+            if couple_rooms:
+                for room_id in self.course_rooms[course_id]:
+                    groups.setdefault(("room", room_id), []).append(course_id)
+        for members in groups.values():
+            union_all(members)
+
+        components: Dict[str, List[str]] = {}
+        for course_id in self.courses:
+            components.setdefault(find(course_id), []).append(course_id)
+        return sorted(components.values(), key=len, reverse=True)
+
+    def subproblem(self, course_ids: List[str]) -> Tuple[Dict[str, Course], Dict[str, Room],
+                                                         Dict[str, Teacher], Dict[str, Timeslot]]:
+        """Tạo dữ liệu con (courses, rooms, teachers, timeslots) cho một thành phần"""
+        courses = {cid: self.courses[cid] for cid in course_ids}
+        teacher_ids: Set[str] = set()
+        room_ids: Set[str] = set()
+        for cid in course_ids:
+            teacher_ids.update(self.course_teachers[cid])
+            room_ids.update(self.course_rooms[cid])
+        teachers = {tid: t for tid, t in self.teachers.items() if tid in teacher_ids}
+        rooms = {rid: r for rid, r in self.rooms.items() if rid in room_ids}
+        return courses, rooms, teachers, self.timeslots
+
+    def solve(self, solver: str = "backtracking", couple_rooms: bool = False,
+              max_workers: Optional[int] = None, verbose: bool = False,
+              **solver_kwargs) -> Optional[Schedule]:
+        """
+        Giải từng thành phần song song và ghép kết quả
+
+        Args:
+            solver: "backtracking", "gwo" hoặc "lns"
+            couple_rooms: Xem phần docstring của lớp
+            max_workers: Số process tối đa (mặc định theo ProcessPoolExecutor, 1: tuần tự)
+            verbose: In thông tin tiến trình
+            **solver_kwargs: Tham số truyền cho solver.solve
+
+        Returns:
+            Lịch đã ghép, None nếu có thành phần không giải được. self.timed_out
+            cho biết có lần giải nào hết giờ hay không
+        """
+        start_time = time.time()
+        self.timed_out = False
+        components = self.find_components(couple_rooms)
+        if verbose:
+            sizes = [len(c) for c in components]
+            print(f"  Phân rã thành {len(components)} thành phần, kích thước: {sizes}")
+
+        tasks = [(solver,) + self.subproblem(c) + (solver_kwargs, self.soft_weights) for c in components]
+        if len(tasks) == 1 or max_workers == 1:
+            outcomes = [_solve_component(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                outcomes = list(executor.map(_solve_component, tasks))
+        results = [schedule for schedule, _ in outcomes]
+        self.timed_out = any(timed_out for _, timed_out in outcomes)
+
+        # Thành phần vô nghiệm với toàn bộ phòng hợp lệ thì cả bài toán vô nghiệm
+        if solver == "backtracking" and any(r is None for r in results):
+            return None
+
+        merged = Schedule()
+        for partial in results:
+            if partial:
+                for assignment in partial.assignments:
+                    merged.add_assignment(assignment)
+
+        if not couple_rooms and len(components) > 1:
+            repaired = self._reassign_rooms(merged)
+            if repaired is None:
+                # Các thành phần tranh nhau phòng trong cùng timeslot: giải chung một lần
+                if verbose:
+                    print("  Không phân đủ phòng khi ghép các thành phần, giải lại toàn bộ bài toán")
+                joint_kwargs = dict(solver_kwargs)
+                if joint_kwargs.get("time_limit") is not None:
+                    joint_kwargs["time_limit"] -= time.time() - start_time
+                if joint_kwargs.get("time_limit", 1) > 0:
+                    repaired, timed_out = _solve_component((solver, self.courses, self.rooms,
+                                                            self.teachers, self.timeslots, joint_kwargs,
+                                                            self.soft_weights))
+                    self.timed_out = self.timed_out or timed_out
+                else:
+                    self.timed_out = True
+            merged = repaired
+        return merged
+
+    def _reassign_rooms(self, schedule: Schedule) -> Optional[Schedule]:
+        """Phân lại phòng theo từng timeslot bằng ghép cặp sau khi ghép lịch"""
+        matcher = RoomMatcher(self.courses, self.rooms, self.constraint_checker, self.course_rooms)
+        by_slot: Dict[str, List[Assignment]] = {}
+        for assignment in schedule.assignments:
+            by_slot.setdefault(assignment.timeslot_id, []).append(assignment)
+
+        repaired = Schedule()
+        for timeslot_id, assignments in by_slot.items():
+            rooms = matcher.match([a.course_id for a in assignments])
+            if rooms is None:
+                return None
+            for a in assignments:
+                repaired.add_assignment(Assignment(a.course_id, rooms[a.course_id],
+                                                   a.teacher_id, a.timeslot_id))
+        return repaired
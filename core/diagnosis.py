@@ -0,0 +1,133 @@
+"""
+Chẩn đoán khi không có lịch: tìm tập xung đột tối thiểu (QuickXplain)
+
+Tìm một tập con các môn học mà bản thân nó đã không thể xếp lịch, và bỏ
+bất kỳ môn nào ra thì xếp được. Kèm theo là các giáo viên và phòng liên
+quan tới tập môn đó, để người lập kế hoạch biết cần bổ sung tài nguyên nào.
+
+Mỗi lần kiểm tra khả thi (probe) dùng PresolveAnalyzer (mili giây) trước,
+sau đó mới chạy BacktrackingSolver có giới hạn thời gian trên từng thành phần
+độc lập của bài toán con (ProblemDecomposer).
+Probe hết giờ được xem là "xếp được" nên tập trả về luôn chắc chắn vô nghiệm
+(chỉ có thể chưa tối thiểu).
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional
+from core.model import Course, Room, Teacher, Timeslot
+from core.backtracking import BacktrackingSolver
+from core.decomposition import ProblemDecomposer
+from core.presolve import PresolveAnalyzer
+
+
+@dataclass
+class ConflictSet:
+    """Tập xung đột: các môn không thể cùng xếp lịch và tài nguyên liên quan"""
+    courses: List[str]
+    teachers: List[str]
+    rooms: List[str]
+    reasons: List[str] = field(default_factory=list)
+    minimal: bool = True  # False nếu có probe hết giờ (tập có thể chưa tối thiểu)
+    probes: int = 0
+
+
+class ConflictExplainer:
+    """Lớp tìm tập xung đột tối thiểu bằng QuickXplain"""
+
+    def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
+                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot],
+                 probe_time_limit: float = 2.0):
+        """
+        Args:
+            probe_time_limit: Giới hạn thời gian (giây) cho mỗi lần chạy Backtracking
+        """
+        self.courses = courses
+        self.rooms = rooms
+        self.teachers = teachers
+        self.timeslots = timeslots
+        self.probe_time_limit = probe_time_limit
+        self._memo: Dict[FrozenSet[str], bool] = {}
+        self.probes = 0
+        self.timeouts = 0
+
+    def is_satisfiable(self, course_ids) -> bool:
+        """Probe: các môn này có thể cùng được xếp lịch hay không"""
+        key = frozenset(course_ids)
+        if key in self._memo:
+            return self._memo[key]
+        if not key:
+            return True
+
+        self.probes += 1
+        courses = {cid: self.courses[cid] for cid in self.courses if cid in key}
+        if not PresolveAnalyzer(courses, self.rooms, self.teachers, self.timeslots).analyze().feasible:
+            result = False
+        else:
+            # Một phần vô nghiệm thì cả tập vô nghiệm: thử từng thành phần (chỉ nối
+            # qua giáo viên và lớp) trước, bài toán đầy đủ chỉ chạy khi cần
+            decomposer = ProblemDecomposer(courses, self.rooms, self.teachers, self.timeslots)
+            components = decomposer.find_components(couple_rooms=False)
+            result = all(self._solve(decomposer.subproblem(component)) for component in components)
+            if result and len(components) > 1:
+                result = self._solve((courses, self.rooms, self.teachers, self.timeslots))
+        self._memo[key] = result
+        return result
+
+    def _solve(self, problem) -> bool:
+        """Chạy Backtracking (phòng ghép cặp theo slot) có giới hạn thời gian"""
+        solver = BacktrackingSolver(*problem)
+        schedule = solver.solve(decompose_rooms=True, time_limit=self.probe_time_limit, presolve=False)
+        if solver.timed_out:
+            self.timeouts += 1
+        return schedule is not None or solver.timed_out
+
+    def explain(self, course_ids: Optional[List[str]] = None,
+                known_infeasible: bool = False) -> Optional[ConflictSet]:
+        """
+        Tìm tập xung đột tối thiểu
+
+        Args:
+            course_ids: Các môn cần xét (mặc định: tất cả), thứ tự là thứ tự ưu
+                        tiên giữ lại của QuickXplain (môn đầu danh sách được ưu tiên
+                        xuất hiện trong tập xung đột)
+            known_infeasible: Đã biết các môn này vô nghiệm (solver đã chạy hết
+                              cây tìm kiếm), bỏ qua probe đầu tiên
+
+        Returns:
+            ConflictSet, hoặc None nếu các môn xếp được (không có xung đột)
+        """
+        course_ids = list(course_ids if course_ids is not None else self.courses)
+        if known_infeasible:
+            self._memo[frozenset(course_ids)] = False
+        elif self.is_satisfiable(course_ids):
+            return None
+
+        conflict = self._quickxplain([], False, course_ids)
+        # Thứ tự ổn định theo danh sách đầu vào
+        position = {cid: i for i, cid in enumerate(course_ids)}
+        conflict.sort(key=position.__getitem__)
+
+        conflict_courses = {cid: self.courses[cid] for cid in conflict}
+        decomposer = ProblemDecomposer(conflict_courses, self.rooms, self.teachers, self.timeslots)
+        teachers = sorted({tid for cid in conflict for tid in decomposer.course_teachers[cid]})
+        rooms = sorted({rid for cid in conflict for rid in decomposer.course_rooms[cid]})
+        report = PresolveAnalyzer(conflict_courses, self.rooms, self.teachers, self.timeslots).analyze()
+        return ConflictSet(courses=conflict, teachers=teachers, rooms=rooms,
+                           reasons=report.issues,
+                           minimal=self.timeouts == 0, probes=self.probes)
+
+    def _quickxplain(self, background: List[str], has_delta: bool, candidates: List[str]) -> List[str]:
+        """
+        QuickXplain (Junker 2004): trả về tập con tối thiểu của candidates mà
+        cùng với background đã vô nghiệm
+        """
+        if has_delta and not self.is_satisfiable(background):
+            return []
+        if len(candidates) == 1:
+            return list(candidates)
+
+        half = len(candidates) // 2
+        first, second = candidates[:half], candidates[half:]
+        delta2 = self._quickxplain(background + first, bool(first), second)
+        delta1 = self._quickxplain(background + delta2, bool(delta2), first)
+        return delta1 + delta2
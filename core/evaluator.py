@@ -1,22 +1,54 @@
 """
 Đánh giá lịch học dựa trên các ràng buộc mềm (Soft Constraints)
 Dùng để tính fitness cho thuật toán GWO
+
+Các ràng buộc mềm là các kernel trong core.soft_constraints, được kết hợp
+theo trọng số cấu hình (mặc định: liên tục của giáo viên và sử dụng phòng,
+mỗi loại 50 điểm).
 """
 
-from typing import Dict, List, Set
+import math
+from typing import Dict, Iterable, List, Optional
 from core.model import Schedule, Assignment, Course, Room, Teacher, Timeslot
+from core.soft_constraints import (SOFT_CONSTRAINTS, SoftConstraint, TeacherConsecutive,
+                                   RoomUsage, timeslot_index, has_consecutive_violation)
+
+
+def check_soft_weights(weights: Dict[str, float]):
+    """Kiểm tra trọng số ràng buộc mềm: tên kernel phải tồn tại, trọng số là số hữu hạn >= 0"""
+    for name, weight in weights.items():
+        if name not in SOFT_CONSTRAINTS:
+            raise ValueError(f"Ràng buộc mềm không tồn tại: {name} (chọn trong {list(SOFT_CONSTRAINTS)})")
+        if (isinstance(weight, bool) or not isinstance(weight, (int, float))
+                or not math.isfinite(weight) or weight < 0):
+            raise ValueError(f"Trọng số của {name} phải là số hữu hạn >= 0: {weight!r}")
 
 
 class ScheduleEvaluator:
     """Lớp đánh giá lịch học"""
 
     def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
-                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot]):
+                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot],
+                 weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            weights: Trọng số theo tên kernel (xem SOFT_CONSTRAINTS), kernel có
+                     trọng số 0 bị bỏ qua. Mặc định dùng default_weight của kernel.
+        """
         self.courses = courses
         self.rooms = rooms
         self.teachers = teachers
         self.timeslots = timeslots
 
+        check_soft_weights(weights or {})
+        self.weights = {name: cls.default_weight for name, cls in SOFT_CONSTRAINTS.items()}
+        self.weights.update(weights or {})
+        self.kernels = self._create_kernels()
+
+    def _create_kernels(self) -> Dict[str, SoftConstraint]:
+        return {name: SOFT_CONSTRAINTS[name](self.courses, self.rooms, self.teachers, self.timeslots)
+                for name, weight in self.weights.items() if weight > 0}
+
     def evaluate(self, schedule: Schedule) -> float:
         """
         Tính điểm fitness cho lịch học
@@ -28,12 +60,23 @@ class ScheduleEvaluator:
         if not schedule.assignments:
             return 0.0
         
-        # Tính điểm cho từng ràng buộc mềm
-        score_consecutive = self._evaluate_teacher_consecutive(schedule)  # 0-50 điểm
-        score_rooms = self._evaluate_room_usage(schedule)  # 0-50 điểm
-        
-        total_score = score_consecutive + score_rooms
-        return min(100.0, total_score)
+        return self.combine(self.evaluate_breakdown(schedule))
+
+    def evaluate_breakdown(self, schedule: Schedule) -> Dict[str, float]:
+        """Điểm [0, 1] của từng kernel đang bật"""
+        return {name: kernel.evaluate(schedule) for name, kernel in self.kernels.items()}
+
+    def combine(self, scores: Dict[str, float]) -> float:
+        """Kết hợp điểm các kernel theo trọng số thành thang 0-100"""
+        total_weight = sum(self.weights[name] for name in scores)
+        if total_weight <= 0:
+            return 0.0
+        total_score = sum(self.weights[name] * score for name, score in scores.items())
+        return min(100.0, 100.0 * total_score / total_weight)
+
+    def incremental(self, assignments: Iterable[Assignment]) -> "IncrementalEvaluation":
+        """Tạo trạng thái đánh giá tăng dần cho một tập assignment"""
+        return IncrementalEvaluation(self, assignments)
 
     def _evaluate_teacher_consecutive(self, schedule: Schedule) -> float:
         """
@@ -45,58 +88,50 @@ class ScheduleEvaluator:
         Returns:
             Điểm từ 0 đến 50
         """
-        # Nhóm các assignment theo giáo viên
-        teacher_schedules: Dict[str, List[Assignment]] = {}
-        
-        for assignment in schedule.assignments:
-            teacher_id = assignment.teacher_id
-            if teacher_id not in teacher_schedules:
-                teacher_schedules[teacher_id] = []
-            teacher_schedules[teacher_id].append(assignment)
-        
-        violations = 0
-        
-        for teacher_id, assignments in teacher_schedules.items():
-            # Lấy danh sách timeslot và sắp xếp
-            timeslot_indices = []
-            for a in assignments:
-                ts = self.timeslots.get(a.timeslot_id)
-                if ts:
-                    day_order = {"Thứ 2": 0, "Thứ 3": 1, "Thứ 4": 2, "Thứ 5": 3, "Thứ 6": 4, "Thứ 7": 5}
-                    session_order = 0 if ts.session == "Sáng" else 1 if ts.session == "Chiều" else ts.period
-                    index = day_order.get(ts.day, 0) * 100 + session_order * 10 + ts.period
-                    timeslot_indices.append(index)
-            
-            timeslot_indices.sort()
-            
-            # Đếm số lần có 3 tiết liên tiếp trở lên
-            consecutive_count = 1
-            for i in range(len(timeslot_indices) - 1):
-                if timeslot_indices[i + 1] - timeslot_indices[i] == 1:
-                    consecutive_count += 1
-                    if consecutive_count >= 3:
-                        violations += 1
-                        break  # Chỉ đếm 1 lần vi phạm cho mỗi giáo viên
-                else:
-                    consecutive_count = 1
-        
-        # Điểm = 50 - (số vi phạm * 8.33), tối thiểu 0
-        score = max(0.0, 50.0 - violations * 8.33)
-        return score
+        kernel = TeacherConsecutive(self.courses, self.rooms, self.teachers, self.timeslots)
+        return 50.0 * kernel.evaluate(schedule)
 
     def _evaluate_room_usage(self, schedule: Schedule) -> float:
-        
-        used_rooms = set()
-        for assignment in schedule.assignments:
-            used_rooms.add(assignment.room_id)
-        
-        num_courses = len(self.courses)
-        num_used_rooms = len(used_rooms)
-        
-        # Số phòng dư thừa
-        excess_rooms = max(0, num_used_rooms - num_courses)
-        
-        # Điểm = 50 - (số phòng dư * 5), tối thiểu 0
-        score = max(0.0, 50.0 - excess_rooms * 5.0)
-        return score
+        """Điểm = 50 - (số phòng dư * 5), tối thiểu 0"""
+        kernel = RoomUsage(self.courses, self.rooms, self.teachers, self.timeslots)
+        return 50.0 * kernel.evaluate(schedule)
+
+    @staticmethod
+    def get_timeslot_index(ts: Timeslot) -> int:
+        """Chỉ số tuyến tính của timeslot (2 timeslot liền kề chênh nhau đúng 1)"""
+        return timeslot_index(ts)
 
+    @staticmethod
+    def has_consecutive_violation(timeslot_indices: List[int]) -> bool:
+        """Kiểm tra một giáo viên có dạy 3 tiết liên tiếp trở lên hay không"""
+        return has_consecutive_violation(timeslot_indices)
+
+
+class IncrementalEvaluation:
+    """
+    Trạng thái đánh giá tăng dần
+
+    Mỗi kernel chỉ tính lại các nhóm bị ảnh hưởng khi gọi update, nên chi phí
+    một bước phụ thuộc vào số assignment thay đổi chứ không phải kích thước lịch.
+    """
+
+    def __init__(self, evaluator: ScheduleEvaluator, assignments: Iterable[Assignment]):
+        self.evaluator = evaluator
+        self.kernels = evaluator._create_kernels()
+        assignments = list(assignments)
+        self.count = len(assignments)
+        for kernel in self.kernels.values():
+            kernel.reset(assignments)
+
+    def update(self, removed: List[Assignment], added: List[Assignment]) -> float:
+        """Bỏ các assignment removed, thêm các assignment added, trả về fitness mới"""
+        for kernel in self.kernels.values():
+            kernel.update(removed, added)
+        self.count += len(added) - len(removed)
+        return self.fitness
+
+    @property
+    def fitness(self) -> float:
+        if self.count <= 0:
+            return 0.0
+        return self.evaluator.combine({name: kernel.score() for name, kernel in self.kernels.items()})
@@ -1,9 +1,45 @@
 
+import multiprocessing
+import os
 import random
-from typing import Dict, List, Tuple, Optional
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Tuple, Optional
 from core.model import Schedule, Assignment, Course, Room, Teacher, Timeslot
-from core.constraint import ConstraintChecker
+from core.constraint import ConstraintChecker, HardConstraintPenalty
 from core.evaluator import ScheduleEvaluator
+from core.construction import ScheduleBuilder
+from core.coloring import DSaturColoring
+
+
+PARALLEL_INIT_MIN_PLACEMENTS = 50000  # Số sói × số môn tối thiểu để dựng đàn song song
+                                     # (nhỏ hơn thì chi phí tạo process lớn hơn lợi ích)
+
+# Trọng số penalty thích nghi của chế độ search_mode="penalty" (điểm fitness / vi phạm)
+PENALTY_INCREASE = 1.5
+PENALTY_DECREASE = 1.2
+PENALTY_MIN_WEIGHT = 0.01
+PENALTY_MAX_WEIGHT = 200.0
+PENALTY_TARGET_RATIO = 0.5  # Tỉ lệ sói được phép vi phạm mỗi loại ràng buộc
+PENALTY_RANDOM_TRIES = 10  # Số lần thử gen ngẫu nhiên không xung đột trước khi chấp nhận vi phạm
+
+COLORING_SEED_FRACTION = 0.1  # Tỉ lệ đàn dựng theo tô màu DSatur (coloring=True), ít nhất một sói
+
+
+def _build_wolves(args) -> List[List[Assignment]]:
+    """
+    Tạo một nhóm sói bằng bộ dựng tham lam (hàm cấp module để chạy trong process khác),
+    dừng khi qua deadline (time.time(), None: không giới hạn) nhưng luôn dựng ít nhất một sói
+    """
+    courses, rooms, teachers, timeslots, count, seed, deadline = args
+    random.seed(seed)
+    builder = ScheduleBuilder(courses, rooms, teachers, timeslots)
+    wolves = []
+    for _ in range(count):
+        if wolves and deadline is not None and time.time() > deadline:
+            break
+        wolves.append(builder.constructive().assignments)
+    return wolves
 
 
 class GWOSolver:
@@ -18,8 +54,13 @@ class GWOSolver:
     5. Lặp lại cho đến khi đạt số lần lặp tối đa
     """
 
+    INIT_METHODS = ("constructive", "random")
+    SEARCH_MODES = ("feasible", "penalty")
+    REPAIR_MODES = ("leaders", "end")
+
     def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
-                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot]):
+                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot],
+                 evaluator: Optional[ScheduleEvaluator] = None):
         """
         Khởi tạo solver
         
@@ -28,29 +69,42 @@ class GWOSolver:
             rooms: Dictionary các phòng học
             teachers: Dictionary các giáo viên
             timeslots: Dictionary các khung giờ
+            evaluator: Bộ đánh giá fitness (trọng số ràng buộc mềm), mặc định tạo mới
         """
         self.courses = courses
         self.rooms = rooms
         self.teachers = teachers
         self.timeslots = timeslots
         self.constraint_checker = ConstraintChecker(courses, rooms, teachers, timeslots)
-        self.evaluator = ScheduleEvaluator(courses, rooms, teachers, timeslots)
-        
-        # Tạo mapping từ tên môn đến danh sách giáo viên có thể dạy
-        self.course_to_teachers = self._build_course_teacher_mapping(teachers)
-
-    def _build_course_teacher_mapping(self, teachers: Dict[str, Teacher]) -> Dict[str, List[str]]:
-        """Xây dựng mapping từ tên môn đến danh sách giáo viên"""
-        mapping = {}
-        for teacher_id, teacher in teachers.items():
-            for course_name in teacher.courses:
-                if course_name not in mapping:
-                    mapping[course_name] = []
-                mapping[course_name].append(teacher_id)
-        return mapping
+        self.evaluator = evaluator or ScheduleEvaluator(courses, rooms, teachers, timeslots)
+        
+        # Dựng/sửa lịch khả thi (dùng chung với LNS)
+        self.builder = ScheduleBuilder(courses, rooms, teachers, timeslots, self.constraint_checker)
+        self.course_to_teachers = self.builder.course_to_teachers
+        self.room_index = self.builder.room_index
+        self.teacher_timeslots = self.builder.teacher_timeslots
+        
+        # Cách dựng sói mới (đặt lại trong solve)
+        self.init_method = "constructive"
+        self.init_workers: Optional[int] = 1
+        self.mutation_rate = 1.0 / max(1, len(courses))
+        self.search_mode = "feasible"
+        self.penalty_weights: Dict[str, float] = {}
+        self._unary_cache: Dict[Assignment, bool] = {}
+        self._deadline: Optional[float] = None
 
     def solve(self, population_size: int = 20, max_iterations: int = 100, 
-              verbose: bool = True) -> Schedule:
+              verbose: bool = True, patience: Optional[int] = None,
+              stagnation_iterations: Optional[int] = None, min_diversity: float = 0.0,
+              restart_fraction: float = 0.3, max_restarts: int = 3,
+              progress_callback: Optional[Callable[[Dict], None]] = None,
+              time_limit: Optional[float] = None,
+              seed_schedules: Optional[List[Schedule]] = None, seed_fraction: float = 0.5,
+              perturbation_rate: float = 0.2, init_method: str = "constructive",
+              init_workers: Optional[int] = 1,
+              mutation_rate: Optional[float] = None, search_mode: str = "feasible",
+              penalty_weight: float = 1.0, repair: str = "leaders",
+              coloring: bool = True) -> Schedule:
         """
         Giải bài toán bằng GWO
         
@@ -58,18 +112,76 @@ class GWOSolver:
             population_size: Số lượng sói trong đàn
             max_iterations: Số lần lặp tối đa
             verbose: In thông tin tiến trình
+            patience: Dừng sớm khi Alpha không cải thiện sau ngần này vòng lặp
+                      (None: chạy đủ max_iterations)
+            stagnation_iterations: Số vòng không cải thiện được xem là trì trệ
+                                   (None: không dùng tiêu chí này)
+            min_diversity: Độ đa dạng tối thiểu (0-1), thấp hơn được xem là trì trệ
+            restart_fraction: Tỉ lệ sói tệ nhất được thay bằng sói mới khi trì trệ
+            max_restarts: Số lần tái khởi tạo tối đa
+            progress_callback: Hàm nhận dict số liệu sau mỗi vòng lặp
+            time_limit: Giới hạn thời gian (giây), None nếu không giới hạn. Được kiểm
+                        tra khi dựng đàn và trước mỗi lần cập nhật sói; hết giờ thì
+                        trả về Alpha hiện tại và đặt self.timed_out
+            seed_schedules: Các lịch dùng để khởi tạo ấm (lịch tuần trước, lời giải
+                            Backtracking, lịch trong kho...). Có thể thiếu môn hoặc
+                            chứa môn lạ, sẽ được lọc và sửa lại
+            seed_fraction: Tỉ lệ đàn được tạo từ seed_schedules (các lịch gốc và
+                           biến thể nhiễu), phần còn lại là sói ngẫu nhiên để giữ đa dạng
+            perturbation_rate: Tỉ lệ môn được gán lại ngẫu nhiên trong mỗi biến thể
+            init_method: "constructive" (tham lam, môn khó trước) hoặc "random"
+                         (thử ngẫu nhiên từng môn như trước)
+            init_workers: Số process dựng đàn ban đầu (mặc định 1: tuần tự, None: theo
+                          số CPU). Chỉ dùng với "constructive" khi số sói × số môn từ
+                          PARALLEL_INIT_MIN_PLACEMENTS trở lên và solver không chạy
+                          trong process daemon (process daemon không được tạo process con)
+            mutation_rate: Xác suất đột biến cơ sở của mỗi môn khi cập nhật vị trí
+                           (None: 1 / số môn, tức trung bình một môn mỗi sói)
+            search_mode: "feasible" (mỗi sói được sửa cho hợp lệ sau khi cập nhật) hoặc
+                         "penalty" (sói được phép vi phạm ràng buộc cứng tạm thời,
+                         fitness bị trừ trọng số × số vi phạm; trọng số từng loại vi phạm
+                         tự điều chỉnh theo tỉ lệ sói mắc loại đó, xem _adapt_penalty_weights)
+            penalty_weight: Trọng số ban đầu (điểm fitness / vi phạm) của chế độ "penalty"
+            repair: Chế độ "penalty": "leaders" (sửa Alpha, Beta, Delta mỗi vòng) hoặc
+                    "end" (chỉ sửa Alpha khi kết thúc)
+            coloring: Dựng COLORING_SEED_FRACTION đàn bằng bộ tham lam theo thứ tự và
+                      màu (timeslot gợi ý) của DSaturColoring, khi số màu không vượt
+                      số timeslot
             
         Returns:
             Lịch tốt nhất tìm được
         """
+        start_time = time.time()
+        self.timed_out = False
+        self._deadline = start_time + time_limit if time_limit is not None else None
+        self.init_method = init_method
+        self.init_workers = init_workers
+        self.mutation_rate = mutation_rate if mutation_rate is not None else 1.0 / max(1, len(self.courses))
+        if init_method not in self.INIT_METHODS:
+            raise ValueError(f"init_method không hợp lệ: {init_method}")
+        if search_mode not in self.SEARCH_MODES:
+            raise ValueError(f"search_mode không hợp lệ: {search_mode}")
+        if repair not in self.REPAIR_MODES:
+            raise ValueError(f"repair không hợp lệ: {repair}")
+        self.search_mode = search_mode
+        penalty_mode = search_mode == "penalty"
+        self.penalty_weights = dict.fromkeys(HardConstraintPenalty.KINDS, penalty_weight)
         if verbose:
             print(f"  Khởi tạo đàn {population_size} sói...")
         
         # Khởi tạo đàn sói
-        population = self._initialize_population(population_size)
-        
-        # Tính fitness cho từng sói
-        fitness_scores = [self.evaluator.evaluate(wolf) for wolf in population]
+        population = self._initialize_population(population_size, seed_schedules,
+                                                 seed_fraction, perturbation_rate, coloring)
+        
+        # Tính fitness cho từng sói (chế độ penalty: điểm mềm - penalty, số vi phạm của
+        # mỗi sói được đếm tăng dần theo từng gen khi dựng sói)
+        soft_scores = [self.evaluator.evaluate(wolf) for wolf in population]
+        self._unary_cache = {}
+        penalties = [self._new_penalty(wolf) for wolf in population] if penalty_mode else []
+        fitness_scores = ([self._penalized(soft, state.violations) for soft, state in zip(soft_scores, penalties)]
+                          if penalty_mode else list(soft_scores))
+        if penalty_mode and repair == "leaders":
+            self._repair_leaders(population, soft_scores, penalties, fitness_scores)
         
         # Tìm Alpha, Beta, Delta (3 sói tốt nhất)
         alpha_idx, beta_idx, delta_idx = self._get_top_three(fitness_scores)
@@ -77,25 +189,49 @@ class GWOSolver:
         beta = population[beta_idx].copy()
         delta = population[delta_idx].copy()
         alpha_fitness = fitness_scores[alpha_idx]
+        alpha_soft = soft_scores[alpha_idx]
+        alpha_violations = dict(penalties[alpha_idx].violations) if penalty_mode else {}
         
         if verbose:
             print(f"  Fitness ban đầu: {alpha_fitness:.2f}")
             print(f"  Bắt đầu tối ưu hóa...\n")
         
+        # Số liệu hội tụ theo từng vòng lặp
+        self.history: List[Dict] = []
+        no_improve = 0
+        since_restart = 0
+        restarts = 0
+        total_courses = len(self.courses)
+        
         # Vòng lặp chính
         for iteration in range(max_iterations):
             # Tham số a giảm từ 2 xuống 0 (điều khiển khả năng khám phá)
             a = 2.0 - (2.0 * iteration / max_iterations)
             
-            # Cập nhật từng sói trong đàn
-            for i in range(population_size):
+            # Cập nhật từng sói trong đàn (hết giờ giữa vòng thì giữ các sói chưa cập nhật)
+            for i in range(len(population)):
+                if self._out_of_time():
+                    break
+                if penalty_mode:
+                    # Sói mới được phép vi phạm, số vi phạm được đếm dần khi dựng (không sửa)
+                    state = self._new_penalty(Schedule())
+                    new_wolf = self._update_wolf_position(population[i], alpha, beta, delta, a, state)
+                    new_soft = self.evaluator.evaluate(new_wolf)
+                    new_fitness = self._penalized(new_soft, state.violations)
+                    if new_fitness > fitness_scores[i]:
+                        population[i] = new_wolf
+                        penalties[i] = state
+                        soft_scores[i] = new_soft
+                        fitness_scores[i] = new_fitness
+                    continue
+                
                 # Tính toán vị trí mới dựa trên Alpha, Beta, Delta
                 new_wolf = self._update_wolf_position(
                     population[i], alpha, beta, delta, a
                 )
                 
                 # Sửa lịch để đảm bảo hợp lệ và hoàn chỉnh
-                new_wolf = self._repair_schedule(new_wolf)
+                new_wolf = self.builder.repair(new_wolf)
                 
                 # Tính fitness mới
                 new_fitness = self.evaluator.evaluate(new_wolf)
@@ -105,6 +241,9 @@ class GWOSolver:
                     population[i] = new_wolf
                     fitness_scores[i] = new_fitness
             
+            if penalty_mode and repair == "leaders" and not self.timed_out:
+                self._repair_leaders(population, soft_scores, penalties, fitness_scores)
+            
             # Cập nhật Alpha, Beta, Delta
             alpha_idx, beta_idx, delta_idx = self._get_top_three(fitness_scores)
             
@@ -113,107 +252,249 @@ class GWOSolver:
                 beta = population[beta_idx].copy()
                 delta = population[delta_idx].copy()
                 alpha_fitness = fitness_scores[alpha_idx]
+                alpha_soft = soft_scores[alpha_idx]
+                alpha_violations = dict(penalties[alpha_idx].violations) if penalty_mode else {}
+                no_improve = 0
+                since_restart = 0
+            else:
+                no_improve += 1
+                since_restart += 1
+            
+            diversity = self._population_diversity(population)
+            metrics = {
+                "iteration": iteration + 1,
+                "best_fitness": alpha_fitness,
+                "mean_fitness": sum(fitness_scores) / len(fitness_scores),
+                "diversity": diversity,
+                "assigned": len(alpha.assignments),
+                "restarts": restarts,
+            }
+            if penalty_mode:
+                metrics["violations"] = sum(alpha_violations.values())
+                # Trọng số thích nghi theo tỉ lệ sói vi phạm, rồi tính lại điểm của cả đàn
+                self._adapt_penalty_weights(penalties)
+                fitness_scores = [self._penalized(soft, state.violations) for soft, state in zip(soft_scores, penalties)]
+                alpha_fitness = self._penalized(alpha_soft, alpha_violations)
+            self.history.append(metrics)
+            if progress_callback:
+                progress_callback(metrics)
             
             # In tiến trình
             if verbose and (iteration + 1) % 10 == 0:
                 assigned_count = len(alpha.assignments)
-                total_courses = len(self.courses)
                 print(f"  Iteration {iteration + 1}/{max_iterations}: "
                       f"Fitness = {alpha_fitness:.2f}, "
-                      f"Assigned = {assigned_count}/{total_courses}")
+                      f"Assigned = {assigned_count}/{total_courses}, "
+                      f"Diversity = {diversity:.2f}")
+            
+            # Đạt tối ưu lý thuyết: lịch đầy đủ với fitness 100 không thể cải thiện thêm
+            if alpha_fitness >= 100.0 and len(alpha.assignments) == total_courses:
+                if verbose:
+                    print(f"  Đạt fitness tối đa tại vòng {iteration + 1}, dừng sớm")
+                break
+            
+            if self._out_of_time():
+                if verbose:
+                    print(f"  Hết thời gian ({time_limit}s) tại vòng {iteration + 1}, dừng sớm")
+                break
+            
+            # Trì trệ: tái khởi tạo một phần đàn
+            stagnated = ((stagnation_iterations is not None and
+                          since_restart >= stagnation_iterations) or
+                         diversity < min_diversity)
+            if stagnated and restarts < max_restarts:
+                for i in self._reinject_wolves(population, fitness_scores, restart_fraction):
+                    soft_scores[i] = self.evaluator.evaluate(population[i])
+                    if penalty_mode:
+                        penalties[i] = self._new_penalty(population[i])
+                        fitness_scores[i] = self._penalized(soft_scores[i], penalties[i].violations)
+                restarts += 1
+                since_restart = 0
+                if verbose:
+                    print(f"  Trì trệ tại vòng {iteration + 1} (đa dạng {diversity:.2f}), "
+                          f"tái khởi tạo lần {restarts}")
+                continue
+            
+            # Hội tụ: dừng sớm
+            if patience is not None and no_improve >= patience:
+                if verbose:
+                    print(f"  Hội tụ sau {iteration + 1} vòng (không cải thiện {no_improve} vòng)")
+                break
+        
+        if penalty_mode and sum(alpha_violations.values()) > 0:
+            alpha = self.builder.repair(alpha)
+            alpha_fitness = self.evaluator.evaluate(alpha)
         
         if verbose:
             print(f"\n  Hoàn thành! Fitness cuối: {alpha_fitness:.2f}")
         
         return alpha
 
-    def _initialize_population(self, size: int) -> List[Schedule]:
+    def _population_diversity(self, population: List[Schedule]) -> float:
         """
-        Khởi tạo đàn sói ban đầu (các lịch ngẫu nhiên)
+        Độ đa dạng của đàn: khoảng cách Hamming trung bình giữa các cặp sói,
+        chuẩn hóa về [0, 1] theo số môn học
         
-        Args:
-            size: Số lượng sói
-            
-        Returns:
-            Danh sách các lịch ngẫu nhiên
+        Với mỗi môn, số cặp khác nhau = C(n, 2) - tổng C(k, 2) trên các giá trị
+        giống nhau, nên chỉ tốn O(n * số môn) thay vì O(n^2 * số môn).
         """
-        population = []
-        
-        for _ in range(size):
-            schedule = self._create_random_schedule()
-            population.append(schedule)
-        
-        return population
+        n = len(population)
+        if n < 2 or not self.courses:
+            return 0.0
+        
+        counts: Dict[str, Dict[Tuple[str, str, str], int]] = {cid: {} for cid in self.courses}
+        for wolf in population:
+            for a in wolf.assignments:
+                gene = counts.get(a.course_id)
+                if gene is not None:
+                    key = (a.teacher_id, a.room_id, a.timeslot_id)
+                    gene[key] = gene.get(key, 0) + 1
+        
+        total_pairs = n * (n - 1) // 2
+        differing = 0
+        for course_id, gene in counts.items():
+            # Sói thiếu môn này được xem là một giá trị riêng ("chưa gán")
+            missing = n - sum(gene.values())
+            same = sum(k * (k - 1) // 2 for k in gene.values()) + missing * (missing - 1) // 2
+            differing += total_pairs - same
+        
+        return differing / (total_pairs * len(self.courses))
+
+    def _reinject_wolves(self, population: List[Schedule], fitness_scores: List[float],
+                         fraction: float) -> List[int]:
+        """Thay các sói tệ nhất bằng sói mới (giữ nguyên Alpha, Beta, Delta), trả về chỉ số đã thay"""
+        count = min(len(population) - 3, max(1, int(len(population) * fraction)))
+        if count <= 0:
+            return []
+        worst = sorted(range(len(population)), key=lambda i: fitness_scores[i])[:count]
+        replaced = []
+        for i in worst:
+            if self._out_of_time():
+                break
+            population[i] = self._create_initial_schedule()
+            fitness_scores[i] = self.evaluator.evaluate(population[i])
+            replaced.append(i)
+        return replaced
+
+    def _out_of_time(self) -> bool:
+        """Đã qua time_limit của lần solve hiện tại chưa (đặt self.timed_out khi hết giờ)"""
+        if self._deadline is not None and time.time() > self._deadline:
+            self.timed_out = True
+        return self.timed_out
 
-    def _create_random_schedule(self) -> Schedule:
+    def _penalized(self, soft: float, violations: Dict[str, int]) -> float:
+        """Fitness chế độ penalty: điểm mềm trừ tổng trọng số × số vi phạm từng loại"""
+        return soft - sum(self.penalty_weights[kind] * count for kind, count in violations.items())
+
+    def _adapt_penalty_weights(self, penalties: List[HardConstraintPenalty]):
         """
-        Tạo một lịch ngẫu nhiên hợp lệ
-        
-        Returns:
-            Lịch ngẫu nhiên
+        Điều chỉnh trọng số penalty của từng loại vi phạm theo tỉ lệ sói mắc loại đó:
+        nhiều hơn PENALTY_TARGET_RATIO thì tăng (kéo đàn về vùng hợp lệ), ít hơn thì
+        giảm (cho phép đi qua vùng không hợp lệ)
         """
-        schedule = Schedule()
-        course_ids = list(self.courses.keys())
-        random.shuffle(course_ids)
-        
-        for course_id in course_ids:
-            course = self.courses[course_id]
-            assignment = self._try_create_assignment(course_id, course, schedule)
-            
-            if assignment:
-                schedule.add_assignment(assignment)
-        
-        return schedule
+        for kind, weight in self.penalty_weights.items():
+            ratio = sum(1 for state in penalties if state.violations[kind] > 0) / len(penalties)
+            if ratio > PENALTY_TARGET_RATIO:
+                self.penalty_weights[kind] = min(PENALTY_MAX_WEIGHT, weight * PENALTY_INCREASE)
+            else:
+                self.penalty_weights[kind] = max(PENALTY_MIN_WEIGHT, weight / PENALTY_DECREASE)
+
+    def _new_penalty(self, wolf: Schedule) -> HardConstraintPenalty:
+        """Bộ đếm vi phạm của một sói (dùng chung cache kiểm tra từng assignment)"""
+        return HardConstraintPenalty(self.constraint_checker, wolf.assignments, self._unary_cache)
 
-    def _try_create_assignment(self, course_id: str, course: Course, 
-                              schedule: Schedule, max_tries: int = 200) -> Optional[Assignment]:
+    def _repair_leaders(self, population: List[Schedule], soft_scores: List[float],
+                        penalties: List[HardConstraintPenalty], fitness_scores: List[float]):
+        """Chế độ penalty: sửa cho hợp lệ các sói đang dẫn đầu (chỉ 3 lần sửa mỗi vòng)"""
+        for i in set(self._get_top_three(fitness_scores)):
+            if penalties[i].total() == 0:
+                continue
+            population[i] = self.builder.repair(population[i])
+            penalties[i] = self._new_penalty(population[i])
+            soft_scores[i] = self.evaluator.evaluate(population[i])
+            fitness_scores[i] = self._penalized(soft_scores[i], penalties[i].violations)
+
+    def _initialize_population(self, size: int, seed_schedules: Optional[List[Schedule]] = None,
+                               seed_fraction: float = 0.5,
+                               perturbation_rate: float = 0.2, coloring: bool = False) -> List[Schedule]:
         """
-        Thử tạo một assignment hợp lệ cho môn học
+        Khởi tạo đàn sói ban đầu
         
         Args:
-            course_id: ID môn học
-            course: Đối tượng Course
-            schedule: Lịch hiện tại
-            max_tries: Số lần thử tối đa
+            size: Số lượng sói
+            seed_schedules: Các lịch khởi tạo ấm (xem solve)
+            seed_fraction: Tỉ lệ sói được tạo từ seed_schedules
+            perturbation_rate: Tỉ lệ môn được gán lại trong mỗi biến thể
+            coloring: Dựng một phần đàn theo tô màu DSatur
             
         Returns:
-            Assignment nếu thành công, None nếu không
+            Danh sách các lịch: lịch gốc đã sửa, biến thể nhiễu, sói theo tô màu,
+            còn lại ngẫu nhiên.
+            Hết giờ thì đàn có thể nhỏ hơn size (nhưng luôn có ít nhất một sói)
         """
-        available_teachers = self.course_to_teachers.get(course.name, [])
-        available_rooms = self._get_available_rooms(course)
-        available_timeslots = list(self.timeslots.keys())
-        
-        if not available_teachers or not available_rooms:
-            return None
-        
-        # Thử ngẫu nhiên
-        for _ in range(max_tries):
-            teacher_id = random.choice(available_teachers)
-            room_id = random.choice(available_rooms)
-            timeslot_id = random.choice(available_timeslots)
-            
-            assignment = Assignment(
-                course_id=course_id,
-                room_id=room_id,
-                teacher_id=teacher_id,
-                timeslot_id=timeslot_id
-            )
-            
-            if self.constraint_checker.check_all_constraints(schedule, assignment):
-                return assignment
+        population = []
         
-        return None
+        seeds = [self.builder.sanitize(s) for s in (seed_schedules or [])]
+        seeds = [s for s in seeds if s.assignments]
+        if seeds:
+            seeded_count = min(size, max(len(seeds), int(round(size * seed_fraction))))
+            for i in range(seeded_count):
+                if i < len(seeds):
+                    population.append(seeds[i])
+                elif self._out_of_time():
+                    break
+                else:
+                    population.append(self.builder.perturb(seeds[i % len(seeds)], perturbation_rate))
+        
+        if coloring and len(population) < size:
+            dsatur = DSaturColoring(self.courses, self.teachers, self.timeslots)
+            hints = dsatur.to_timeslots()
+            if hints is not None:
+                count = min(size - len(population), max(1, int(round(size * COLORING_SEED_FRACTION))))
+                for _ in range(count):
+                    if population and self._out_of_time():
+                        break
+                    population.append(self.builder.constructive(order=dsatur.order, timeslot_hints=hints))
+        
+        population.extend(self._build_population(size - len(population), required=0 if population else 1))
+        return population
 
-    def _get_available_rooms(self, course: Course) -> List[str]:
-        """Lấy danh sách phòng phù hợp với ràng buộc địa điểm"""
-        available_rooms = []
-        required_location = course.required_location
-        
-        for room_id, room in self.rooms.items():
-            if self._is_room_location_valid(room.location, required_location):
-                available_rooms.append(room_id)
-        
-        return available_rooms
+    def _build_population(self, count: int, required: int = 1) -> List[Schedule]:
+        """
+        Dựng count sói mới, song song theo process khi đàn đủ lớn. Dừng sớm khi
+        hết giờ, nhưng luôn dựng ít nhất required sói
+        """
+        if count <= 0:
+            return []
+        workers = self.init_workers or os.cpu_count() or 1
+        workers = min(workers, count)
+        if multiprocessing.current_process().daemon:
+            workers = 1
+        if (self.init_method != "constructive" or workers <= 1
+                or count * len(self.courses) < PARALLEL_INIT_MIN_PLACEMENTS):
+            population = []
+            while len(population) < count:
+                if len(population) >= required and self._out_of_time():
+                    break
+                population.append(self._create_initial_schedule())
+            return population
+        
+        # Chia đều số sói cho các process, mỗi process có seed riêng (tái lập được theo random.seed)
+        chunks = [count // workers + (1 if i < count % workers else 0) for i in range(workers)]
+        tasks = [(self.courses, self.rooms, self.teachers, self.timeslots, chunk, random.getrandbits(64),
+                  self._deadline)
+                 for chunk in chunks]
+        population = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for assignments_list in executor.map(_build_wolves, tasks):
+                population.extend(Schedule(assignments) for assignments in assignments_list)
+        return population
+
+    def _create_initial_schedule(self) -> Schedule:
+        """Tạo một sói mới theo init_method"""
+        if self.init_method == "random":
+            return self.builder.random_schedule()
+        return self.builder.constructive()
 
     def _is_room_location_valid(self, room_location: str, required_location: str) -> bool:
         """Kiểm tra vị trí phòng có phù hợp không"""
@@ -240,106 +521,105 @@ class GWOSolver:
         return alpha_idx, beta_idx, delta_idx
 
     def _update_wolf_position(self, wolf: Schedule, alpha: Schedule, 
-                            beta: Schedule, delta: Schedule, a: float) -> Schedule:
+                            beta: Schedule, delta: Schedule, a: float,
+                            penalty: Optional[HardConstraintPenalty] = None) -> Schedule:
         """
         Cập nhật vị trí của một sói dựa trên Alpha, Beta, Delta
         
+        Phiên bản rời rạc của X(t+1) = (X1 + X2 + X3) / 3 với Xk = X_leader - A·|C·X_leader - X|.
+        Với từng môn và từng leader, A = 2a·r1 - a và C = 2·r2 được sinh ngẫu nhiên:
+        - |A| < 1 (khai thác): leader đề cử gen của nó với trọng số C·(1 - |A|)
+        - |A| >= 1 (khám phá, chỉ có khi a > 1): đề cử một gen ngẫu nhiên với trọng số |A| - 1
+        Gen hiện tại của sói luôn được đề cử với trọng số 1, nên đầu quá trình sói giữ
+        nhiều gen của mình và khám phá, cuối quá trình (a → 0) hội tụ về các leader.
+        Sau đó gen bị đột biến với xác suất mutation_rate × số gen khác nhau của
+        3 leader cho môn đó (leader còn bất đồng thì môn đó chưa ổn định).
+        
         Args:
             wolf: Sói cần cập nhật
             alpha: Sói Alpha (tốt nhất)
             beta: Sói Beta (tốt thứ 2)
             delta: Sói Delta (tốt thứ 3)
             a: Tham số điều khiển (giảm từ 2 xuống 0)
+            penalty: Chế độ penalty: trạng thái vi phạm rỗng, được cập nhật theo từng
+                     gen thêm vào sói mới. Khi đó sói mới có thể vi phạm ràng buộc cứng
             
         Returns:
             Sói mới sau khi cập nhật
         """
         new_wolf = Schedule()
+        leaders = (alpha, beta, delta)
+        
+        # Chế độ penalty kiểm tra xung đột O(1) qua bộ đếm vi phạm thay vì duyệt cả lịch
+        if penalty is None:
+            fits = lambda gene: self.constraint_checker.check_all_constraints(new_wolf, gene)
+        else:
+            fits = lambda gene: penalty.cost(gene) == 0
         
-        # Với mỗi môn học, chọn assignment từ Alpha, Beta, Delta
-        for course_id in self.courses.keys():
-            # Lấy assignment từ top 3
-            alpha_assignment = self._get_assignment_for_course(alpha, course_id)
-            beta_assignment = self._get_assignment_for_course(beta, course_id)
-            delta_assignment = self._get_assignment_for_course(delta, course_id)
+        # Duyệt môn theo thứ tự ngẫu nhiên để không môn nào luôn được ưu tiên chỗ
+        course_ids = list(self.courses.keys())
+        random.shuffle(course_ids)
+        for course_id in course_ids:
+            own = wolf.get_assignment(course_id)
+            leader_genes = [leader.get_assignment(course_id) for leader in leaders]
             
-            # Chọn assignment dựa trên xác suất (Alpha cao hơn)
-            selected = self._select_assignment(alpha_assignment, beta_assignment, delta_assignment)
+            # Đề cử: (gen, trọng số), None nghĩa là gán lại ngẫu nhiên
+            candidates: List[Tuple[Optional[Assignment], float]] = [(own, 1.0)]
+            for gene in leader_genes:
+                coef_a = 2.0 * a * random.random() - a
+                coef_c = 2.0 * random.random()
+                if abs(coef_a) < 1.0:
+                    candidates.append((gene, coef_c * (1.0 - abs(coef_a))))
+                else:
+                    candidates.append((None, abs(coef_a) - 1.0))
             
-            # Nếu không có assignment từ top 3, tạo mới
-            if selected is None:
-                course = self.courses[course_id]
-                selected = self._try_create_assignment(course_id, course, new_wolf)
+            disagreement = len({gene for gene in leader_genes if gene is not None})
+            if random.random() < self.mutation_rate * max(1, disagreement):
+                selected = None
+            else:
+                selected = self._pick_weighted(candidates)
             
-            # Thêm vào lịch nếu hợp lệ
-            if selected and self.constraint_checker.check_all_constraints(new_wolf, selected):
-                new_wolf.add_assignment(selected)
-            elif selected:
-                # Nếu không hợp lệ, thử tạo assignment mới
+            # Gen được chọn xung đột (hoặc cần gán lại): thử các gen đề cử khác rồi mới tạo ngẫu nhiên
+            chosen = None
+            if selected is not None:
+                if fits(selected):
+                    chosen = selected
+                else:
+                    chosen = next((gene for gene, _ in sorted(candidates, key=lambda c: -c[1])
+                                   if gene is not None and gene != selected and fits(gene)), None)
+            if chosen is None:
                 course = self.courses[course_id]
-                new_assignment = self._try_create_assignment(course_id, course, new_wolf)
-                if new_assignment:
-                    new_wolf.add_assignment(new_assignment)
+                if penalty is None:
+                    chosen = self.builder.try_assignment(course_id, course, new_wolf)
+                else:
+                    # Không tìm được gen hợp lệ sau vài lần thử: chấp nhận vi phạm (có penalty)
+                    first = None
+                    for _ in range(PENALTY_RANDOM_TRIES):
+                        gene = self.builder.random_assignment(course_id, course)
+                        if gene is None:
+                            break
+                        if fits(gene):
+                            chosen = gene
+                            break
+                        first = first or gene
+                    if chosen is None:
+                        chosen = selected if selected is not None else first
+            if chosen:
+                new_wolf.add_assignment(chosen)
+                if penalty is not None:
+                    penalty.update((), (chosen,))
         
         return new_wolf
 
-    def _select_assignment(self, alpha_assignment: Optional[Assignment],
-                          beta_assignment: Optional[Assignment],
-                          delta_assignment: Optional[Assignment]) -> Optional[Assignment]:
-        """
-        Chọn assignment từ Alpha, Beta, Delta dựa trên xác suất
-        
-        Args:
-            alpha_assignment: Assignment từ Alpha
-            beta_assignment: Assignment từ Beta
-            delta_assignment: Assignment từ Delta
-            
-        Returns:
-            Assignment được chọn
-        """
-        rand = random.random()
-        
-        # Xác suất: Alpha 50%, Beta 30%, Delta 20%
-        if rand < 0.5 and alpha_assignment:
-            return alpha_assignment
-        elif rand < 0.8 and beta_assignment:
-            return beta_assignment
-        elif delta_assignment:
-            return delta_assignment
-        
-        # Fallback
-        if alpha_assignment:
-            return alpha_assignment
-        elif beta_assignment:
-            return beta_assignment
-        else:
-            return delta_assignment
-
-    def _get_assignment_for_course(self, schedule: Schedule, course_id: str) -> Optional[Assignment]:
-        """Lấy assignment của một môn học trong lịch"""
-        for assignment in schedule.assignments:
-            if assignment.course_id == course_id:
-                return assignment
-        return None
-
-    def _repair_schedule(self, schedule: Schedule) -> Schedule:
-       
-        repaired = Schedule()
-        
-        # Bước 1: Giữ lại các assignment hợp lệ từ lịch cũ
-        for assignment in schedule.assignments:
-            if self.constraint_checker.check_all_constraints(repaired, assignment):
-                repaired.add_assignment(assignment)
-        
-        # Bước 2: Thêm các môn chưa được gán
-        assigned_courses = {a.course_id for a in repaired.assignments}
-        
-        for course_id in self.courses.keys():
-            if course_id not in assigned_courses:
-                course = self.courses[course_id]
-                assignment = self._try_create_assignment(course_id, course, repaired, max_tries=300)
-                
-                if assignment:
-                    repaired.add_assignment(assignment)
-        
-        return repaired
+    @staticmethod
+    def _pick_weighted(candidates: List[Tuple[Optional[Assignment], float]]) -> Optional[Assignment]:
+        """Chọn một đề cử theo trọng số (None: môn cần gán lại ngẫu nhiên)"""
+        total = sum(weight for _, weight in candidates)
+        if total <= 0:
+            return None
+        threshold = random.random() * total
+        for gene, weight in candidates:
+            threshold -= weight
+            if threshold <= 0:
+                return gene
+        return candidates[-1][0]
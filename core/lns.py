@@ -0,0 +1,210 @@
+"""
+Tìm kiếm lân cận lớn (Large Neighbourhood Search) với Backtracking làm sub-solver
+
+Mỗi vòng phá một phần của lịch tốt nhất hiện tại (các môn của một ngày, một
+giáo viên, một lớp hoặc một tập ngẫu nhiên), giữ nguyên phần còn lại và giải
+lại phần bị phá bằng BacktrackingSolver (tham số fixed). Lịch mới được nhận
+nếu không kém hơn theo (số môn được gán, fitness của ScheduleEvaluator).
+
+Bài toán con nhỏ nên Backtracking giải chính xác và nhanh, vì vậy cách này
+dùng được cho các bộ dữ liệu mà Backtracking toàn cục hoặc GWO không kham nổi.
+"""
+
+import random
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set
+from core.model import Schedule, Course, Room, Teacher, Timeslot
+from core.backtracking import BacktrackingSolver
+from core.construction import ScheduleBuilder
+from core.evaluator import ScheduleEvaluator
+
+
+class LNSSolver:
+    """Lớp cải thiện lịch bằng Large Neighbourhood Search"""
+
+    DESTROY_METHODS = ("day", "teacher", "class", "random")
+
+    def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
+                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot],
+                 evaluator: Optional[ScheduleEvaluator] = None):
+        """
+        Args:
+            evaluator: Bộ đánh giá (trọng số ràng buộc mềm), mặc định tạo mới
+        """
+        self.courses = courses
+        self.rooms = rooms
+        self.teachers = teachers
+        self.timeslots = timeslots
+        self.evaluator = evaluator or ScheduleEvaluator(courses, rooms, teachers, timeslots)
+        # Sub-solver dựng một lần trên toàn bộ dữ liệu (ràng buộc với phần cố định
+        # được kiểm tra bằng chính ConstraintChecker của nó)
+        self.sub_solver = BacktrackingSolver(courses, rooms, teachers, timeslots)
+
+        # Dựng lịch ban đầu / chuẩn hóa lịch ngoài (bộ dựng dùng chung với GWO)
+        self.builder = ScheduleBuilder(courses, rooms, teachers, timeslots,
+                                       self.sub_solver.constraint_checker)
+
+        # Số lựa chọn (giáo viên, timeslot) × phòng của từng môn, tính một lần
+        self.option_counts: Dict[str, int] = {
+            course_id: len(pairs) * len(rooms_ok)
+            for course_id, (pairs, rooms_ok) in self.builder.options().items()
+        }
+
+        self.timeslots_by_day: Dict[str, List[str]] = {}
+        for timeslot_id, ts in timeslots.items():
+            self.timeslots_by_day.setdefault(ts.day, []).append(timeslot_id)
+        self.timed_out = False
+        self.history: List[Dict] = []
+        self.method_stats: Dict[str, Dict[str, int]] = {}
+
+    def solve(self, initial: Optional[Schedule] = None, max_iterations: int = 200,
+              destroy_size: int = 20, sub_time_limit: float = 1.0,
+              time_limit: Optional[float] = None, patience: Optional[int] = None,
+              methods: Sequence[str] = DESTROY_METHODS, verbose: bool = True,
+              progress_callback: Optional[Callable[[Dict], None]] = None) -> Schedule:
+        """
+        Chạy LNS
+
+        Args:
+            initial: Lịch ban đầu (lịch tuần trước, lời giải khác...). Được chuẩn hóa
+                     bằng ScheduleBuilder.sanitize: bỏ assignment không hợp lệ hoặc xung
+                     đột, gán các môn còn thiếu. None: dựng bằng ScheduleBuilder.constructive
+            max_iterations: Số vòng phá - sửa tối đa
+            destroy_size: Số môn tối đa bị phá mỗi vòng
+            sub_time_limit: Giới hạn thời gian (giây) của mỗi lần giải bài toán con
+            time_limit: Giới hạn thời gian tổng (giây), hết giờ thì trả về lịch tốt nhất
+                        và đặt self.timed_out
+            patience: Dừng khi không cải thiện sau ngần này vòng (None: chạy đủ)
+            methods: Các cách phá được dùng (chọn ngẫu nhiên đều mỗi vòng)
+            verbose: In thông tin tiến trình
+            progress_callback: Hàm nhận dict số liệu sau mỗi vòng
+
+        Returns:
+            Lịch tốt nhất tìm được
+        """
+        for method in methods:
+            if method not in self.DESTROY_METHODS:
+                raise ValueError(f"Cách phá không hợp lệ: {method} (chọn trong {self.DESTROY_METHODS})")
+        start_time = time.time()
+        self.timed_out = False
+        self.history = []
+        self.method_stats = {method: {"tries": 0, "repaired": 0, "improved": 0} for method in methods}
+
+        if initial is None:
+            current = self.builder.constructive()
+        else:
+            # Lịch ngoài có thể chứa xung đột: phần cố định phải thỏa ràng buộc cứng
+            current = self.builder.sanitize(initial)
+        state = self.evaluator.incremental(current.assignments)
+        fitness = state.fitness
+        if verbose:
+            print(f"  LNS: lịch ban đầu {len(current.assignments)}/{len(self.courses)} môn, "
+                  f"fitness {fitness:.2f}")
+
+        no_improve = 0
+        for iteration in range(max_iterations):
+            if time_limit is not None and time.time() - start_time > time_limit:
+                self.timed_out = True
+                if verbose:
+                    print(f"  Hết thời gian ({time_limit}s) tại vòng {iteration + 1}, dừng")
+                break
+
+            method = random.choice(list(methods))
+            stats = self.method_stats[method]
+            stats["tries"] += 1
+            destroyed = self._destroy(current, method, destroy_size)
+            unassigned = [cid for cid in self.courses if current.get_assignment(cid) is None]
+            candidate = self._repair(current, destroyed, unassigned, sub_time_limit)
+
+            improved = False
+            if candidate is not None:
+                stats["repaired"] += 1
+                removed = [current.get_assignment(cid) for cid in destroyed]
+                added = [a for a in candidate.assignments if a.course_id in destroyed or
+                         current.get_assignment(a.course_id) is None]
+                new_fitness = state.update(removed, added)
+                old_key = (len(current.assignments), fitness)
+                new_key = (len(candidate.assignments), new_fitness)
+                if new_key >= old_key:
+                    improved = new_key > old_key
+                    current, fitness = candidate, new_fitness
+                else:
+                    state.update(added, removed)
+
+            if improved:
+                stats["improved"] += 1
+                no_improve = 0
+            else:
+                no_improve += 1
+
+            metrics = {
+                "iteration": iteration + 1,
+                "best_fitness": fitness,
+                "assigned": len(current.assignments),
+                "method": method,
+                "destroyed": len(destroyed),
+                "improved": improved,
+            }
+            self.history.append(metrics)
+            if progress_callback:
+                progress_callback(metrics)
+            if verbose and (iteration + 1) % 10 == 0:
+                print(f"  Iteration {iteration + 1}/{max_iterations}: Fitness = {fitness:.2f}, "
+                      f"Assigned = {len(current.assignments)}/{len(self.courses)}")
+
+            if patience is not None and no_improve >= patience:
+                if verbose:
+                    print(f"  Hội tụ sau {iteration + 1} vòng (không cải thiện {no_improve} vòng)")
+                break
+
+        if verbose:
+            print(f"\n  Hoàn thành! Fitness cuối: {fitness:.2f}")
+        return current
+
+    def _destroy(self, schedule: Schedule, method: str, size: int) -> List[str]:
+        """Chọn các môn bị phá (tối đa size môn) theo cách phá method"""
+        assignments = schedule.assignments
+        if not assignments:
+            return []
+
+        if method == "day":
+            day = random.choice(list(self.timeslots_by_day))
+            slots = set(self.timeslots_by_day[day])
+            pool = [a.course_id for a in assignments if a.timeslot_id in slots]
+        elif method == "teacher":
+            teacher_id = random.choice(assignments).teacher_id
+            pool = [a.course_id for a in assignments if a.teacher_id == teacher_id]
+        elif method == "class":
+            student_class = self.courses[random.choice(assignments).course_id].student_class
+            pool = [a.course_id for a in assignments
+                    if self.courses[a.course_id].student_class == student_class]
+        else:
+            pool = [a.course_id for a in assignments]
+
+        if len(pool) > size:
+            pool = random.sample(pool, size)
+        return pool
+
+    def _repair(self, schedule: Schedule, destroyed: List[str], unassigned: List[str],
+                sub_time_limit: float) -> Optional[Schedule]:
+        """
+        Giải lại các môn bị phá (và các môn chưa gán) với phần còn lại cố định
+
+        Nếu không xếp được cả các môn chưa gán thì thử lại chỉ với các môn bị phá.
+
+        Returns:
+            Lịch mới, None nếu sub-solver không tìm được lời giải trong thời gian cho phép
+        """
+        removed: Set[str] = set(destroyed)
+        fixed = Schedule([a for a in schedule.assignments if a.course_id not in removed])
+        attempts = [destroyed + unassigned, destroyed] if unassigned else [destroyed]
+        for course_ids in attempts:
+            if not course_ids:
+                continue
+            # Môn ít lựa chọn được xếp trước
+            order = sorted(course_ids, key=self.option_counts.__getitem__)
+            result = self.sub_solver.solve(course_order=order, fixed=fixed, presolve=False,
+                                           time_limit=sub_time_limit)
+            if result is not None:
+                return result
+        return None
@@ -0,0 +1,328 @@
+"""
+Tìm kiếm cục bộ (Local Search) để đánh bóng lịch sau khi giải
+
+Chạy như một bước hậu xử lý cho bất kỳ solver nào (Backtracking, GWO, ...):
+nhận một lịch hợp lệ và cải thiện fitness bằng các bước di chuyển rẻ,
+luôn giữ nguyên các ràng buộc cứng của ConstraintChecker.
+
+Lân cận hỗ trợ:
+- move:  đổi (giáo viên, phòng, timeslot) của một môn
+- swap:  hoán đổi timeslot của hai môn
+- kempe: hoán đổi cả chuỗi Kempe giữa hai timeslot
+
+Quy tắc chấp nhận: "sa" (Simulated Annealing) hoặc "tabu" (Tabu Search).
+"""
+
+import math
+import random
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+from core.model import Schedule, Assignment, Course, Room, Teacher, Timeslot
+from core.constraint import ConstraintChecker
+from core.evaluator import ScheduleEvaluator
+
+
+# Một thay đổi: (course_id, teacher_id, room_id, timeslot_id) mới
+Change = Tuple[str, str, str, str]
+
+
+class LocalSearchPolisher:
+    """
+    Lớp đánh bóng lịch bằng tìm kiếm cục bộ
+
+    Trạng thái được giữ trong các bảng chiếm chỗ (giáo viên/phòng/lớp theo
+    timeslot) nên mỗi bước kiểm tra ràng buộc cứng là O(1), và fitness được
+    cập nhật tăng dần thay vì đánh giá lại toàn bộ lịch.
+    """
+
+    NEIGHBOURHOODS = ("move", "swap", "kempe")
+
+    def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
+                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot],
+                 evaluator: Optional[ScheduleEvaluator] = None):
+        """
+        Khởi tạo polisher
+
+        Args:
+            courses: Dictionary các môn học
+            rooms: Dictionary các phòng học
+            teachers: Dictionary các giáo viên
+            timeslots: Dictionary các khung giờ
+            evaluator: Bộ đánh giá (trọng số ràng buộc mềm), mặc định tạo mới
+        """
+        self.courses = courses
+        self.rooms = rooms
+        self.teachers = teachers
+        self.timeslots = timeslots
+        self.constraint_checker = ConstraintChecker(courses, rooms, teachers, timeslots)
+        self.evaluator = evaluator or ScheduleEvaluator(courses, rooms, teachers, timeslots)
+
+        self.timeslot_ids = list(timeslots.keys())
+        self.slot_bits = {tid: bit for bit, tid in enumerate(timeslots)}
+        self.teacher_timeslots = {
+            teacher_id: [tid for bit, tid in enumerate(timeslots) if teacher.is_available(bit)]
+            for teacher_id, teacher in teachers.items()
+        }
+
+        # Lựa chọn hợp lệ cho từng môn (tính một lần)
+        course_to_teachers: Dict[str, List[str]] = {}
+        for teacher_id, teacher in teachers.items():
+            for course_name in teacher.courses:
+                course_to_teachers.setdefault(course_name, []).append(teacher_id)
+        self.course_teachers = {cid: course_to_teachers.get(c.name, [])
+                                for cid, c in courses.items()}
+        self.course_rooms = {cid: [rid for rid in rooms
+                                   if self.constraint_checker.is_room_suitable(cid, rid)]
+                             for cid in courses}
+
+    def polish(self, schedule: Schedule, max_moves: int = 100000,
+               time_limit: Optional[float] = None, method: str = "sa",
+               neighbourhoods: Sequence[str] = NEIGHBOURHOODS,
+               initial_temperature: float = 5.0, cooling_rate: float = 0.9995,
+               tabu_tenure: int = 10, tabu_samples: int = 20,
+               seed: Optional[int] = None, verbose: bool = False) -> Schedule:
+        """
+        Đánh bóng một lịch bằng tìm kiếm cục bộ
+
+        Args:
+            schedule: Lịch đầu vào (phải thỏa mãn ràng buộc cứng)
+            max_moves: Số bước di chuyển tối đa
+            time_limit: Giới hạn thời gian (giây), None nếu không giới hạn
+            method: "sa" (Simulated Annealing) hoặc "tabu"
+            neighbourhoods: Các lân cận được dùng
+            initial_temperature: Nhiệt độ ban đầu (SA)
+            cooling_rate: Hệ số làm nguội sau mỗi bước (SA)
+            tabu_tenure: Số bước một (môn, timeslot) bị cấm quay lại (tabu)
+            tabu_samples: Số lân cận được lấy mẫu mỗi bước (tabu)
+            seed: Seed ngẫu nhiên
+            verbose: In thông tin tiến trình
+
+        Returns:
+            Lịch tốt nhất tìm được (không bao giờ tệ hơn lịch đầu vào)
+        """
+        if method not in ("sa", "tabu"):
+            raise ValueError(f"Phương pháp không hợp lệ: {method}")
+        for name in neighbourhoods:
+            if name not in self.NEIGHBOURHOODS:
+                raise ValueError(f"Lân cận không hợp lệ: {name}")
+
+        rng = random.Random(seed)
+        self._load_state(schedule)
+        if len(self.assign) == 0:
+            return schedule.copy()
+
+        current = self.fitness_state.fitness
+        best = current
+        best_state = dict(self.assign)
+        generators = [getattr(self, f"_propose_{name}") for name in neighbourhoods]
+
+        start_time = time.time()
+        temperature = initial_temperature
+        tabu: Dict[Tuple[str, str], int] = {}
+        accepted = 0
+
+        for step in range(max_moves):
+            if time_limit is not None and step % 256 == 0 and time.time() - start_time > time_limit:
+                break
+
+            if method == "sa":
+                changes = rng.choice(generators)(rng)
+                new_score = self._try_apply(changes) if changes else None
+                if new_score is None:
+                    continue
+                delta = new_score - current
+                if delta >= 0 or (temperature > 1e-9 and
+                                  rng.random() < math.exp(delta / temperature)):
+                    current = new_score
+                    accepted += 1
+                else:
+                    self._revert()
+                temperature *= cooling_rate
+            else:
+                move = self._best_tabu_move(rng, generators, tabu_samples, tabu, step, best)
+                if move is None:
+                    continue
+                changes, new_score = move
+                for course_id, _, _, _ in changes:
+                    tabu[(course_id, self.assign[course_id][2])] = step + tabu_tenure
+                self._try_apply(changes)
+                current = new_score
+                accepted += 1
+
+            if current > best:
+                best = current
+                best_state = dict(self.assign)
+
+        if verbose:
+            elapsed = time.time() - start_time
+            print(f"  Local search ({method}): {step + 1} bước, {accepted} chấp nhận, "
+                  f"{elapsed:.2f}s, fitness {best:.2f}")
+
+        return Schedule([Assignment(cid, room_id, teacher_id, timeslot_id)
+                         for cid, (teacher_id, room_id, timeslot_id) in best_state.items()])
+
+    # ------------------------------------------------------------------
+    # Trạng thái và cập nhật tăng dần
+    # ------------------------------------------------------------------
+
+    def _load_state(self, schedule: Schedule):
+        """Dựng các bảng chiếm chỗ và bộ đếm fitness từ lịch"""
+        self.assign: Dict[str, Tuple[str, str, str]] = {}
+        self.teacher_at: Dict[Tuple[str, str], str] = {}
+        self.room_at: Dict[Tuple[str, str], str] = {}
+        self.class_at: Dict[Tuple[str, str], str] = {}
+        self._undo: List[Tuple[str, Tuple[str, str, str]]] = []
+
+        for a in schedule.assignments:
+            self._place(a.course_id, (a.teacher_id, a.room_id, a.timeslot_id))
+        # Tập môn không đổi trong lúc tìm kiếm: lấy mẫu trên danh sách dựng sẵn (O(1) mỗi bước)
+        self.course_ids = list(self.assign)
+        self.fitness_state = self.evaluator.incremental(self._as_assignment(cid)
+                                                        for cid in self.assign)
+
+    def _place(self, course_id: str, value: Tuple[str, str, str]):
+        teacher_id, room_id, timeslot_id = value
+        self.assign[course_id] = value
+        self.teacher_at[(teacher_id, timeslot_id)] = course_id
+        self.room_at[(room_id, timeslot_id)] = course_id
+        self.class_at[(self.courses[course_id].student_class, timeslot_id)] = course_id
+
+    def _unplace(self, course_id: str):
+        teacher_id, room_id, timeslot_id = self.assign.pop(course_id)
+        del self.teacher_at[(teacher_id, timeslot_id)]
+        del self.room_at[(room_id, timeslot_id)]
+        del self.class_at[(self.courses[course_id].student_class, timeslot_id)]
+
+    def _as_assignment(self, course_id: str) -> Assignment:
+        teacher_id, room_id, timeslot_id = self.assign[course_id]
+        return Assignment(course_id, room_id, teacher_id, timeslot_id)
+
+    def _is_free(self, course_id: str, value: Tuple[str, str, str]) -> bool:
+        """Ràng buộc cứng 1-3 và lịch rảnh giáo viên kiểm tra bằng bảng chiếm chỗ (O(1))"""
+        teacher_id, room_id, timeslot_id = value
+        return (self.teachers[teacher_id].is_available(self.slot_bits[timeslot_id]) and
+                (teacher_id, timeslot_id) not in self.teacher_at and
+                (room_id, timeslot_id) not in self.room_at and
+                (self.courses[course_id].student_class, timeslot_id) not in self.class_at)
+
+    def _try_apply(self, changes: List[Change]) -> Optional[float]:
+        """
+        Áp dụng một nhóm thay đổi nếu giữ được ràng buộc cứng
+
+        Returns:
+            Fitness mới nếu áp dụng thành công, None nếu vi phạm (trạng thái giữ nguyên)
+        """
+        old = [(cid, self.assign[cid]) for cid, _, _, _ in changes]
+        for cid, _ in old:
+            self._unplace(cid)
+
+        placed = []
+        for cid, teacher_id, room_id, timeslot_id in changes:
+            value = (teacher_id, room_id, timeslot_id)
+            if not self._is_free(cid, value):
+                for placed_id in placed:
+                    self._unplace(placed_id)
+                for old_id, old_value in old:
+                    self._place(old_id, old_value)
+                return None
+            self._place(cid, value)
+            placed.append(cid)
+
+        self._undo = old
+        return self.fitness_state.update(
+            [Assignment(cid, room_id, teacher_id, timeslot_id)
+             for cid, (teacher_id, room_id, timeslot_id) in old],
+            [self._as_assignment(cid) for cid, _ in old])
+
+    def _revert(self):
+        """Hoàn tác nhóm thay đổi vừa áp dụng bằng _try_apply"""
+        removed = [self._as_assignment(cid) for cid, _ in self._undo]
+        for cid, _ in self._undo:
+            self._unplace(cid)
+        for cid, value in self._undo:
+            self._place(cid, value)
+        self.fitness_state.update(removed, [self._as_assignment(cid) for cid, _ in self._undo])
+
+    def _best_tabu_move(self, rng: random.Random, generators, samples: int,
+                        tabu: Dict[Tuple[str, str], int], step: int,
+                        best: float) -> Optional[Tuple[List[Change], float]]:
+        """Lấy mẫu lân cận, chọn bước tốt nhất không bị cấm (hoặc đạt aspiration)"""
+        chosen = None
+        for _ in range(samples):
+            changes = rng.choice(generators)(rng)
+            if not changes:
+                continue
+            new_score = self._try_apply(changes)
+            if new_score is None:
+                continue
+            self._revert()
+            is_tabu = any(tabu.get((cid, ts), -1) > step for cid, _, _, ts in changes)
+            if is_tabu and new_score <= best:
+                continue
+            if chosen is None or new_score > chosen[1]:
+                chosen = (changes, new_score)
+        return chosen
+
+    # ------------------------------------------------------------------
+    # Lân cận
+    # ------------------------------------------------------------------
+
+    def _propose_move(self, rng: random.Random) -> List[Change]:
+        """Đổi giáo viên, phòng hoặc timeslot của một môn"""
+        course_id = rng.choice(self.course_ids)
+        teacher_id, room_id, timeslot_id = self.assign[course_id]
+        teachers = self.course_teachers[course_id]
+        rooms = self.course_rooms[course_id]
+        if not teachers or not rooms:
+            return []
+        new_teacher = rng.choice(teachers)
+        slots = self.teacher_timeslots[new_teacher]
+        if not slots:
+            return []
+        return [(course_id, new_teacher, rng.choice(rooms), rng.choice(slots))]
+
+    def _propose_swap(self, rng: random.Random) -> List[Change]:
+        """Hoán đổi timeslot của hai môn (giữ nguyên giáo viên và phòng)"""
+        if len(self.course_ids) < 2:
+            return []
+        first, second = rng.sample(self.course_ids, 2)
+        t1, r1, s1 = self.assign[first]
+        t2, r2, s2 = self.assign[second]
+        if s1 == s2:
+            return []
+        return [(first, t1, r1, s2), (second, t2, r2, s1)]
+
+    def _propose_kempe(self, rng: random.Random) -> List[Change]:
+        """
+        Hoán đổi chuỗi Kempe giữa hai timeslot
+
+        Chuỗi là thành phần liên thông (trong 2 timeslot) của đồ thị xung đột
+        (chung giáo viên, phòng hoặc lớp) chứa môn được chọn. Đổi slot cho cả
+        chuỗi luôn giữ được ràng buộc cứng.
+        """
+        course_id = rng.choice(self.course_ids)
+        slot_a = self.assign[course_id][2]
+        slot_b = rng.choice(self.timeslot_ids)
+        if slot_a == slot_b:
+            return []
+
+        chain = {course_id}
+        queue = deque([course_id])
+        while queue:
+            cid = queue.popleft()
+            teacher_id, room_id, slot = self.assign[cid]
+            other = slot_b if slot == slot_a else slot_a
+            student_class = self.courses[cid].student_class
+            for neighbour in (self.teacher_at.get((teacher_id, other)),
+                              self.room_at.get((room_id, other)),
+                              self.class_at.get((student_class, other))):
+                if neighbour is not None and neighbour not in chain:
+                    chain.add(neighbour)
+                    queue.append(neighbour)
+
+        changes = []
+        for cid in chain:
+            teacher_id, room_id, slot = self.assign[cid]
+            changes.append((cid, teacher_id, room_id, slot_b if slot == slot_a else slot_a))
+        return changes
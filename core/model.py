@@ -1,15 +1,34 @@
 
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict
 
 
 @dataclass
 class Teacher:
-    """Lớp đại diện cho giáo viên"""
+    """Lớp đại diện cho giáo viên
+
+    Lịch rảnh được lưu dưới dạng bitmask theo thứ tự timeslot khi load
+    (bit i = timeslot thứ i). availability_mask = -1 nghĩa là rảnh mọi timeslot.
+    Mask được tính từ các danh sách available/unavailable/preferred bởi
+    utils.loader.apply_availability_masks.
+    """
     id: str
     name: str
     courses: List[str]
+    available: Optional[List[str]] = None  # None = rảnh mọi timeslot
+    unavailable: List[str] = field(default_factory=list)  # Timeslot bị chặn
+    preferred: List[str] = field(default_factory=list)  # Timeslot ưu tiên
+    availability_mask: int = -1
+    preference_mask: int = 0
+
+    def is_available(self, slot_bit: int) -> bool:
+        """Giáo viên có rảnh tại timeslot thứ slot_bit hay không"""
+        return bool((self.availability_mask >> slot_bit) & 1)
+
+    def prefers(self, slot_bit: int) -> bool:
+        """Timeslot thứ slot_bit có nằm trong danh sách ưu tiên hay không"""
+        return bool((self.preference_mask >> slot_bit) & 1)
 
 
 @dataclass
@@ -28,6 +47,7 @@ class Course:
     name: str
     student_class: str
     required_location: str  # "A", "B", "N", hoặc "A|B"
+    class_size: int = 0  # Sĩ số lớp (0 = chưa biết, không kiểm tra sức chứa)
 
 
 @dataclass
@@ -40,9 +60,12 @@ class Timeslot:
     session: str = ""  # "Sáng" hoặc "Chiều" (optional để tương thích ngược)
 
 
-@dataclass
+@dataclass(frozen=True)
 class Assignment:
-    """Lớp đại diện cho một gán lịch (môn - phòng - giáo viên - timeslot)"""
+    """Lớp đại diện cho một gán lịch (môn - phòng - giáo viên - timeslot)
+
+    Bất biến (frozen) để nhiều Schedule có thể dùng chung cùng một đối tượng.
+    """
     course_id: str
     room_id: str
     teacher_id: str
@@ -60,20 +83,100 @@ class Assignment:
         return hash((self.course_id, self.room_id, self.teacher_id, self.timeslot_id))
 
 
-@dataclass
 class Schedule:
-    """Lớp đại diện cho một lịch học hoàn chỉnh"""
-    assignments: List[Assignment]
+    """Lớp đại diện cho một lịch học hoàn chỉnh
+
+    Dùng cơ chế copy-on-write: copy() chỉ chia sẻ danh sách assignment (O(1)),
+    danh sách chỉ được sao chép (nông, không tạo lại Assignment) ở lần sửa
+    đầu tiên sau khi copy. Vì vậy mọi thay đổi phải đi qua các phương thức
+    add_assignment / pop_assignment / replace_assignment / remove_assignment,
+    không sửa trực tiếp list trả về từ thuộc tính assignments.
+    """
+    __slots__ = ("_assignments", "_index", "_shared")
 
     def __init__(self, assignments: Optional[List[Assignment]] = None):
-        self.assignments = assignments if assignments else []
+        self._assignments: List[Assignment] = assignments if assignments else []
+        self._index: Optional[Dict[str, int]] = None  # course_id -> vị trí (lập khi cần)
+        self._shared = False
+
+    @property
+    def assignments(self) -> List[Assignment]:
+        """Danh sách assignment (chỉ đọc)"""
+        return self._assignments
+
+    @assignments.setter
+    def assignments(self, assignments: List[Assignment]):
+        self._assignments = assignments
+        self._index = None
+        self._shared = False
+
+    def _own(self):
+        """Sao chép danh sách nếu đang dùng chung với bản sao khác"""
+        if self._shared:
+            self._assignments = list(self._assignments)
+            if self._index is not None:
+                self._index = dict(self._index)
+            self._shared = False
+
+    def _get_index(self) -> Dict[str, int]:
+        if self._index is None:
+            index: Dict[str, int] = {}
+            for position, assignment in enumerate(self._assignments):
+                index.setdefault(assignment.course_id, position)
+            self._index = index
+        return self._index
 
     def add_assignment(self, assignment: Assignment):
         """Thêm một gán lịch vào lịch"""
-        self.assignments.append(assignment)
+        self._own()
+        self._assignments.append(assignment)
+        if self._index is not None:
+            self._index.setdefault(assignment.course_id, len(self._assignments) - 1)
+
+    def pop_assignment(self) -> Assignment:
+        """Bỏ gán lịch được thêm sau cùng (dùng khi quay lui)"""
+        self._own()
+        assignment = self._assignments.pop()
+        if self._index is not None and self._index.get(assignment.course_id) == len(self._assignments):
+            del self._index[assignment.course_id]
+        return assignment
+
+    def get_assignment(self, course_id: str) -> Optional[Assignment]:
+        """Lấy gán lịch của một môn (O(1))"""
+        position = self._get_index().get(course_id)
+        return self._assignments[position] if position is not None else None
+
+    def replace_assignment(self, assignment: Assignment):
+        """Thay gán lịch của cùng môn (thêm mới nếu môn chưa được gán)"""
+        position = self._get_index().get(assignment.course_id)
+        if position is None:
+            self.add_assignment(assignment)
+            return
+        self._own()
+        self._assignments[position] = assignment
+
+    def remove_assignment(self, course_id: str) -> Optional[Assignment]:
+        """Bỏ gán lịch của một môn"""
+        position = self._get_index().get(course_id)
+        if position is None:
+            return None
+        self._own()
+        assignment = self._assignments.pop(position)
+        self._index = None
+        return assignment
 
     def copy(self):
-        """Tạo bản sao của lịch"""
-        return Schedule([Assignment(a.course_id, a.room_id, a.teacher_id, a.timeslot_id)
-                        for a in self.assignments])
+        """Tạo bản sao của lịch (O(1), dùng chung dữ liệu đến khi bị sửa)"""
+        clone = Schedule.__new__(Schedule)
+        clone._assignments = self._assignments
+        clone._index = self._index
+        clone._shared = self._shared = True
+        return clone
+
+    def __eq__(self, other):
+        if not isinstance(other, Schedule):
+            return False
+        return self._assignments == other._assignments
 
+    def __repr__(self) -> str:
+        return f"Schedule(assignments={self._assignments!r})"
@@ -0,0 +1,212 @@
+"""
+Kiểm tra sớm tính khả thi của bài toán (presolve)
+
+Kiểm tra các điều kiện cần trong thời gian đa thức trước khi tìm kiếm, để bài
+toán chắc chắn vô nghiệm bị từ chối ngay với lý do rõ ràng thay vì để
+Backtracking duyệt hết cây tìm kiếm:
+1. Mỗi môn có giáo viên dạy được, giáo viên đó có timeslot rảnh, và có phòng phù hợp
+2. Mỗi lớp: số môn không vượt số timeslot; ghép cặp môn ↔ timeslot (có giáo viên rảnh)
+3. Giáo viên: ghép cặp môn ↔ (giáo viên, timeslot) phải phủ hết các môn (Hall)
+4. Phòng theo cơ sở: với mỗi tập phòng ứng viên S, số môn chỉ dùng được phòng
+   trong S không vượt |S| × số timeslot (điều kiện Hall trên các tập ứng viên)
+5. Đồ thị xung đột (DSaturColoring): clique tìm được không lớn hơn số timeslot
+
+Thỏa mãn tất cả không đảm bảo có lời giải (các ràng buộc tương tác với nhau),
+nhưng vi phạm bất kỳ điều kiện nào thì chắc chắn vô nghiệm.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Hashable, List, Set, Tuple
+from core.model import Course, Room, Teacher, Timeslot
+from core.coloring import DSaturColoring
+from core.room_index import RoomIndex
+from core.room_matching import hopcroft_karp
+
+
+MAX_LISTED = 5  # Số môn tối đa liệt kê trong một lý do
+
+
+@dataclass
+class PresolveReport:
+    """Kết quả presolve: danh sách lý do bài toán vô nghiệm (rỗng nếu chưa phát hiện)"""
+    issues: List[str] = field(default_factory=list)
+    timeslot_lower_bound: int = 0  # Số timeslot tối thiểu (clique của đồ thị xung đột)
+
+    @property
+    def feasible(self) -> bool:
+        return not self.issues
+
+    def summary(self) -> str:
+        if self.feasible:
+            return "Không phát hiện điều kiện vô nghiệm"
+        return "\n".join(f"- {issue}" for issue in self.issues)
+
+
+def hall_violator(adjacency: Dict[Hashable, List[Hashable]],
+                  matching: Dict[Hashable, Hashable]) -> Tuple[Set[Hashable], Set[Hashable]]:
+    """
+    Tìm tập vi phạm điều kiện Hall từ một ghép cặp cực đại
+
+    Các đỉnh trái đến được từ đỉnh trái chưa ghép theo đường xen kẽ tạo thành
+    tập Z có |Z| > |N(Z)| (định lý König).
+
+    Returns:
+        (Z, N(Z))
+    """
+    matched_right = {v: u for u, v in matching.items()}
+    left = {u for u in adjacency if u not in matching}
+    right: Set[Hashable] = set()
+    queue = deque(left)
+    while queue:
+        u = queue.popleft()
+        for v in adjacency[u]:
+            if v in right:
+                continue
+            right.add(v)
+            w = matched_right.get(v)
+            if w is not None and w not in left:
+                left.add(w)
+                queue.append(w)
+    return left, right
+
+
+class PresolveAnalyzer:
+    """Lớp kiểm tra điều kiện cần về tính khả thi"""
+
+    def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
+                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot]):
+        self.courses = courses
+        self.rooms = rooms
+        self.teachers = teachers
+        self.timeslots = timeslots
+        self.room_index = RoomIndex(rooms)
+
+        course_to_teachers: Dict[str, List[str]] = {}
+        for teacher_id, teacher in teachers.items():
+            for course_name in teacher.courses:
+                course_to_teachers.setdefault(course_name, []).append(teacher_id)
+        self.course_teachers = {cid: course_to_teachers.get(c.name, []) for cid, c in courses.items()}
+        self.teacher_timeslots = {
+            teacher_id: [tid for bit, tid in enumerate(timeslots) if teacher.is_available(bit)]
+            for teacher_id, teacher in teachers.items()
+        }
+        self.course_rooms = {cid: self.room_index.candidates(c.required_location, c.class_size)
+                             for cid, c in courses.items()}
+
+    def analyze(self) -> PresolveReport:
+        """Chạy tất cả các kiểm tra"""
+        report = PresolveReport()
+        self._check_courses(report)
+        self._check_classes(report)
+        self._check_teachers(report)
+        self._check_rooms(report)
+        self._check_coloring(report)
+        return report
+
+    def _describe(self, course_ids) -> str:
+        names = [f"{self.courses[cid].name} ({self.courses[cid].student_class})"
+                 for cid in sorted(course_ids)[:MAX_LISTED]]
+        more = len(course_ids) - MAX_LISTED
+        return ", ".join(names) + (f" và {more} môn khác" if more > 0 else "")
+
+    def _check_courses(self, report: PresolveReport):
+        """Điều kiện 1: từng môn có giáo viên, timeslot rảnh và phòng phù hợp"""
+        for course_id, course in self.courses.items():
+            teachers = self.course_teachers[course_id]
+            if not teachers:
+                report.issues.append(f"Môn {self._describe([course_id])}: không có giáo viên dạy được")
+            elif not any(self.teacher_timeslots.get(tid) for tid in teachers):
+                report.issues.append(f"Môn {self._describe([course_id])}: các giáo viên dạy được "
+                                     f"({', '.join(teachers)}) đều không có timeslot rảnh")
+            if not self.course_rooms[course_id]:
+                report.issues.append(f"Môn {self._describe([course_id])}: không có phòng ở "
+                                     f"'{course.required_location}' chứa được {course.class_size} sinh viên")
+
+    def _check_classes(self, report: PresolveReport):
+        """Điều kiện 2: mỗi lớp cần các timeslot khác nhau cho từng môn"""
+        by_class: Dict[str, List[str]] = {}
+        for course_id, course in self.courses.items():
+            by_class.setdefault(course.student_class, []).append(course_id)
+
+        for student_class, course_ids in sorted(by_class.items()):
+            if len(course_ids) > len(self.timeslots):
+                report.issues.append(f"Lớp {student_class}: {len(course_ids)} môn nhưng chỉ có "
+                                     f"{len(self.timeslots)} timeslot")
+                continue
+            # Môn ↔ timeslot mà ít nhất một giáo viên dạy được đang rảnh
+            adjacency = {}
+            for course_id in course_ids:
+                slots = set()
+                for teacher_id in self.course_teachers[course_id]:
+                    slots.update(self.teacher_timeslots.get(teacher_id, []))
+                adjacency[course_id] = sorted(slots)
+            matching = hopcroft_karp(adjacency)
+            if len(matching) < len(adjacency):
+                stuck, slots = hall_violator(adjacency, matching)
+                report.issues.append(f"Lớp {student_class}: {len(stuck)} môn ({self._describe(stuck)}) "
+                                     f"chỉ xếp được vào {len(slots)} timeslot có giáo viên rảnh")
+
+    def _check_teachers(self, report: PresolveReport):
+        """Điều kiện 3: ghép cặp môn ↔ (giáo viên, timeslot rảnh)"""
+        adjacency = {course_id: [(tid, ts) for tid in teachers for ts in self.teacher_timeslots.get(tid, [])]
+                     for course_id, teachers in self.course_teachers.items()}
+        adjacency = {cid: pairs for cid, pairs in adjacency.items() if pairs}  # Đã báo ở điều kiện 1
+        matching = hopcroft_karp(adjacency)
+        if len(matching) == len(adjacency):
+            return
+
+        stuck, pairs = hall_violator(adjacency, matching)
+        teachers = sorted({tid for tid, _ in pairs})
+        if len(teachers) == 1:
+            teacher = self.teachers[teachers[0]]
+            report.issues.append(f"Giáo viên {teacher.name} ({teacher.id}) phải dạy {len(stuck)} môn "
+                                 f"({self._describe(stuck)}) nhưng chỉ rảnh {len(pairs)} timeslot")
+        else:
+            report.issues.append(f"Các giáo viên {', '.join(teachers)} phải dạy {len(stuck)} môn "
+                                 f"({self._describe(stuck)}) nhưng chỉ có tổng cộng {len(pairs)} "
+                                 f"(giáo viên, timeslot) rảnh")
+
+    def _check_rooms(self, report: PresolveReport):
+        """
+        Điều kiện 4: sức chứa phòng × timeslot theo các tập phòng ứng viên
+
+        Các tập ứng viên của một cơ sở lồng nhau theo sức chứa, nên kiểm tra
+        Hall trên chính các tập này (và hợp của chúng) là đủ chặt mà chỉ tốn
+        O(số tập × số môn).
+        """
+        candidate_sets: Dict[FrozenSet[str], str] = {}
+        for course_id, course in self.courses.items():
+            rooms = frozenset(self.course_rooms[course_id])
+            if rooms:
+                candidate_sets.setdefault(rooms, course.required_location)
+        all_rooms = frozenset().union(*candidate_sets) if candidate_sets else frozenset()
+        if all_rooms and all_rooms not in candidate_sets:
+            candidate_sets[all_rooms] = "tất cả cơ sở"
+
+        slot_count = len(self.timeslots)
+        reported: Set[str] = set()
+        for rooms, location in sorted(candidate_sets.items(), key=lambda item: len(item[0])):
+            if location in reported:
+                continue  # Chỉ báo tập nhỏ nhất bị vi phạm của mỗi cơ sở
+            needing = [cid for cid, candidates in self.course_rooms.items()
+                       if candidates and rooms.issuperset(candidates)]
+            capacity = len(rooms) * slot_count
+            if len(needing) > capacity:
+                reported.add(location)
+                report.issues.append(f"Phòng ở '{location}': {len(needing)} môn ({self._describe(needing)}) "
+                                     f"chỉ dùng được {len(rooms)} phòng × {slot_count} timeslot = "
+                                     f"{capacity} lượt phòng")
+
+    def _check_coloring(self, report: PresolveReport):
+        """Điều kiện 5: các môn đôi một xung đột (cùng lớp hoặc cùng giáo viên duy nhất) cần timeslot riêng"""
+        clique = DSaturColoring(self.courses, self.teachers, self.timeslots).find_clique()
+        report.timeslot_lower_bound = len(clique)
+        if len(clique) <= len(self.timeslots):
+            return
+        teachers = {tuple(self.course_teachers[cid]) for cid in clique}
+        if (len({self.courses[cid].student_class for cid in clique}) == 1
+                or (len(teachers) == 1 and len(next(iter(teachers))) == 1)):
+            return  # Đã báo ở điều kiện 2 hoặc 3
+        report.issues.append(f"{len(clique)} môn ({self._describe(clique)}) đôi một xung đột (cùng lớp "
+                             f"hoặc cùng giáo viên duy nhất) nhưng chỉ có {len(self.timeslots)} timeslot")
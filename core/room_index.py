@@ -0,0 +1,55 @@
+"""
+Chỉ mục phòng theo cơ sở, sắp xếp theo sức chứa
+
+Dùng khi sinh ứng viên: tìm bằng bisect các phòng đủ chỗ cho sĩ số lớp,
+phòng nhỏ nhất vừa đủ được trả về trước để dành phòng lớn cho lớp đông.
+"""
+
+from bisect import bisect_left
+from heapq import merge
+from typing import Dict, List, Tuple
+from core.model import Room
+
+
+class RoomIndex:
+    """Lớp chỉ mục phòng theo cơ sở (location) và sức chứa"""
+
+    def __init__(self, rooms: Dict[str, Room]):
+        by_location: Dict[str, List[Tuple[int, str]]] = {}
+        for room_id, room in rooms.items():
+            by_location.setdefault(room.location, []).append((room.capacity, room_id))
+
+        self._entries: Dict[str, List[Tuple[int, str]]] = {}
+        self._capacities: Dict[str, List[int]] = {}
+        for location, entries in by_location.items():
+            entries.sort()
+            self._entries[location] = entries
+            self._capacities[location] = [capacity for capacity, _ in entries]
+        self._cache: Dict[Tuple[str, int], List[str]] = {}
+
+    def candidates(self, required_location: str, min_capacity: int = 0) -> List[str]:
+        """
+        Lấy các phòng ở cơ sở phù hợp và đủ sức chứa, phòng nhỏ trước
+
+        Args:
+            required_location: Yêu cầu vị trí của môn ("A", "B", "N", hoặc "A|B")
+            min_capacity: Sĩ số lớp
+
+        Returns:
+            Danh sách room_id sắp xếp theo sức chứa tăng dần
+        """
+        key = (required_location, min_capacity)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        slices = []
+        for location in required_location.split("|"):
+            capacities = self._capacities.get(location)
+            if capacities:
+                start = bisect_left(capacities, min_capacity)
+                slices.append(self._entries[location][start:])
+
+        result = [room_id for _, room_id in merge(*slices)]
+        self._cache[key] = result
+        return result
@@ -0,0 +1,111 @@
+"""
+Phân phòng theo từng timeslot bằng ghép cặp cực đại (Hopcroft–Karp)
+
+Khi (giáo viên, timeslot) của mỗi môn đã cố định, việc chọn phòng trong một
+timeslot là bài toán ghép cặp hai phía giữa các môn của slot đó và các phòng
+hợp lệ (theo check_location_constraint và sức chứa). Nhờ vậy tính khả thi
+về phòng được kiểm tra trong thời gian đa thức thay vì là một chiều tìm kiếm.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+from core.model import Course, Room
+from core.constraint import ConstraintChecker
+
+
+def hopcroft_karp(adjacency: Dict[str, List[str]]) -> Dict[str, str]:
+    """
+    Ghép cặp cực đại trên đồ thị hai phía
+
+    Args:
+        adjacency: {đỉnh trái: [các đỉnh phải kề]}
+
+    Returns:
+        Dictionary {đỉnh trái: đỉnh phải} của một ghép cặp cực đại
+    """
+    match_left: Dict[str, Optional[str]] = {u: None for u in adjacency}
+    match_right: Dict[str, str] = {}
+    infinity = float("inf")
+
+    def bfs() -> bool:
+        # Tìm các lớp theo chiều rộng từ những đỉnh trái chưa ghép
+        dist.clear()
+        queue = deque()
+        for u in adjacency:
+            if match_left[u] is None:
+                dist[u] = 0
+                queue.append(u)
+        found = False
+        while queue:
+            u = queue.popleft()
+            for v in adjacency[u]:
+                w = match_right.get(v)
+                if w is None:
+                    found = True
+                elif w not in dist:
+                    dist[w] = dist[u] + 1
+                    queue.append(w)
+        return found
+
+    def dfs(u: str) -> bool:
+        # Tìm đường tăng dọc theo các lớp
+        for v in adjacency[u]:
+            w = match_right.get(v)
+            if w is None or (dist.get(w, infinity) == dist[u] + 1 and dfs(w)):
+                match_left[u] = v
+                match_right[v] = u
+                return True
+        dist[u] = infinity
+        return False
+
+    dist: Dict[str, float] = {}
+    while bfs():
+        for u in adjacency:
+            if match_left[u] is None:
+                dfs(u)
+
+    return {u: v for u, v in match_left.items() if v is not None}
+
+
+class RoomMatcher:
+    """Lớp phân phòng cho các môn trong cùng một timeslot"""
+
+    def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
+                 constraint_checker: ConstraintChecker,
+                 candidate_rooms: Optional[Dict[str, List[str]]] = None):
+        """
+        Khởi tạo matcher
+
+        Args:
+            courses: Dictionary các môn học
+            rooms: Dictionary các phòng học
+            constraint_checker: Dùng is_room_suitable (địa điểm, sức chứa) để lọc phòng
+            candidate_rooms: Danh sách phòng ứng viên theo môn (mặc định: tất cả phòng)
+        """
+        self.courses = courses
+        self.rooms = rooms
+        self.eligible_rooms: Dict[str, List[str]] = {}
+        for course_id in courses:
+            candidates = (candidate_rooms.get(course_id, [])
+                          if candidate_rooms is not None else list(rooms.keys()))
+            self.eligible_rooms[course_id] = [
+                room_id for room_id in candidates
+                if constraint_checker.is_room_suitable(course_id, room_id)
+            ]
+
+    def match(self, course_ids: Iterable[str]) -> Optional[Dict[str, str]]:
+        """
+        Phân phòng cho các môn cùng timeslot
+
+        Returns:
+            {course_id: room_id} nếu mọi môn đều có phòng, None nếu không
+        """
+        adjacency = {cid: self.eligible_rooms.get(cid, []) for cid in course_ids}
+        matching = hopcroft_karp(adjacency)
+        if len(matching) < len(adjacency):
+            return None
+        return matching
+
+    def is_feasible(self, course_ids: Iterable[str]) -> bool:
+        """Kiểm tra các môn cùng timeslot có thể được xếp đủ phòng hay không"""
+        return self.match(course_ids) is not None
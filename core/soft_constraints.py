@@ -0,0 +1,330 @@
+"""
+Các ràng buộc mềm (Soft Constraints) dạng kernel có thể cắm thêm
+
+Mỗi kernel trả về điểm trong [0, 1] (1 là thỏa mãn hoàn toàn) và có hai
+đường tính:
+- evaluate(schedule): tính lại toàn bộ
+- reset(assignments) / update(removed, added) / score(): tính tăng dần,
+  chỉ cập nhật các nhóm (giáo viên, lớp, ngày, ...) bị ảnh hưởng
+
+Kernel mới được đăng ký bằng decorator @register_soft_constraint và được
+ScheduleEvaluator kết hợp theo trọng số cấu hình.
+"""
+
+import inspect
+from abc import ABC, abstractmethod
+from typing import Dict, Hashable, Iterable, List, Tuple, Type
+from core.model import Schedule, Assignment, Course, Room, Teacher, Timeslot
+
+
+DAY_ORDER = {"Thứ 2": 0, "Thứ 3": 1, "Thứ 4": 2, "Thứ 5": 3, "Thứ 6": 4, "Thứ 7": 5}
+
+SOFT_CONSTRAINTS: Dict[str, Type["SoftConstraint"]] = {}
+
+
+def register_soft_constraint(cls: Type["SoftConstraint"]) -> Type["SoftConstraint"]:
+    """
+    Decorator đăng ký một kernel ràng buộc mềm theo tên
+
+    Raises:
+        TypeError: Kernel còn phương thức trừu tượng chưa cài đặt
+    """
+    if inspect.isabstract(cls):
+        missing = ", ".join(sorted(cls.__abstractmethods__))
+        raise TypeError(f"Kernel {cls.__name__} chưa cài đặt: {missing}")
+    SOFT_CONSTRAINTS[cls.name] = cls
+    return cls
+
+
+def timeslot_index(ts: Timeslot) -> int:
+    """Chỉ số tuyến tính của timeslot (2 timeslot liền kề chênh nhau đúng 1)"""
+    session_order = 0 if ts.session == "Sáng" else 1 if ts.session == "Chiều" else ts.period
+    return DAY_ORDER.get(ts.day, 0) * 100 + session_order * 10 + ts.period
+
+
+class SoftConstraint(ABC):
+    """Lớp cơ sở cho một kernel ràng buộc mềm"""
+
+    name = ""
+    default_weight = 0.0
+
+    def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
+                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot]):
+        self.courses = courses
+        self.rooms = rooms
+        self.teachers = teachers
+        self.timeslots = timeslots
+
+    def evaluate(self, schedule: Schedule) -> float:
+        """Tính điểm toàn bộ (mặc định: dựng trạng thái tăng dần rồi đọc điểm)"""
+        self.reset(schedule.assignments)
+        return self.score()
+
+    @abstractmethod
+    def reset(self, assignments: Iterable[Assignment]):
+        """Dựng lại trạng thái tăng dần từ danh sách assignment"""
+
+    @abstractmethod
+    def update(self, removed: Iterable[Assignment], added: Iterable[Assignment]):
+        """Bỏ các assignment removed và thêm các assignment added"""
+
+    @abstractmethod
+    def score(self) -> float:
+        """Điểm trong [0, 1] của trạng thái hiện tại"""
+
+
+class GroupedSoftConstraint(SoftConstraint):
+    """
+    Kernel có penalty cộng dồn theo nhóm
+
+    Lớp con định nghĩa group_keys(a) (các nhóm mà assignment thuộc về),
+    item(a) (dữ liệu lưu trong nhóm) và group_penalty(items). Khi cập nhật
+    tăng dần chỉ các nhóm bị chạm được tính lại.
+    """
+
+    def reset(self, assignments: Iterable[Assignment]):
+        self.groups: Dict[Hashable, List] = {}
+        self.penalties: Dict[Hashable, float] = {}
+        self.total_penalty = 0.0
+        self.count = 0
+        self.update((), assignments)
+
+    def update(self, removed: Iterable[Assignment], added: Iterable[Assignment]):
+        touched = set()
+        for a in removed:
+            item = self.item(a)
+            for key in self.group_keys(a):
+                self.groups[key].remove(item)
+                touched.add(key)
+            self.count -= 1
+        for a in added:
+            item = self.item(a)
+            for key in self.group_keys(a):
+                self.groups.setdefault(key, []).append(item)
+                touched.add(key)
+            self.count += 1
+        for key in touched:
+            items = self.groups.get(key)
+            new_penalty = self.group_penalty(items) if items else 0.0
+            self.total_penalty += new_penalty - self.penalties.get(key, 0.0)
+            if items:
+                self.penalties[key] = new_penalty
+            else:
+                self.penalties.pop(key, None)
+                self.groups.pop(key, None)
+
+    @abstractmethod
+    def group_keys(self, a: Assignment) -> Tuple[Hashable, ...]:
+        """Các nhóm mà assignment thuộc về"""
+
+    @abstractmethod
+    def item(self, a: Assignment):
+        """Dữ liệu của assignment được lưu trong nhóm"""
+
+    @abstractmethod
+    def group_penalty(self, items: List) -> float:
+        """Penalty của một nhóm"""
+
+    def score(self) -> float:
+        """Mặc định: mỗi đơn vị penalty trừ 1/số assignment"""
+        if self.count == 0:
+            return 1.0
+        return max(0.0, 1.0 - self.total_penalty / self.count)
+
+
+@register_soft_constraint
+class TeacherConsecutive(GroupedSoftConstraint):
+    """Hạn chế giáo viên dạy 3 tiết liên tiếp trở lên (mỗi vi phạm trừ 8.33/50)"""
+
+    name = "teacher_consecutive"
+    default_weight = 1.0
+
+    def group_keys(self, a: Assignment):
+        return (a.teacher_id,)
+
+    def item(self, a: Assignment):
+        ts = self.timeslots.get(a.timeslot_id)
+        return timeslot_index(ts) if ts else None
+
+    def group_penalty(self, items: List) -> float:
+        return 1.0 if has_consecutive_violation([i for i in items if i is not None]) else 0.0
+
+    def score(self) -> float:
+        return max(0.0, 50.0 - round(self.total_penalty) * 8.33) / 50.0
+
+
+@register_soft_constraint
+class RoomUsage(GroupedSoftConstraint):
+    """Hạn chế số phòng dùng vượt quá số môn (mỗi phòng dư trừ 5/50)"""
+
+    name = "room_usage"
+    default_weight = 1.0
+
+    def group_keys(self, a: Assignment):
+        return (a.room_id,)
+
+    def item(self, a: Assignment):
+        return a.course_id
+
+    def group_penalty(self, items: List) -> float:
+        return 0.0
+
+    def score(self) -> float:
+        excess_rooms = max(0, len(self.groups) - len(self.courses))
+        return max(0.0, 50.0 - excess_rooms * 5.0) / 50.0
+
+
+@register_soft_constraint
+class TeacherIdleGaps(GroupedSoftConstraint):
+    """Hạn chế khung giờ trống xen giữa các buổi dạy của giáo viên trong một ngày"""
+
+    name = "teacher_idle_gaps"
+
+    def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
+                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot]):
+        super().__init__(courses, rooms, teachers, timeslots)
+        # Vị trí của timeslot trong ngày (0, 1, 2, ...)
+        by_day: Dict[str, List[Tuple[int, str]]] = {}
+        for tid, ts in self.timeslots.items():
+            by_day.setdefault(ts.day, []).append((timeslot_index(ts), tid))
+        self.position: Dict[str, Tuple[str, int]] = {}
+        for day, slots in by_day.items():
+            for pos, (_, tid) in enumerate(sorted(slots)):
+                self.position[tid] = (day, pos)
+
+    def group_keys(self, a: Assignment):
+        day, _ = self.position.get(a.timeslot_id, ("", 0))
+        return ((a.teacher_id, day),)
+
+    def item(self, a: Assignment):
+        return self.position.get(a.timeslot_id, ("", 0))[1]
+
+    def group_penalty(self, items: List) -> float:
+        occupied = set(items)
+        return float(max(occupied) - min(occupied) + 1 - len(occupied))
+
+
+@register_soft_constraint
+class ClassDailyLoad(GroupedSoftConstraint):
+    """Hạn chế số buổi học của một lớp trong cùng một ngày vượt quá max_daily"""
+
+    name = "class_daily_load"
+    max_daily = 2
+
+    def group_keys(self, a: Assignment):
+        course = self.courses.get(a.course_id)
+        ts = self.timeslots.get(a.timeslot_id)
+        if not course or not ts:
+            return ()
+        return ((course.student_class, ts.day),)
+
+    def item(self, a: Assignment):
+        return a.course_id
+
+    def group_penalty(self, items: List) -> float:
+        return float(max(0, len(items) - self.max_daily))
+
+
+@register_soft_constraint
+class CampusTravel(GroupedSoftConstraint):
+    """Hạn chế di chuyển giữa các cơ sở A/B/N trong cùng ngày (giáo viên và lớp)"""
+
+    name = "campus_travel"
+
+    def group_keys(self, a: Assignment):
+        course = self.courses.get(a.course_id)
+        ts = self.timeslots.get(a.timeslot_id)
+        if not course or not ts:
+            return ()
+        return (("T", a.teacher_id, ts.day), ("C", course.student_class, ts.day))
+
+    def item(self, a: Assignment):
+        ts = self.timeslots.get(a.timeslot_id)
+        room = self.rooms.get(a.room_id)
+        return (timeslot_index(ts) if ts else 0, room.location if room else "")
+
+    def group_penalty(self, items: List) -> float:
+        locations = [location for _, location in sorted(items)]
+        return float(sum(1 for i in range(len(locations) - 1)
+                         if locations[i] != locations[i + 1]))
+
+    def score(self) -> float:
+        if self.count == 0:
+            return 1.0
+        # Mỗi assignment thuộc 2 nhóm (giáo viên và lớp)
+        return max(0.0, 1.0 - self.total_penalty / (2 * self.count))
+
+
+@register_soft_constraint
+class TeacherWorkloadBalance(SoftConstraint):
+    """Cân bằng số buổi dạy giữa các giáo viên (điểm = 1 / (1 + phương sai))"""
+
+    name = "teacher_workload_balance"
+
+    def reset(self, assignments: Iterable[Assignment]):
+        self.load: Dict[str, int] = {}
+        self.total = 0
+        self.total_sq = 0
+        self.update((), assignments)
+
+    def update(self, removed: Iterable[Assignment], added: Iterable[Assignment]):
+        for a in removed:
+            self._shift(a.teacher_id, -1)
+        for a in added:
+            self._shift(a.teacher_id, 1)
+
+    def _shift(self, teacher_id: str, delta: int):
+        old = self.load.get(teacher_id, 0)
+        new = old + delta
+        self.load[teacher_id] = new
+        self.total += delta
+        self.total_sq += new * new - old * old
+
+    def score(self) -> float:
+        n = max(1, len(self.teachers))
+        mean = self.total / n
+        variance = max(0.0, self.total_sq / n - mean * mean)
+        return 1.0 / (1.0 + variance)
+
+
+@register_soft_constraint
+class TeacherPreference(GroupedSoftConstraint):
+    """Ưu tiên xếp giáo viên vào các timeslot họ đăng ký ưu tiên (preference_mask)"""
+
+    name = "teacher_preference"
+
+    def __init__(self, courses: Dict[str, Course], rooms: Dict[str, Room],
+                 teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot]):
+        super().__init__(courses, rooms, teachers, timeslots)
+        self.slot_bits = {tid: bit for bit, tid in enumerate(timeslots)}
+
+    def group_keys(self, a: Assignment):
+        teacher = self.teachers.get(a.teacher_id)
+        # Chỉ tính giáo viên có khai báo ưu tiên
+        if not teacher or not teacher.preference_mask:
+            return ()
+        return (a.teacher_id,)
+
+    def item(self, a: Assignment):
+        teacher = self.teachers[a.teacher_id]
+        slot_bit = self.slot_bits.get(a.timeslot_id)
+        return slot_bit is not None and teacher.prefers(slot_bit)
+
+    def group_penalty(self, items: List) -> float:
+        return float(sum(1 for preferred in items if not preferred))
+
+
+def has_consecutive_violation(timeslot_indices: List[int]) -> bool:
+    """Kiểm tra một giáo viên có dạy 3 tiết liên tiếp trở lên hay không"""
+    timeslot_indices = sorted(timeslot_indices)
+
+    # Đếm số lần có 3 tiết liên tiếp trở lên
+    consecutive_count = 1
+    for i in range(len(timeslot_indices) - 1):
+        if timeslot_indices[i + 1] - timeslot_indices[i] == 1:
+            consecutive_count += 1
+            if consecutive_count >= 3:
+                return True  # Chỉ đếm 1 lần vi phạm cho mỗi giáo viên
+        else:
+            consecutive_count = 1
+    return False
@@ -1,14 +1,22 @@
 
 
+import argparse
+import json
 import os
+import random
 import sys
 import time
 from utils.loader import load_all_data
 from core.backtracking import BacktrackingSolver
 from core.gwo import GWOSolver
-from core.evaluator import ScheduleEvaluator
+from core.evaluator import ScheduleEvaluator, check_soft_weights
 from core.constraint import ConstraintChecker
+from core.diagnosis import ConflictExplainer
+from core.local_search import LocalSearchPolisher
 from utils.printer import SchedulePrinter
+from utils.store import ScheduleStore
+from utils.batch import SOLVERS, build_jobs, run_batch, load_schedule_file
+from utils.result_cache import ResultCache
 
 1
 def print_header(title: str):
@@ -63,15 +71,50 @@ def run_backtracking(printer, evaluator, constraint_checker,
     # Giải bài toán
     print("\n  Đang tìm lịch hợp lệ bằng Backtracking...")
     print("  (Thuật toán sẽ tìm tất cả tổ hợp có thể để gán môn học)")
-    start_time = time.time()
-    schedule = solver.solve(verbose=True)
-    elapsed_time = time.time() - start_time
+    schedule, elapsed_time, cached = solve_with_cache(
+        "backtracking", {}, lambda: solver.solve(verbose=True),
+        courses, rooms, teachers, timeslots, evaluator, constraint_checker)
     
     # Hiển thị kết quả
     print_result(schedule, elapsed_time, printer, evaluator, constraint_checker, 
                 "BACKTRACKING")
+    if not cached:
+        save_result(schedule, "backtracking", {}, elapsed_time, evaluator,
+                    constraint_checker, courses)
+    if not schedule:
+        diagnose_conflict(courses, rooms, teachers, timeslots, known_infeasible=not solver.timed_out)
     
-    return schedule
+    return polish_result(schedule, "backtracking", {}, printer, evaluator, constraint_checker,
+                         courses, rooms, teachers, timeslots)
+
+
+def diagnose_conflict(courses, rooms, teachers, timeslots, known_infeasible=True):
+    """Tìm và in tập môn xung đột tối thiểu khi không tìm được lịch"""
+    choice = input("\n  Tìm tập môn gây xung đột? (y/n): ").strip().lower()
+    if choice != "y":
+        return
+    
+    print("  Đang tìm tập xung đột tối thiểu...")
+    start_time = time.time()
+    conflict = ConflictExplainer(courses, rooms, teachers, timeslots).explain(
+        known_infeasible=known_infeasible)
+    elapsed_time = time.time() - start_time
+    if conflict is None:
+        print("  Không chứng minh được bài toán vô nghiệm (có thể chỉ cần thêm thời gian)")
+        return
+    
+    print(f"\n  Các môn sau không thể cùng xếp lịch ({conflict.probes} lần kiểm tra, {elapsed_time:.2f}s):")
+    for course_id in conflict.courses:
+        course = courses[course_id]
+        print(f"    - {course.name} ({course.student_class}, {course_id})")
+    print(f"  Giáo viên liên quan: {', '.join(conflict.teachers) or '(không có)'}")
+    print(f"  Phòng liên quan: {', '.join(conflict.rooms) or '(không có)'}")
+    if conflict.reasons:
+        print("  Lý do:")
+        for reason in conflict.reasons:
+            print(f"    - {reason}")
+    if not conflict.minimal:
+        print("  ⚠ Một số lần kiểm tra hết giờ, tập này có thể chưa tối thiểu")
 
 
 def run_gwo(printer, evaluator, constraint_checker,
@@ -95,20 +138,127 @@ def run_gwo(printer, evaluator, constraint_checker,
         max_iterations = 100
         print("  ⚠ Giá trị không hợp lệ, sử dụng giá trị mặc định")
     
+    # GWO là thuật toán ngẫu nhiên: chỉ dùng lại kết quả đã cache khi seed được chỉ định
+    seed = None
+    seed_input = input("  Seed ngẫu nhiên (Enter: lần chạy mới, không dùng cache): ").strip()
+    if seed_input:
+        try:
+            seed = int(seed_input)
+        except ValueError:
+            print("  ⚠ Seed không hợp lệ, chạy không seed")
+    
+    # Khởi tạo ấm từ một lịch đã lưu (ví dụ lịch tuần trước)
+    seed_schedules = []
+    run_input = input("  Khởi tạo từ lịch đã lưu (nhập số run, Enter để bỏ qua): ").strip()
+    if run_input:
+        try:
+            with ScheduleStore() as store:
+                seed_schedule = store.load(int(run_input))
+            if seed_schedule is None:
+                print(f"  ⚠ Không tìm thấy run #{run_input}, khởi tạo ngẫu nhiên")
+            else:
+                seed_schedules.append(seed_schedule)
+                print(f"  ✓ Khởi tạo ấm từ run #{run_input} ({len(seed_schedule.assignments)} môn)")
+        except ValueError:
+            print("  ⚠ Số run không hợp lệ, khởi tạo ngẫu nhiên")
+    
     # Giải bài toán
     print(f"\n  Đang tối ưu lịch bằng GWO...")
     print(f"  Tham số: population={population_size}, iterations={max_iterations}")
-    start_time = time.time()
-    schedule = solver.solve(population_size=population_size, 
-                          max_iterations=max_iterations,
-                          verbose=True)
-    elapsed_time = time.time() - start_time
+    params = {"population_size": population_size, "max_iterations": max_iterations}
+    if seed is not None:
+        random.seed(seed)
+    if seed_schedules:
+        # Lịch khởi tạo khác nhau cho kết quả khác nhau: không dùng cache
+        start_time = time.time()
+        schedule = solver.solve(verbose=True, seed_schedules=seed_schedules,
+                                init_workers=None, **params)
+        elapsed_time = time.time() - start_time
+        cached = False
+        params["warm_start_run"] = int(run_input)
+    else:
+        schedule, elapsed_time, cached = solve_with_cache(
+            "gwo", params, lambda: solver.solve(verbose=True, init_workers=None, **params),
+            courses, rooms, teachers, timeslots, evaluator, constraint_checker,
+            seed=seed, use_cache=seed is not None)
     
     # Hiển thị kết quả
     print_result(schedule, elapsed_time, printer, evaluator, constraint_checker, 
                 "GWO")
+    if not cached:
+        save_result(schedule, "gwo", params, elapsed_time, evaluator, constraint_checker, courses,
+                    seed=seed)
     
-    return schedule
+    return polish_result(schedule, "gwo", params, printer, evaluator, constraint_checker,
+                         courses, rooms, teachers, timeslots, seed=seed)
+
+
+def polish_result(schedule, solver_name, params, printer, evaluator, constraint_checker,
+                  courses, rooms, teachers, timeslots, seed=None):
+    """
+    Hỏi người dùng và đánh bóng lịch vừa tìm được bằng tìm kiếm cục bộ
+    
+    Lịch đã đánh bóng được lưu thành một run mới ("<solver>+polish").
+    
+    Returns:
+        Lịch đã đánh bóng, hoặc lịch ban đầu nếu người dùng bỏ qua
+    """
+    if not schedule:
+        return schedule
+    if input("\n  Đánh bóng lịch bằng tìm kiếm cục bộ? (y/n): ").strip().lower() != "y":
+        return schedule
+    
+    print("  Đang đánh bóng lịch...")
+    fitness_before = evaluator.evaluate(schedule)
+    start_time = time.time()
+    polisher = LocalSearchPolisher(courses, rooms, teachers, timeslots, evaluator)
+    polished = polisher.polish(schedule, seed=seed, verbose=True)
+    elapsed_time = time.time() - start_time
+    print(f"  ✓ Fitness: {fitness_before:.2f} → {evaluator.evaluate(polished):.2f}")
+    printer.print_schedule(polished, f"LỊCH HỌC - {solver_name.upper()} + LOCAL SEARCH")
+    save_result(polished, f"{solver_name}+polish", params, elapsed_time, evaluator,
+                constraint_checker, courses, seed=seed)
+    return polished
+
+
+def solve_with_cache(solver_name, params, solve, courses, rooms, teachers, timeslots,
+                     evaluator, constraint_checker, seed=None, use_cache=True):
+    """
+    Giải bài toán, dùng lại kết quả đã lưu nếu cùng dữ liệu, solver, tham số và seed
+    
+    Khi có kết quả trong cache, người dùng có thể chọn giải lại (kết quả mới
+    ghi đè lên kết quả cũ).
+    
+    Args:
+        solver_name: Tên solver (một phần của khóa cache)
+        params: Tham số solver (một phần của khóa cache)
+        solve: Hàm không tham số chạy solver, trả về lịch hoặc None
+        seed: Seed ngẫu nhiên đã đặt trước khi gọi solve (một phần của khóa cache)
+        use_cache: False để giải và không đọc/ghi cache (solver ngẫu nhiên chạy không seed)
+        
+    Returns:
+        Tuple (schedule, elapsed_time, cached)
+    """
+    cache = ResultCache()
+    key = cache.make_key(courses, rooms, teachers, timeslots, solver_name, params, seed)
+    cached = cache.get(key) if use_cache else None
+    if cached:
+        schedule, metrics = cached
+        print(f"  ✓ Đã có kết quả trong cache (lần giải trước mất {metrics.get('elapsed', 0):.2f}s)")
+        if input("  Giải lại (bỏ qua cache)? (y/n): ").strip().lower() != "y":
+            return schedule, metrics.get("elapsed", 0.0), True
+    
+    start_time = time.time()
+    schedule = solve()
+    elapsed_time = time.time() - start_time
+    if schedule and use_cache:
+        try:
+            cache.put(key, schedule, {"elapsed": elapsed_time,
+                                      "fitness": evaluator.evaluate(schedule),
+                                      "valid": constraint_checker.is_valid_schedule(schedule)})
+        except OSError as e:
+            print(f"  ⚠ Không ghi được cache: {e}")
+    return schedule, elapsed_time, False
 
 
 def print_result(schedule, elapsed_time, printer, evaluator, constraint_checker, 
@@ -158,6 +308,70 @@ def print_result(schedule, elapsed_time, printer, evaluator, constraint_checker,
         print("    - Kiểm tra ràng buộc có quá chặt không")
 
 
+def save_result(schedule, solver_name, params, elapsed_time, evaluator,
+                constraint_checker, courses, seed=None):
+    """Lưu kết quả vào kho lịch SQLite để mở lại sau"""
+    if not schedule:
+        return None
+    try:
+        with ScheduleStore() as store:
+            run_id = store.save(schedule, solver_name, courses, params=params, seed=seed,
+                                fitness=evaluator.evaluate(schedule), elapsed=elapsed_time,
+                                valid=constraint_checker.is_valid_schedule(schedule))
+        print(f"  ✓ Đã lưu kết quả (run #{run_id})")
+        return run_id
+    except Exception as e:
+        print(f"  ⚠ Không lưu được kết quả: {e}")
+        return None
+
+
+def open_saved_schedule(printer, evaluator, constraint_checker):
+    """Mở một lịch đã lưu trong kho lịch"""
+    with ScheduleStore() as store:
+        runs = store.list_runs(limit=10)
+        if not runs:
+            print("  ⚠ Chưa có lịch nào được lưu!")
+            return None
+        
+        print(f"\n  {'Run':<6} {'Thời điểm':<20} {'Thuật toán':<14} {'Fitness':<10} {'Số môn':<8} {'Thời gian':<10}")
+        print("  " + "-" * 70)
+        for run in runs:
+            created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["created_at"]))
+            fitness = f"{run['fitness']:.2f}" if run["fitness"] is not None else "-"
+            elapsed = f"{run['elapsed']:.2f}s" if run["elapsed"] is not None else "-"
+            print(f"  {run['id']:<6} {created:<20} {run['solver']:<14} {fitness:<10} "
+                  f"{run['assigned']:<8} {elapsed:<10}")
+        
+        run_input = input("\n  Nhập số run cần mở: ").strip()
+        try:
+            run_id = int(run_input)
+        except ValueError:
+            print("  ⚠ Lựa chọn không hợp lệ!")
+            return None
+        
+        schedule = store.load(run_id)
+        if schedule is None:
+            print(f"  ⚠ Không tìm thấy run #{run_id}")
+            return None
+        run = store.get_run(run_id)
+    
+    title = f"LỊCH ĐÃ LƯU - RUN #{run_id} ({run['solver'].upper()})"
+    printer.print_schedule(schedule, title)
+    printer.print_schedule_by_course(schedule, title)
+    printer.print_statistics(schedule)
+    return schedule
+
+
+def export_schedule(printer, schedule, directory=os.path.join("results", "exports")):
+    """Xuất thời khóa biểu theo giáo viên, lớp và phòng ra CSV, JSON Lines và iCalendar"""
+    for group_by in ("teacher", "class", "room"):
+        rows = printer.export_csv(schedule, os.path.join(directory, f"{group_by}.csv"), group_by)
+        printer.export_jsonl(schedule, os.path.join(directory, f"{group_by}.jsonl"), group_by)
+        calendars = printer.export_ics(schedule, os.path.join(directory, "ics"), group_by)
+        print(f"  ✓ Theo {group_by}: {rows} dòng, {len(calendars)} file .ics")
+    print(f"  ✓ Đã xuất vào thư mục: {directory}")
+
+
 def compare_algorithms(printer, evaluator, constraint_checker,
                       courses, rooms, teachers, timeslots):
     """So sánh Backtracking và GWO"""
@@ -263,9 +477,10 @@ def print_schedule_menu(printer, evaluator, constraint_checker,
     print("\n  Chọn nguồn lịch:")
     print("  1. Tạo lịch mới bằng Backtracking")
     print("  2. Tạo lịch mới bằng GWO")
-    print("  3. Quay lại menu chính")
+    print("  3. Mở lịch đã lưu")
+    print("  4. Quay lại menu chính")
     
-    choice = input("\n  Nhập lựa chọn (1-3): ").strip()
+    choice = input("\n  Nhập lựa chọn (1-4): ").strip()
     
     if choice == "1":
         schedule = run_backtracking(printer, evaluator, constraint_checker,
@@ -278,13 +493,145 @@ def print_schedule_menu(printer, evaluator, constraint_checker,
         if schedule:
             printer.print_schedule_by_course(schedule, "LỊCH HỌC THEO MÔN - GWO")
     elif choice == "3":
+        schedule = open_saved_schedule(printer, evaluator, constraint_checker)
+        if schedule and input("\n  Xuất lịch ra file (CSV, JSON Lines, iCalendar)? (y/n): ").strip().lower() == "y":
+            export_schedule(printer, schedule)
+    elif choice == "4":
         return
     else:
         print("  ⚠ Lựa chọn không hợp lệ!")
 
 
+def soft_weight_arg(text: str):
+    """Đọc một trọng số ràng buộc mềm dạng TÊN=TRỌNG_SỐ (kiểu của --soft-weights)"""
+    name, sep, value = text.partition("=")
+    try:
+        if not sep:
+            raise ValueError("cần dạng TÊN=TRỌNG_SỐ")
+        weight = float(value)
+        check_soft_weights({name: weight})
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"'{text}': {e}")
+    return name, weight
+
+
+def parse_args(argv):
+    """Tham số dòng lệnh cho chế độ batch (không tương tác)"""
+    parser = argparse.ArgumentParser(
+        description="Xếp lịch môn học không tương tác: giải nhiều bộ dữ liệu song song "
+                    "và in kết quả dạng JSON Lines")
+    parser.add_argument("--data", nargs="+", default=["data"], metavar="DIR",
+                        help="Các thư mục dữ liệu (mỗi thư mục chứa courses/rooms/teachers/timeslots.json)")
+    parser.add_argument("--solver", choices=SOLVERS, default="backtracking", help="Thuật toán")
+    parser.add_argument("--population", type=int, default=20, help="GWO: số lượng sói")
+    parser.add_argument("--iterations", type=int, default=100, help="GWO/LNS: số lần lặp tối đa")
+    parser.add_argument("--search-mode", choices=("feasible", "penalty"), default=None,
+                        help="GWO: feasible (sửa mỗi sói cho hợp lệ) hoặc penalty (cho phép vi phạm "
+                             "tạm thời, trừ điểm theo số vi phạm)")
+    parser.add_argument("--penalty-weight", type=float, default=None,
+                        help="GWO (penalty): trọng số ban đầu cho mỗi vi phạm")
+    parser.add_argument("--repair", choices=("leaders", "end"), default=None,
+                        help="GWO (penalty): sửa Alpha/Beta/Delta mỗi vòng hoặc chỉ sửa Alpha khi kết thúc")
+    parser.add_argument("--mutation-rate", type=float, default=None,
+                        help="GWO: xác suất đột biến cơ sở của mỗi môn (mặc định 1 / số môn)")
+    parser.add_argument("--no-coloring", dest="coloring", action="store_false",
+                        help="Backtracking: không dùng thứ tự và timeslot gợi ý từ tô màu DSatur; "
+                             "GWO: không dựng một phần đàn theo tô màu DSatur")
+    parser.add_argument("--soft-weights", nargs="+", type=soft_weight_arg, default=None,
+                        metavar="NAME=W",
+                        help="Trọng số ràng buộc mềm (ví dụ teacher_idle_gaps=20 campus_travel=10), "
+                             "dùng cho fitness của GWO/LNS, đánh bóng và kết quả; trọng số 0 tắt kernel")
+    parser.add_argument("--patience", type=int, default=None,
+                        help="GWO/LNS: dừng khi không cải thiện sau ngần này vòng")
+    parser.add_argument("--seeds", nargs="+", type=int, default=None, metavar="SEED",
+                        help="Các seed ngẫu nhiên (mỗi seed là một job cho mỗi thư mục)")
+    parser.add_argument("--time-limit", type=float, default=None, metavar="SEC",
+                        help="Giới hạn thời gian cho mỗi job (giây)")
+    parser.add_argument("--jobs", type=int, default=None, metavar="N",
+                        help="Số process chạy song song (mặc định: số CPU)")
+    parser.add_argument("--output", default="-", metavar="PATH",
+                        help="File JSON Lines chứa kết quả (mặc định: stdout)")
+    parser.add_argument("--schedule-dir", default=None, metavar="DIR",
+                        help="Thư mục ghi lịch của từng job (JSON)")
+    parser.add_argument("--warm-start", nargs="+", default=None, metavar="PATH",
+                        help="GWO/LNS: các file lịch JSON (như trong --schedule-dir) để khởi tạo ấm")
+    parser.add_argument("--save", action="store_true", help="Lưu các lịch hợp lệ vào kho lịch SQLite")
+    parser.add_argument("--diagnose", action="store_true",
+                        help="Backtracking: khi vô nghiệm, tìm tập môn xung đột tối thiểu")
+    parser.add_argument("--polish", action="store_true",
+                        help="Đánh bóng lịch tìm được bằng tìm kiếm cục bộ (Local Search)")
+    parser.add_argument("--decompose", action="store_true",
+                        help="Giải từng thành phần độc lập (chung giáo viên/lớp) rồi ghép lại, "
+                             "phân lại phòng khi ghép")
+    return parser.parse_args(argv)
+
+
+def run_cli(argv):
+    """
+    Chế độ batch: giải các job và ghi mỗi kết quả một dòng JSON
+    
+    Returns:
+        Exit code: 0 nếu mọi job có lịch hợp lệ, 1 nếu không
+    """
+    args = parse_args(argv)
+    params = {}
+    if args.solver == "gwo":
+        params = {"population_size": args.population, "max_iterations": args.iterations}
+        for key in ("search_mode", "penalty_weight", "repair", "mutation_rate"):
+            value = getattr(args, key)
+            if value is not None:
+                params[key] = value
+    elif args.solver == "lns":
+        params = {"max_iterations": args.iterations}
+    if args.solver != "backtracking" and args.patience is not None:
+        params["patience"] = args.patience
+    if args.solver != "lns" and not args.coloring:
+        params["coloring"] = False
+    
+    schedule_dir = args.schedule_dir
+    if args.save and not schedule_dir:
+        schedule_dir = os.path.join("results", "batch")
+    soft_weights = dict(args.soft_weights) if args.soft_weights else None
+    jobs = build_jobs(args.data, args.solver, params, args.seeds, args.time_limit, schedule_dir,
+                      args.warm_start, args.diagnose, args.polish, args.decompose, soft_weights)
+    
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    failed = 0
+    try:
+        for result in run_batch(jobs, args.jobs):
+            if result["status"] != "ok":
+                failed += 1
+            elif args.save:
+                save_batch_result(result)
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    
+    print(f"{len(jobs) - failed}/{len(jobs)} job có lịch hợp lệ", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+
+def save_batch_result(result):
+    """Lưu lịch của một job batch vào kho lịch SQLite"""
+    _, _, courses, _ = load_all_data(result["instance"])
+    schedule = load_schedule_file(result["schedule_path"])
+    with ScheduleStore() as store:
+        params = dict(result["params"], soft_weights=result["soft_weights"]) if "soft_weights" in result \
+            else result["params"]
+        result["run_id"] = store.save(schedule, result["solver"], courses, params=params,
+                                      seed=result["seed"], fitness=result["fitness"],
+                                      elapsed=result["elapsed"], valid=result["valid"],
+                                      note=f"batch: {result['instance']}")
+
+
 def main():
     """Hàm main"""
+    # Có tham số dòng lệnh: chạy chế độ batch không tương tác
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    
     # Kiểm tra thư mục data
     if not os.path.exists("data"):
         print("✗ Lỗi: Không tìm thấy thư mục 'data'!")
@@ -1,7 +1,5 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import threading
-import time
 
 # Màu sắc & font mặc định
 PRIMARY_COLOR = "#005F69"
@@ -9,18 +7,23 @@ BACKGROUND_COLOR = "#FFFFFF"
 TEXT_COLOR = "#005F69"
 ACCENT_COLOR = "#F26F33"
 FONT_FAMILY = "Tahoma"
+SEARCH_DEBOUNCE_MS = 250  # Thời gian chờ sau lần gõ phím cuối trước khi lọc
+RENDER_BATCH_SIZE = 200  # Số dòng chèn vào Treeview mỗi lần after()
+SOLVER_POLL_MS = 100  # Chu kỳ đọc sự kiện tiến trình từ process solver
 
 # IMPORT CÁC CLASS CẦN THIẾT
 # Đảm bảo các file này đã được tạo với nội dung mô phỏng ở trên
 try:
     # utils.loader được giả định nằm trong thư mục utils/
     from utils.loader import load_all_data 
-    from core.backtracking import BacktrackingSolver
-    from core.gwo import GWOSolver
-    from core.evaluator import ScheduleEvaluator
+    from core.evaluator import ScheduleEvaluator, check_soft_weights
+    from core.soft_constraints import SOFT_CONSTRAINTS
     from core.constraint import ConstraintChecker
     # THÊM DÒNG NÀY:
     from utils.printer import SchedulePrinter 
+    from utils.view_model import ScheduleViewModel
+    from utils.solver_process import SolverProcess
+    from utils.result_cache import ResultCache
 except ImportError as e:
     messagebox.showerror("Lỗi Import", f"Không tìm thấy các module cần thiết: {e}. Vui lòng đảm bảo cấu trúc thư mục và các file mô hình đã được tạo.")
     exit()
@@ -45,6 +48,16 @@ class ScheduleGUI:
         self.constraint_checker = None
         self.current_schedule = None # Schedule() object
         self.printer = None # Đã thêm: Khởi tạo printer
+        self.view_model = None # ScheduleViewModel của lịch hiện tại
+        self._filter_job = None # after() id của lần lọc đang chờ (debounce)
+        self._render_job = None # after() id của lô dòng đang chờ chèn
+        self._overview_indices = [] # Chỉ số dòng (view model) đang hiển thị, theo thứ tự
+        self._sort_state = (None, False) # (cột đang sắp xếp, giảm dần)
+        self.solver_process = None # SolverProcess đang chạy
+        self._solver_done = None # Hàm xử lý khi process solver hoàn thành
+        self.progress_history = [] # Các metrics GWO nhận được (vẽ biểu đồ hội tụ)
+        self.result_cache = ResultCache() # Cache kết quả theo (dữ liệu, solver, tham số)
+        self._cache_key = None # Khóa cache của lần chạy hiện tại
         
         # Khởi tạo giao diện
         self.setup_ui()
@@ -259,8 +272,89 @@ class ScheduleGUI:
             highlightthickness=0
         ).grid(row=1, column=1, padx=10, pady=5)
         
+        tk.Label(
+            self.gwo_params_frame,
+            text="Seed (trống: ngẫu nhiên):",
+            font=(FONT_FAMILY, 10),
+            bg=BACKGROUND_COLOR,
+            fg=TEXT_COLOR
+        ).grid(row=2, column=0, sticky=tk.W, padx=10, pady=5)
+        
+        # GWO không seed cho kết quả khác nhau mỗi lần chạy nên không được cache
+        self.seed_var = tk.StringVar(value="")
+        tk.Entry(
+            self.gwo_params_frame,
+            textvariable=self.seed_var,
+            width=10,
+            font=(FONT_FAMILY, 10),
+            bg=BACKGROUND_COLOR,
+            fg=TEXT_COLOR,
+            relief=tk.SOLID,
+            bd=1,
+            highlightthickness=0
+        ).grid(row=2, column=1, padx=10, pady=5)
+        
         self.gwo_params_frame.pack_forget() 
         
+        # Trọng số ràng buộc mềm: fitness của GWO, đánh bóng và điểm hiển thị (0: tắt kernel)
+        weights_frame = tk.LabelFrame(
+            control_frame,
+            text="⚖️ Trọng Số Ràng Buộc Mềm",
+            font=(FONT_FAMILY, 11, 'bold'),
+            bg=BACKGROUND_COLOR,
+            fg=TEXT_COLOR
+        )
+        weights_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        self.soft_weight_vars = {}
+        for row, (name, kernel) in enumerate(SOFT_CONSTRAINTS.items()):
+            tk.Label(
+                weights_frame,
+                text=f"{name}:",
+                font=(FONT_FAMILY, 10),
+                bg=BACKGROUND_COLOR,
+                fg=TEXT_COLOR
+            ).grid(row=row, column=0, sticky=tk.W, padx=10, pady=2)
+            
+            self.soft_weight_vars[name] = tk.StringVar(value=f"{kernel.default_weight:g}")
+            tk.Entry(
+                weights_frame,
+                textvariable=self.soft_weight_vars[name],
+                width=10,
+                font=(FONT_FAMILY, 10),
+                bg=BACKGROUND_COLOR,
+                fg=TEXT_COLOR,
+                relief=tk.SOLID,
+                bd=1,
+                highlightthickness=0
+            ).grid(row=row, column=1, padx=10, pady=2)
+        
+        # Giải lại dù đã có kết quả trong cache (kết quả mới ghi đè kết quả cũ)
+        self.refresh_cache_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            control_frame,
+            text="Giải lại (bỏ qua cache)",
+            variable=self.refresh_cache_var,
+            font=(FONT_FAMILY, 10),
+            bg=BACKGROUND_COLOR,
+            fg=TEXT_COLOR,
+            selectcolor=BACKGROUND_COLOR,
+            activebackground=BACKGROUND_COLOR
+        ).pack(anchor=tk.W, padx=10)
+        
+        # Đánh bóng lịch tìm được bằng tìm kiếm cục bộ (chạy trong process solver)
+        self.polish_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            control_frame,
+            text="Đánh bóng bằng Local Search",
+            variable=self.polish_var,
+            font=(FONT_FAMILY, 10),
+            bg=BACKGROUND_COLOR,
+            fg=TEXT_COLOR,
+            selectcolor=BACKGROUND_COLOR,
+            activebackground=BACKGROUND_COLOR
+        ).pack(anchor=tk.W, padx=10)
+        
         # Buttons
         button_frame = tk.Frame(control_frame, bg=BACKGROUND_COLOR)
         button_frame.pack(fill=tk.X, pady=10)
@@ -293,6 +387,21 @@ class ScheduleGUI:
         )
         self.compare_button.pack(fill=tk.X, pady=5)
         
+        self.cancel_button = tk.Button(
+            button_frame,
+            text="⏹️ Hủy",
+            font=(FONT_FAMILY, 11, 'bold'),
+            bg=PRIMARY_COLOR,
+            fg='white',
+            activebackground=PRIMARY_COLOR,
+            activeforeground='white',
+            relief=tk.FLAT,
+            cursor='hand2',
+            state=tk.DISABLED,
+            command=self.cancel_solver
+        )
+        self.cancel_button.pack(fill=tk.X, pady=5)
+        
         self.clear_button = tk.Button(
             button_frame,
             text="🗑️ Xóa Kết Quả",
@@ -307,6 +416,25 @@ class ScheduleGUI:
         )
         self.clear_button.pack(fill=tk.X, pady=5)
         
+        # Convergence chart
+        chart_frame = tk.LabelFrame(
+            control_frame,
+            text="📉 Hội Tụ",
+            font=(FONT_FAMILY, 11, 'bold'),
+            bg=BACKGROUND_COLOR,
+            fg=TEXT_COLOR
+        )
+        chart_frame.pack(fill=tk.X, pady=(20, 0))
+        
+        self.chart_canvas = tk.Canvas(
+            chart_frame,
+            height=120,
+            width=260,
+            bg=BACKGROUND_COLOR,
+            highlightthickness=0
+        )
+        self.chart_canvas.pack(fill=tk.X, padx=10, pady=10)
+        
         # Results info
         results_frame = tk.LabelFrame(
             control_frame,
@@ -383,11 +511,10 @@ class ScheduleGUI:
         h_scroll.config(command=self.overview_tree.xview)
         
         # Column headings
-        self.overview_tree.heading('Môn Học', text='Môn Học')
-        self.overview_tree.heading('Giáo Viên', text='Giáo Viên')
-        self.overview_tree.heading('Phòng', text='Phòng')
-        self.overview_tree.heading('Thời Gian', text='Thời Gian')
-        self.overview_tree.heading('Lớp', text='Lớp')
+        # Column headings (nhấn để sắp xếp, sắp xếp trong view model)
+        for col in columns:
+            self.overview_tree.heading(col, text=col,
+                                       command=lambda c=col: self.sort_overview(c))
         
         # Column widths
         equal_width = 240
@@ -529,67 +656,185 @@ class ScheduleGUI:
         else:
             self.gwo_params_frame.pack_forget()
     
+    def _read_soft_weights(self):
+        """
+        Đọc trọng số ràng buộc mềm từ giao diện và cập nhật self.evaluator
+        
+        Returns:
+            {tên kernel: trọng số} các kernel khác trọng số mặc định, None nếu nhập sai
+        """
+        try:
+            weights = {name: float(var.get()) for name, var in self.soft_weight_vars.items()}
+            check_soft_weights(weights)
+        except ValueError as e:
+            messagebox.showerror("Lỗi", f"Trọng số ràng buộc mềm không hợp lệ!\n{e}")
+            return None
+        overrides = {name: weight for name, weight in weights.items()
+                     if weight != SOFT_CONSTRAINTS[name].default_weight}
+        self.evaluator = ScheduleEvaluator(self.courses, self.rooms, self.teachers, self.timeslots,
+                                           weights=overrides)
+        return overrides
+    
     def run_algorithm(self):
         """Chạy thuật toán đã chọn"""
         if not self.courses:
             messagebox.showwarning("Cảnh báo", "Chưa có dữ liệu!")
             return
+        soft_weights = self._read_soft_weights()
+        if soft_weights is None:
+            return
+        
+        algo = self.algo_var.get()
+        if algo == "backtracking":
+            self.update_status("Đang chạy Backtracking...")
+            self.update_results("🔄 Đang chạy Backtracking...\n")
+            self._start_solver("backtracking", {},
+                               lambda schedule, elapsed: self._process_result(schedule, elapsed, "BACKTRACKING"),
+                               soft_weights=soft_weights)
+        else: # GWO
+            try:
+                population = int(self.population_var.get())
+                iterations = int(self.iterations_var.get())
+                seed_text = self.seed_var.get().strip()
+                seed = int(seed_text) if seed_text else None
+            except ValueError:
+                messagebox.showerror("Lỗi", "Tham số GWO không hợp lệ! Vui lòng nhập số nguyên.")
+                return
+            
+            self.update_status("Đang chạy GWO...")
+            self.update_results(f"🔄 Đang chạy GWO...\nPopulation: {population}, Iterations: {iterations}\n")
+            self._start_solver("gwo", {"population_size": population, "max_iterations": iterations},
+                               lambda schedule, elapsed: self._process_result(schedule, elapsed, "GWO"),
+                               seed=seed, soft_weights=soft_weights)
+    
+    def _start_solver(self, algo, params, on_done, seed=None, soft_weights=None):
+        """
+        Chạy solver trong process riêng (không tranh GIL với giao diện)
+        
+        Args:
+            algo: "backtracking" hoặc "gwo"
+            params: Tham số truyền cho solver.solve
+            on_done: Hàm (schedule, elapsed) gọi trên main thread khi xong
+            seed: Seed ngẫu nhiên. GWO không seed không đọc/ghi cache
+            soft_weights: Trọng số ràng buộc mềm khác mặc định (fitness GWO và đánh bóng)
         
+        Khi ô "Đánh bóng bằng Local Search" được chọn, lịch được đánh bóng
+        trong cùng process solver (khóa cache có thêm "polish").
+        """
+        polish = self.polish_var.get()
         self.run_button.config(state=tk.DISABLED)
         self.compare_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_history = []
+        self.draw_convergence_chart()
+        
+        # Đã giải bài toán này với cùng tham số và seed: dùng lại kết quả
+        # (trừ khi người dùng chọn giải lại)
+        self._cache_key = None
+        if algo == "backtracking" or seed is not None:
+            cache_params = dict(params, polish=True) if polish else dict(params)
+            if soft_weights and (algo == "gwo" or polish):
+                cache_params["soft_weights"] = soft_weights
+            self._cache_key = self.result_cache.make_key(self.courses, self.rooms, self.teachers,
+                                                         self.timeslots, algo, cache_params, seed)
+        cached = None
+        if self._cache_key is not None and not self.refresh_cache_var.get():
+            cached = self.result_cache.get(self._cache_key)
+        if cached:
+            schedule, metrics = cached
+            self._finish_solver()
+            self.update_results("♻️ Lấy kết quả từ cache")
+            on_done(schedule, metrics.get("elapsed", 0.0))
+            return
         
-        # Chạy trong thread riêng
-        thread = threading.Thread(target=self._run_algorithm_thread)
-        thread.daemon = True
-        thread.start()
+        self._solver_done = on_done
+        self.solver_process = SolverProcess(algo, (self.courses, self.rooms, self.teachers, self.timeslots),
+                                            params, seed, polish, soft_weights)
+        self.solver_process.start()
+        self.root.after(SOLVER_POLL_MS, self._poll_solver, self.solver_process)
     
-    def _run_algorithm_thread(self):
-        """Thread chạy thuật toán"""
-        algo = self.algo_var.get()
+    def _poll_solver(self, process):
+        """Đọc sự kiện tiến trình từ process solver (gọi định kỳ bằng after)"""
+        if process is not self.solver_process:
+            return  # Process đã bị hủy hoặc đã được thay bằng lần chạy mới
+        
+        for event in process.poll():
+            if event[0] == "progress":
+                metrics = event[1]
+                self.progress_history.append(metrics)
+                self.status_bar.config(text=f"Iteration {metrics['iteration']}: "
+                                            f"Fitness = {metrics['best_fitness']:.2f}, "
+                                            f"Đã gán = {metrics['assigned']}/{len(self.courses)}")
+            elif event[0] == "done":
+                self._finish_solver()
+                self._store_in_cache(event[1], event[2])
+                self._solver_done(event[1], event[2])
+                return
+            else:
+                self._finish_solver()
+                self.update_results(f"❌ Lỗi xảy ra trong quá trình chạy thuật toán: {event[1]}")
+                self.update_status("✗ Lỗi chạy thuật toán")
+                return
         
+        self.draw_convergence_chart()
+        self.root.after(SOLVER_POLL_MS, self._poll_solver, process)
+    
+    def _store_in_cache(self, schedule, elapsed):
+        """Lưu kết quả vừa giải vào cache"""
+        if not schedule or self._cache_key is None:
+            return
         try:
-            if algo == "backtracking":
-                self.update_status("Đang chạy Backtracking...")
-                self.update_results("🔄 Đang chạy Backtracking...\n")
-                
-                solver = BacktrackingSolver(self.courses, self.rooms, self.teachers, self.timeslots)
-                start_time = time.time()
-                # Sử dụng 'solve' đã được định nghĩa trong BacktrackingSolver
-                schedule = solver.solve(verbose=False) 
-                elapsed = time.time() - start_time
-                
-                self._process_result(schedule, elapsed, "BACKTRACKING")
-                
-            else: # GWO
-                try:
-                    population = int(self.population_var.get())
-                    iterations = int(self.iterations_var.get())
-                except ValueError:
-                    self.root.after(0, lambda: messagebox.showerror("Lỗi", "Tham số GWO không hợp lệ! Vui lòng nhập số nguyên."))
-                    # Bật lại nút nếu lỗi
-                    self.root.after(0, lambda: self.run_button.config(state=tk.NORMAL))
-                    self.root.after(0, lambda: self.compare_button.config(state=tk.NORMAL))
-                    return
-                
-                self.update_status("Đang chạy GWO...")
-                self.update_results(f"🔄 Đang chạy GWO...\nPopulation: {population}, Iterations: {iterations}\n")
-                
-                solver = GWOSolver(self.courses, self.rooms, self.teachers, self.timeslots)
-                start_time = time.time()
-                # Sử dụng 'solve' đã được định nghĩa trong GWOSolver
-                schedule = solver.solve(population_size=population, max_iterations=iterations, verbose=False) 
-                elapsed = time.time() - start_time
-                
-                self._process_result(schedule, elapsed, "GWO")
+            self.result_cache.put(self._cache_key, schedule, {"elapsed": elapsed})
+        except OSError as e:
+            self.update_results(f"⚠ Không ghi được cache: {e}")
+    
+    def _finish_solver(self):
+        """Bật lại các nút sau khi process solver kết thúc"""
+        self.solver_process = None
+        self.draw_convergence_chart()
+        self.run_button.config(state=tk.NORMAL)
+        self.compare_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+    
+    def cancel_solver(self):
+        """Hủy thuật toán đang chạy"""
+        if self.solver_process is None:
+            return
+        self.solver_process.cancel()
+        self._finish_solver()
+        self.update_results("⏹️ Đã hủy thuật toán")
+        self.update_status("Đã hủy")
+    
+    def draw_convergence_chart(self):
+        """Vẽ biểu đồ best/mean fitness theo iteration từ progress_history"""
+        canvas = self.chart_canvas
+        canvas.delete("all")
+        width = canvas.winfo_width() if canvas.winfo_width() > 1 else int(canvas['width'])
+        height = int(canvas['height'])
+        pad = 6
+        canvas.create_rectangle(pad, pad, width - pad, height - pad, outline=PRIMARY_COLOR)
+        if not self.progress_history:
+            canvas.create_text(width // 2, height // 2, text="Chưa có dữ liệu",
+                               fill=TEXT_COLOR, font=(FONT_FAMILY, 9))
+            return
         
-        except Exception as e:
-            # Xử lý lỗi chung khi chạy thuật toán
-            self.update_results(f"❌ Lỗi xảy ra trong quá trình chạy thuật toán: {str(e)}")
-            self.update_status("✗ Lỗi chạy thuật toán")
-
-        finally:
-            self.root.after(0, lambda: self.run_button.config(state=tk.NORMAL))
-            self.root.after(0, lambda: self.compare_button.config(state=tk.NORMAL))
+        last_iteration = max(self.progress_history[-1]['iteration'], 1)
+        
+        def point(iteration, fitness):
+            x = pad + (width - 2 * pad) * iteration / last_iteration
+            y = height - pad - (height - 2 * pad) * max(0.0, min(fitness, 100.0)) / 100.0
+            return x, y
+        
+        for key, color in (('mean_fitness', ACCENT_COLOR), ('best_fitness', PRIMARY_COLOR)):
+            coords = []
+            for metrics in self.progress_history:
+                coords.extend(point(metrics['iteration'], metrics[key]))
+            if len(coords) >= 4:
+                canvas.create_line(*coords, fill=color, width=2)
+        
+        best = self.progress_history[-1]['best_fitness']
+        canvas.create_text(width - pad - 4, pad + 4, anchor=tk.NE, fill=PRIMARY_COLOR,
+                           font=(FONT_FAMILY, 9, 'bold'), text=f"{best:.2f}")
     
     def _process_result(self, schedule, elapsed, algo_name):
         """Xử lý kết quả thuật toán"""
@@ -614,7 +859,7 @@ class ScheduleGUI:
             self.update_results(result_text.strip())
             self.update_status(f"✓ {algo_name} hoàn thành - Fitness: {fitness:.2f}")
             
-            # Hiển thị lịch (gọi từ main thread)
+            # Hiển thị lịch
             self.root.after(0, self.display_schedule)
         else:
             self.current_schedule = None # Đảm bảo lịch cũ bị xóa nếu không tìm thấy
@@ -622,72 +867,56 @@ class ScheduleGUI:
             self.update_status(f"✗ {algo_name} thất bại")
     
     def compare_algorithms(self):
-        """So sánh 2 thuật toán"""
+        """So sánh 2 thuật toán (chạy lần lượt trong process riêng)"""
         if not self.courses:
             messagebox.showwarning("Cảnh báo", "Chưa có dữ liệu!")
             return
+        soft_weights = self._read_soft_weights()
+        if soft_weights is None:
+            return
         
-        self.run_button.config(state=tk.DISABLED)
-        self.compare_button.config(state=tk.DISABLED)
-        
-        thread = threading.Thread(target=self._compare_thread)
-        thread.daemon = True
-        thread.start()
-    
-    def _compare_thread(self):
-        """Thread so sánh thuật toán"""
         self.update_status("Đang so sánh thuật toán...")
         self.update_results("⚖️ BẮT ĐẦU SO SÁNH\n" + "="*40 + "\n")
-        
         results = {}
-        total = len(self.courses)
         
         # --- 1. Backtracking ---
-        try:
-            self.update_results("\n[1/2] Chạy Backtracking...\n")
-            solver_bt = BacktrackingSolver(self.courses, self.rooms, self.teachers, self.timeslots)
-            start_bt = time.time()
-            bt_schedule = solver_bt.solve(verbose=False)
-            bt_time = time.time() - start_bt
+        self.update_results("\n[1/2] Chạy Backtracking...\n")
+        
+        def on_backtracking_done(schedule, elapsed):
+            self._record_compare_result(results, 'bt', "Backtracking", schedule, elapsed)
             
-            if bt_schedule and len(bt_schedule.assignments) > 0:
-                results['bt'] = {
-                    'schedule': bt_schedule,
-                    'time': bt_time,
-                    'fitness': self.evaluator.evaluate(bt_schedule),
-                    'valid': self.constraint_checker.is_valid_schedule(bt_schedule),
-                    'assigned': len(bt_schedule.assignments)
-                }
-                self.update_results(f"Backtracking: Hoàn thành trong {bt_time:.2f}s, Fitness: {results['bt']['fitness']:.2f}\n")
-            else:
-                self.update_results("Backtracking: Không tìm được lịch.\n")
-        except Exception as e:
-            self.update_results(f"Lỗi Backtracking: {str(e)}\n")
-
-        # --- 2. GWO ---
-        try:
+            # --- 2. GWO ---
             population = 20
             iterations = 100
             self.update_results(f"\n[2/2] Chạy GWO (Pop={population}, Iter={iterations})...\n")
-            solver_gwo = GWOSolver(self.courses, self.rooms, self.teachers, self.timeslots)
-            start_gwo = time.time()
-            # Giả định tham số GWO là cố định 20, 100 cho so sánh
-            gwo_schedule = solver_gwo.solve(population_size=population, max_iterations=iterations, verbose=False) 
-            gwo_time = time.time() - start_gwo
             
-            if gwo_schedule and len(gwo_schedule.assignments) > 0:
-                results['gwo'] = {
-                    'schedule': gwo_schedule,
-                    'time': gwo_time,
-                    'fitness': self.evaluator.evaluate(gwo_schedule),
-                    'valid': self.constraint_checker.is_valid_schedule(gwo_schedule),
-                    'assigned': len(gwo_schedule.assignments)
-                }
-                self.update_results(f"GWO: Hoàn thành trong {gwo_time:.2f}s, Fitness: {results['gwo']['fitness']:.2f}\n")
-            else:
-                 self.update_results("GWO: Không tìm được lịch.\n")
-        except Exception as e:
-             self.update_results(f"Lỗi GWO: {str(e)}\n")
+            def on_gwo_done(schedule, elapsed):
+                self._record_compare_result(results, 'gwo', "GWO", schedule, elapsed)
+                self._show_comparison(results)
+            
+            # Giả định tham số GWO là cố định 20, 100 cho so sánh
+            self._start_solver("gwo", {"population_size": population, "max_iterations": iterations},
+                               on_gwo_done, soft_weights=soft_weights)
+        
+        self._start_solver("backtracking", {}, on_backtracking_done, soft_weights=soft_weights)
+    
+    def _record_compare_result(self, results, key, label, schedule, elapsed):
+        """Đánh giá và lưu kết quả một thuật toán trong lần so sánh"""
+        if schedule and len(schedule.assignments) > 0:
+            results[key] = {
+                'schedule': schedule,
+                'time': elapsed,
+                'fitness': self.evaluator.evaluate(schedule),
+                'valid': self.constraint_checker.is_valid_schedule(schedule),
+                'assigned': len(schedule.assignments)
+            }
+            self.update_results(f"{label}: Hoàn thành trong {elapsed:.2f}s, Fitness: {results[key]['fitness']:.2f}\n")
+        else:
+            self.update_results(f"{label}: Không tìm được lịch.\n")
+    
+    def _show_comparison(self, results):
+        """Hiển thị bảng so sánh và lịch tốt nhất"""
+        total = len(self.courses)
         
         # --- 3. Hiển thị so sánh ---
         compare_text = f"\n{'='*40}\nKẾT QUẢ SO SÁNH\n{'='*40}\n"
@@ -733,11 +962,10 @@ class ScheduleGUI:
         else:
              self.root.after(0, self.clear_schedule_display)
 
-        self.root.after(0, lambda: self.run_button.config(state=tk.NORMAL))
-        self.root.after(0, lambda: self.compare_button.config(state=tk.NORMAL))
-
     def clear_schedule_display(self):
         """Xóa hiển thị lịch trên overview và teacher tabs."""
+        self._cancel_render()
+        self._overview_indices = []
         for item in self.overview_tree.get_children():
             self.overview_tree.delete(item)
         for item in self.teacher_tree.get_children():
@@ -751,6 +979,7 @@ class ScheduleGUI:
             self.overview_tree.delete(item)
         
         if not self.current_schedule or not self.current_schedule.assignments:
+            self.view_model = None
             self.clear_schedule_display()
             return
         
@@ -759,58 +988,95 @@ class ScheduleGUI:
             self.overview_tree.insert('', tk.END, values=('Lỗi: Không tìm thấy trình in (printer).', '', '', '', ''))
             return
 
-        # 1. LẤY DỮ LIỆU TỪ SchedulePrinter
-        schedule_data = self.printer.get_schedule_data_for_gui(self.current_schedule)
+        # 1. DỰNG VIEW MODEL MỘT LẦN CHO KẾT QUẢ NÀY (dòng, chỉ mục, chỉ mục tìm kiếm)
+        self.view_model = ScheduleViewModel(self.current_schedule, self.printer)
+        self._sort_state = (None, False)
         
-        # 2. Thêm vào tree
-        for idx, item in enumerate(schedule_data):
-            tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
-            # Đảm bảo thứ tự keys/values khớp với columns đã định nghĩa trong setup_overview_tab:
-            # ('Môn Học', 'Giáo Viên', 'Phòng', 'Thời Gian', 'Lớp')
-            self.overview_tree.insert('', tk.END, values=(
-                item['Môn Học'],
-                item['Giáo Viên'],
-                item['Phòng'],
-                item['Thời Gian'],
-                item['Lớp']
-            ), tags=(tag,))
+        # 2. Thêm vào tree (áp dụng từ khóa tìm kiếm hiện tại nếu có)
+        self._apply_filter()
         
         # Cập nhật lịch giáo viên nếu có giáo viên đang được chọn
         if self.teacher_combo.get():
              self.on_teacher_select(None)
 
-    def filter_overview(self, *args):
-        """Lọc lịch theo từ khóa tìm kiếm (Tên môn, GV, Phòng, Thời gian)"""
-        search_text = self.search_var.get().lower()
+    def _fill_overview(self, indices):
+        """
+        Đổ các dòng (chỉ số trong view model) vào overview_tree theo từng lô
+        
+        Mỗi lô RENDER_BATCH_SIZE dòng được chèn trong một lần after(), nên
+        giao diện vẫn phản hồi khi hiển thị lịch hàng chục nghìn dòng.
+        Lần đổ mới sẽ hủy lần đổ cũ còn dở. iid của mỗi item là chỉ số dòng
+        để sort_overview sắp lại các item có sẵn.
+        """
+        self._cancel_render()
+        self.overview_tree.delete(*self.overview_tree.get_children())
+        self._overview_indices = indices
+        self._render_batch(indices, 0)
 
-        # Xóa hiển thị cũ
-        for item in self.overview_tree.get_children():
-            self.overview_tree.delete(item)
+    def _render_batch(self, indices, start):
+        """Chèn một lô dòng rồi hẹn lô tiếp theo"""
+        end = min(start + RENDER_BATCH_SIZE, len(indices))
+        rows = self.view_model.rows
+        for position in range(start, end):
+            tag = 'evenrow' if position % 2 == 0 else 'oddrow'
+            # Thứ tự values khớp với columns: ('Môn Học', 'Giáo Viên', 'Phòng', 'Thời Gian', 'Lớp')
+            self.overview_tree.insert('', tk.END, iid=str(indices[position]),
+                                      values=rows[indices[position]], tags=(tag,))
+        
+        if end < len(indices):
+            self._render_job = self.root.after(1, self._render_batch, indices, end)
+            self.status_bar.config(text=f"Đang hiển thị {end}/{len(indices)} dòng...")
+        else:
+            self._render_job = None
+            if len(indices) > RENDER_BATCH_SIZE:
+                self.status_bar.config(text=f"✓ Đã hiển thị {len(indices)} dòng")
 
-        if not self.current_schedule or not self.current_schedule.assignments or not self.printer:
-            return
+    def _cancel_render(self):
+        """Hủy lô dòng đang chờ chèn (nếu có)"""
+        if self._render_job is not None:
+            self.root.after_cancel(self._render_job)
+            self._render_job = None
 
-        # Lấy toàn bộ dữ liệu đã được sắp xếp và định dạng từ printer
-        all_schedule_data = self.printer.get_schedule_data_for_gui(self.current_schedule)
+    def sort_overview(self, column):
+        """
+        Sắp xếp bảng tổng quan theo cột (nhấn lần nữa để đảo chiều)
         
-        filtered_data = []
-        for item in all_schedule_data:
-            # Tạo chuỗi tìm kiếm từ các cột hiển thị
-            searchable = f"{item['Môn Học']} {item['Giáo Viên']} {item['Phòng']} {item['Thời Gian']} {item['Lớp']} {item['Thứ']}".lower()
-            
-            if not search_text or search_text in searchable:
-                filtered_data.append(item)
+        Các item đã có trong overview_tree được đổi chỗ bằng move() thay vì
+        xóa và chèn lại. Nếu đang đổ dở theo lô thì đổ lại theo thứ tự mới.
+        """
+        if self.view_model is None:
+            return
+        current, descending = self._sort_state
+        descending = not descending if current == column else False
+        self._sort_state = (column, descending)
+        self.view_model.sort_by(column, descending)
+        
+        indices = self.view_model.in_order(self._overview_indices)
+        if self._render_job is not None:
+            self._fill_overview(indices)
+            return
+        self._overview_indices = indices
+        for position, row_index in enumerate(indices):
+            iid = str(row_index)
+            self.overview_tree.move(iid, '', position)
+            self.overview_tree.item(iid, tags=('evenrow' if position % 2 == 0 else 'oddrow',))
 
-        # Hiển thị dữ liệu đã lọc
-        for idx, item in enumerate(filtered_data):
-            tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
-            self.overview_tree.insert('', tk.END, values=(
-                item['Môn Học'],
-                item['Giáo Viên'],
-                item['Phòng'],
-                item['Thời Gian'],
-                item['Lớp']
-            ), tags=(tag,))
+    def filter_overview(self, *args):
+        """Lọc lịch theo từ khóa tìm kiếm (debounce: chỉ lọc khi ngừng gõ)"""
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(SEARCH_DEBOUNCE_MS, self._apply_filter)
+
+    def _apply_filter(self):
+        """Lọc lịch theo từ khóa tìm kiếm (Tên môn, GV, Phòng, Thời gian) qua chỉ mục đảo"""
+        self._filter_job = None
+        
+        if self.view_model is None:
+            for item in self.overview_tree.get_children():
+                self.overview_tree.delete(item)
+            return
+        
+        self._fill_overview(self.view_model.search(self.search_var.get()))
     
     def on_teacher_select(self, event):
         """Xử lý khi chọn giáo viên (Lịch theo giáo viên)"""
@@ -820,32 +1086,15 @@ class ScheduleGUI:
         for item in self.teacher_tree.get_children():
             self.teacher_tree.delete(item)
 
-        if not selection or not self.current_schedule or not self.current_schedule.assignments:
+        if not selection or self.view_model is None:
             self.teacher_tree.insert('', tk.END, values=('', '', 'Chưa có lịch tổng thể được tạo.', '', ''))
             return
         
         # Lấy teacher_id từ selection (ví dụ: "GV01 - Nguyễn Văn A" -> "GV01")
         teacher_id = selection.split(' - ')[0]
         
-        # Lọc lịch theo giáo viên
-        teacher_schedule = []
-        for assignment in self.current_schedule.assignments:
-            if assignment.teacher_id == teacher_id:
-                course = self.courses.get(assignment.course_id)
-                room = self.rooms.get(assignment.room_id)
-                timeslot = self.timeslots.get(assignment.timeslot_id)
-                
-                if not all([course, room, timeslot]): continue
-                
-                teacher_schedule.append({
-                    'day': timeslot.day,
-                    'day_num': SchedulePrinter._get_day_number(timeslot.day), # Sửa: dùng static method để sắp xếp
-                    'period': timeslot.period,
-                    'period_str': f"Tiết {timeslot.period} ({timeslot.session})",
-                    'course': course.name,
-                    'room': room.name,
-                    'time': timeslot.time # Sửa: dùng timeslot.time
-                })
+        # Lấy các dòng đã dựng sẵn và sắp xếp theo thứ, tiết trong view model
+        teacher_schedule = self.view_model.teacher_rows.get(teacher_id, [])
         
         if not teacher_schedule:
             self.teacher_tree.insert('', tk.END, values=(
@@ -853,24 +1102,16 @@ class ScheduleGUI:
             ))
             return
         
-        # Sắp xếp theo thứ và tiết (dùng day_num để sắp xếp đúng)
-        teacher_schedule.sort(key=lambda x: (x['day_num'], x['period']))
-        
         # Thêm vào tree
-        for idx, item in enumerate(teacher_schedule):
+        for idx, values in enumerate(teacher_schedule):
             tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
-            self.teacher_tree.insert('', tk.END, values=(
-                item['day'],
-                item['period_str'],
-                item['course'],
-                item['room'],
-                item['time']
-            ), tags=(tag,))
+            self.teacher_tree.insert('', tk.END, values=values, tags=(tag,))
     
     def clear_results(self):
         """Xóa kết quả"""
         # Xóa lịch hiện tại
         self.current_schedule = None
+        self.view_model = None
         
         # Xóa overview
         self.clear_schedule_display()
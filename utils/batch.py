@@ -0,0 +1,271 @@
+"""
+Chạy nhiều bài toán xếp lịch không cần tương tác (batch)
+
+Mỗi job là một (thư mục dữ liệu, solver, tham số, seed, giới hạn thời gian).
+Các job được giải song song bằng ProcessPoolExecutor và mỗi kết quả là một
+dictionary JSON được (ví dụ để ghi thành JSON Lines cho các script khác).
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+SOLVERS = ("backtracking", "gwo", "lns")
+
+
+def schedule_to_json(schedule) -> List[Dict[str, str]]:
+    """Chuyển lịch thành danh sách assignment dạng JSON"""
+    return [{"course_id": a.course_id, "room_id": a.room_id,
+             "teacher_id": a.teacher_id, "timeslot_id": a.timeslot_id}
+            for a in schedule.assignments]
+
+
+def schedule_from_json(items: List[Dict[str, str]]):
+    """Tạo lịch từ danh sách assignment dạng JSON (ngược với schedule_to_json)"""
+    from core.model import Schedule, Assignment
+    return Schedule([Assignment(item["course_id"], item["room_id"], item["teacher_id"],
+                                item["timeslot_id"]) for item in items])
+
+
+def load_schedule_file(path: str):
+    """Đọc lịch từ file JSON do schedule_to_json tạo ra"""
+    with open(path, encoding="utf-8") as f:
+        return schedule_from_json(json.load(f))
+
+
+def solve_problem(teachers, rooms, courses, timeslots, solver_name: str,
+                  params: Optional[Dict[str, Any]] = None, seed: Optional[int] = None,
+                  time_limit: Optional[float] = None,
+                  progress_callback: Optional[Callable[[Dict], None]] = None,
+                  diagnose: bool = False, polish: bool = False,
+                  decompose: bool = False,
+                  soft_weights: Optional[Dict[str, float]] = None) -> Tuple[Dict[str, Any], Any]:
+    """
+    Giải một bài toán đã tải và đánh giá kết quả
+
+    Args:
+        solver_name: "backtracking", "gwo" hoặc "lns"
+        params: Tham số truyền cho solver.solve
+        seed: Seed ngẫu nhiên
+        time_limit: Giới hạn thời gian (giây)
+        progress_callback: Hàm nhận số liệu mỗi vòng lặp (GWO và LNS)
+        diagnose: Khi Backtracking không tìm được lịch (vô nghiệm hoặc hết giờ), tìm
+                  tập môn xung đột tối thiểu (ConflictExplainer) và ghi vào "conflict"
+        polish: Đánh bóng lịch tìm được bằng LocalSearchPolisher (giới hạn thời gian
+                như solver); fitness trước khi đánh bóng ghi vào "fitness_before_polish"
+        decompose: Giải từng thành phần độc lập bằng ProblemDecomposer rồi ghép lại
+                   (các thành phần giải tuần tự vì các job đã chạy song song)
+        soft_weights: Trọng số ràng buộc mềm theo tên kernel (xem ScheduleEvaluator),
+                      dùng cho fitness của GWO/LNS, đánh bóng và "fitness"
+
+    Returns:
+        (dictionary số liệu, lịch hoặc None). "status" là "ok", "incomplete",
+        "infeasible" hoặc "timeout"; "timeslot_lower_bound" và "dsatur_colors" là
+        cận dưới (clique) và số màu DSatur của đồ thị xung đột (số timeslot cần)
+    """
+    from core.backtracking import BacktrackingSolver
+    from core.coloring import DSaturColoring
+    from core.gwo import GWOSolver
+    from core.lns import LNSSolver
+    from core.evaluator import ScheduleEvaluator
+    from core.constraint import ConstraintChecker
+
+    evaluator = ScheduleEvaluator(courses, rooms, teachers, timeslots, weights=soft_weights)
+    if seed is not None:
+        random.seed(seed)
+
+    start_time = time.time()
+    if decompose:
+        from core.decomposition import ProblemDecomposer
+        solver = ProblemDecomposer(courses, rooms, teachers, timeslots, soft_weights)
+        schedule = solver.solve(solver_name, max_workers=1, time_limit=time_limit, **(params or {}))
+    elif solver_name == "gwo":
+        solver = GWOSolver(courses, rooms, teachers, timeslots, evaluator)
+        # Job đã chạy song song theo process: dựng đàn tuần tự để không chạy quá số CPU
+        params = dict(params or {}, init_workers=1)
+        schedule = solver.solve(verbose=False, time_limit=time_limit,
+                                progress_callback=progress_callback, **params)
+    elif solver_name == "lns":
+        solver = LNSSolver(courses, rooms, teachers, timeslots, evaluator)
+        schedule = solver.solve(verbose=False, time_limit=time_limit,
+                                progress_callback=progress_callback, **(params or {}))
+    else:
+        solver = BacktrackingSolver(courses, rooms, teachers, timeslots)
+        schedule = solver.solve(verbose=False, time_limit=time_limit, **(params or {}))
+    elapsed = time.time() - start_time
+
+    coloring = DSaturColoring(courses, teachers, timeslots)
+    result: Dict[str, Any] = {
+        "elapsed": round(elapsed, 4),
+        "total": len(courses),
+        "timed_out": solver.timed_out,
+        "timeslot_lower_bound": coloring.lower_bound(),
+        "dsatur_colors": coloring.num_colors(),
+    }
+    if not schedule:
+        result["status"] = "timeout" if solver.timed_out else "infeasible"
+        result["assigned"] = 0
+        report = getattr(solver, "presolve_report", None)
+        if report is not None and not report.feasible:
+            result["reasons"] = report.issues
+        if diagnose and solver_name == "backtracking":
+            from core.diagnosis import ConflictExplainer
+            explainer = ConflictExplainer(courses, rooms, teachers, timeslots)
+            conflict = explainer.explain(known_infeasible=not solver.timed_out)
+            if conflict is not None:
+                result["status"] = "infeasible"  # Tập xung đột là chứng minh vô nghiệm
+                result["conflict"] = dataclasses.asdict(conflict)
+        return result, None
+
+    checker = ConstraintChecker(courses, rooms, teachers, timeslots)
+    if polish:
+        from core.local_search import LocalSearchPolisher
+        result["fitness_before_polish"] = evaluator.evaluate(schedule)
+        start_time = time.time()
+        polisher = LocalSearchPolisher(courses, rooms, teachers, timeslots, evaluator)
+        schedule = polisher.polish(schedule, time_limit=time_limit, seed=seed)
+        result["polish_elapsed"] = round(time.time() - start_time, 4)
+    valid = checker.is_valid_schedule(schedule)
+    result["fitness"] = evaluator.evaluate(schedule)
+    result["valid"] = valid
+    result["assigned"] = len(schedule.assignments)
+    result["status"] = "ok" if valid else "incomplete"
+    return result, schedule
+
+
+def solve_instance(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Giải một job (hàm cấp module để chạy được trong process khác)
+
+    Args:
+        job: {"data_dir", "solver", "params", "seed", "time_limit",
+              "schedule_path" (tùy chọn: nơi ghi lịch JSON),
+              "warm_start" (tùy chọn: các file lịch JSON để khởi tạo ấm GWO,
+                            LNS dùng file đầu tiên làm lịch ban đầu),
+              "diagnose" (tùy chọn: tìm tập môn xung đột khi vô nghiệm),
+              "polish" (tùy chọn: đánh bóng lịch bằng tìm kiếm cục bộ),
+              "decompose" (tùy chọn: giải từng thành phần độc lập rồi ghép lại),
+              "soft_weights" (tùy chọn: trọng số ràng buộc mềm)}
+
+    Returns:
+        Dictionary kết quả với "status" là "ok", "incomplete", "infeasible",
+        "timeout" hoặc "error"
+    """
+    from utils.loader import load_all_data
+
+    result: Dict[str, Any] = {
+        "instance": job["data_dir"],
+        "solver": job["solver"],
+        "params": job.get("params", {}),
+        "seed": job.get("seed"),
+        "time_limit": job.get("time_limit"),
+    }
+    if job.get("soft_weights"):
+        result["soft_weights"] = job["soft_weights"]
+    try:
+        teachers, rooms, courses, timeslots = load_all_data(job["data_dir"])
+        params = dict(job.get("params") or {})
+        if job.get("warm_start"):
+            seeds = [load_schedule_file(path) for path in job["warm_start"]]
+            if job["solver"] == "lns":
+                params["initial"] = seeds[0]
+            else:
+                params["seed_schedules"] = seeds
+        metrics, schedule = solve_problem(teachers, rooms, courses, timeslots, job["solver"],
+                                          params, job.get("seed"), job.get("time_limit"),
+                                          diagnose=job.get("diagnose", False),
+                                          polish=job.get("polish", False),
+                                          decompose=job.get("decompose", False),
+                                          soft_weights=job.get("soft_weights"))
+        result.update(metrics)
+
+        if schedule and job.get("schedule_path"):
+            directory = os.path.dirname(job["schedule_path"])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(job["schedule_path"], "w", encoding="utf-8") as f:
+                json.dump(schedule_to_json(schedule), f, ensure_ascii=False, indent=2)
+            result["schedule_path"] = job["schedule_path"]
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def build_jobs(data_dirs: List[str], solver: str, params: Optional[Dict[str, Any]] = None,
+               seeds: Optional[List[Optional[int]]] = None, time_limit: Optional[float] = None,
+               schedule_dir: Optional[str] = None,
+               warm_start: Optional[List[str]] = None,
+               diagnose: bool = False, polish: bool = False,
+               decompose: bool = False,
+               soft_weights: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    """
+    Tạo danh sách job: mỗi thư mục dữ liệu × mỗi seed
+
+    Args:
+        schedule_dir: Nếu có, lịch của mỗi job được ghi vào
+                      <schedule_dir>/<tên thư mục>_<solver>_seed<seed>.json. Các thư mục
+                      trùng tên (a/fac1, b/fac1) được thêm 8 ký tự hash của đường dẫn
+                      đầy đủ: <tên thư mục>-<hash>_<solver>_seed<seed>.json (thư mục
+                      lặp lại thêm số thứ tự: <tên thư mục>-<hash>-2_...)
+        warm_start: Các file lịch JSON để khởi tạo ấm (GWO và LNS)
+        diagnose: Tìm tập môn xung đột khi bài toán vô nghiệm (chỉ Backtracking)
+        polish: Đánh bóng lịch của mỗi job bằng tìm kiếm cục bộ
+        decompose: Phân rã bài toán thành các thành phần độc lập (ProblemDecomposer)
+        soft_weights: Trọng số ràng buộc mềm theo tên kernel (xem ScheduleEvaluator)
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Solver không hợp lệ: {solver} (chọn một trong {SOLVERS})")
+    names = [os.path.basename(os.path.normpath(data_dir)) or "data" for data_dir in data_dirs]
+    seen_paths: Dict[str, int] = {}
+    jobs = []
+    for data_dir, name in zip(data_dirs, names):
+        if names.count(name) > 1:
+            path = os.path.abspath(data_dir)
+            name = f"{name}-{hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}"
+            # Cùng một thư mục được truyền nhiều lần: đánh số các lần sau
+            seen_paths[path] = seen_paths.get(path, 0) + 1
+            if seen_paths[path] > 1:
+                name = f"{name}-{seen_paths[path]}"
+        for seed in seeds or [None]:
+            job = {"data_dir": data_dir, "solver": solver, "params": dict(params or {}),
+                   "seed": seed, "time_limit": time_limit}
+            if warm_start and solver in ("gwo", "lns"):
+                job["warm_start"] = list(warm_start)
+            if diagnose and solver == "backtracking":
+                job["diagnose"] = True
+            if polish:
+                job["polish"] = True
+            if decompose:
+                job["decompose"] = True
+            if soft_weights:
+                job["soft_weights"] = dict(soft_weights)
+            if schedule_dir:
+                suffix = f"_seed{seed}" if seed is not None else ""
+                job["schedule_path"] = os.path.join(schedule_dir, f"{name}_{solver}{suffix}.json")
+            jobs.append(job)
+    return jobs
+
+
+def run_batch(jobs: List[Dict[str, Any]], max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Giải các job song song
+
+    Yields:
+        Kết quả theo thứ tự hoàn thành (mỗi kết quả có "job" là chỉ số trong jobs)
+    """
+    if max_workers == 1 or len(jobs) <= 1:
+        for index, job in enumerate(jobs):
+            yield dict(solve_instance(job), job=index)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(solve_instance, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            yield dict(future.result(), job=futures[future])
@@ -11,13 +11,20 @@ def load_teachers(data_dir: str = "data") -> Dict[str, Teacher]:
     file_path = os.path.join(data_dir, "teachers.json")
     with open(file_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    
+    return parse_teachers(data)
+
+
+def parse_teachers(data: List[dict]) -> Dict[str, Teacher]:
+    """Tạo danh sách giáo viên từ dữ liệu JSON đã đọc"""
     teachers = {}
     for item in data:
         teacher = Teacher(
             id=item["id"],
             name=item["name"],
-            courses=item["courses"]
+            courses=item["courses"],
+            available=item.get("available"),  # Lịch rảnh (optional)
+            unavailable=item.get("unavailable", []),
+            preferred=item.get("preferred", [])
         )
         teachers[teacher.id] = teacher
     
@@ -29,7 +36,11 @@ def load_rooms(data_dir: str = "data") -> Dict[str, Room]:
     file_path = os.path.join(data_dir, "rooms.json")
     with open(file_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    
+    return parse_rooms(data)
+
+
+def parse_rooms(data: List[dict]) -> Dict[str, Room]:
+    """Tạo danh sách phòng học từ dữ liệu JSON đã đọc"""
     rooms = {}
     for item in data:
         room = Room(
@@ -48,14 +59,19 @@ def load_courses(data_dir: str = "data") -> Dict[str, Course]:
     file_path = os.path.join(data_dir, "courses.json")
     with open(file_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    
+    return parse_courses(data)
+
+
+def parse_courses(data: List[dict]) -> Dict[str, Course]:
+    """Tạo danh sách môn học từ dữ liệu JSON đã đọc"""
     courses = {}
     for item in data:
         course = Course(
             id=item["id"],
             name=item["name"],
             student_class=item["student_class"],
-            required_location=item["required_location"]
+            required_location=item["required_location"],
+            class_size=item.get("class_size", 0)  # Lấy sĩ số nếu có
         )
         courses[course.id] = course
     
@@ -67,7 +83,11 @@ def load_timeslots(data_dir: str = "data") -> Dict[str, Timeslot]:
     file_path = os.path.join(data_dir, "timeslots.json")
     with open(file_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    
+    return parse_timeslots(data)
+
+
+def parse_timeslots(data: List[dict]) -> Dict[str, Timeslot]:
+    """Tạo danh sách khung giờ từ dữ liệu JSON đã đọc"""
     timeslots = {}
     for item in data:
         timeslot = Timeslot(
@@ -82,12 +102,53 @@ def load_timeslots(data_dir: str = "data") -> Dict[str, Timeslot]:
     return timeslots
 
 
+def apply_availability_masks(teachers: Dict[str, Teacher], timeslots: Dict[str, Timeslot]):
+    """
+    Tính bitmask lịch rảnh/ưu tiên của giáo viên theo thứ tự timeslot
+    
+    Bit i ứng với timeslot thứ i trong dictionary timeslots.
+    """
+    slot_bits = {timeslot_id: bit for bit, timeslot_id in enumerate(timeslots)}
+    all_slots = (1 << len(slot_bits)) - 1
+    
+    def to_mask(timeslot_ids: List[str]) -> int:
+        mask = 0
+        for timeslot_id in timeslot_ids:
+            if timeslot_id not in slot_bits:
+                raise ValueError(f"Timeslot không tồn tại: {timeslot_id}")
+            mask |= 1 << slot_bits[timeslot_id]
+        return mask
+    
+    for teacher in teachers.values():
+        mask = to_mask(teacher.available) if teacher.available is not None else all_slots
+        mask &= ~to_mask(teacher.unavailable)
+        teacher.availability_mask = -1 if mask == all_slots else mask
+        teacher.preference_mask = to_mask(teacher.preferred)
+
+
 def load_all_data(data_dir: str = "data"):
     """Tải tất cả dữ liệu"""
     teachers = load_teachers(data_dir)
     rooms = load_rooms(data_dir)
     courses = load_courses(data_dir)
     timeslots = load_timeslots(data_dir)
+    apply_availability_masks(teachers, timeslots)
     
     return teachers, rooms, courses, timeslots
 
+
+def parse_problem(data: dict):
+    """
+    Tạo dữ liệu bài toán từ một object JSON có các khóa "teachers", "rooms",
+    "courses", "timeslots" (cùng định dạng với các file trong data/)
+    """
+    missing = [key for key in ("teachers", "rooms", "courses", "timeslots") if key not in data]
+    if missing:
+        raise ValueError(f"Thiếu dữ liệu: {', '.join(missing)}")
+    teachers = parse_teachers(data["teachers"])
+    rooms = parse_rooms(data["rooms"])
+    courses = parse_courses(data["courses"])
+    timeslots = parse_timeslots(data["timeslots"])
+    apply_availability_masks(teachers, timeslots)
+    
+    return teachers, rooms, courses, timeslots
@@ -1,11 +1,25 @@
 """
-Module in lịch học ra màn hình
+Module in lịch học ra màn hình và xuất ra file (CSV, JSON Lines, iCalendar)
 """
 
-from typing import Dict, List
+import csv
+import datetime
+import json
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
 from core.model import Schedule, Assignment, Course, Room, Teacher, Timeslot
 
 
+DAY_ORDER = {"Thứ 2": 0, "Thứ 3": 1, "Thứ 4": 2, "Thứ 5": 3, "Thứ 6": 4, "Thứ 7": 5, "Chủ nhật": 6}
+
+EXPORT_BUFFER_SIZE = 1 << 16  # Bộ đệm ghi file khi xuất lịch
+EXPORT_FIELDS = ["group", "group_name", "day", "session", "period", "time",
+                 "course_id", "course", "student_class", "teacher_id", "teacher",
+                 "room_id", "room", "timeslot_id"]
+GROUP_BY_OPTIONS = ("teacher", "class", "room")
+
+
 class SchedulePrinter:
     """Lớp in lịch học"""
 
@@ -15,6 +29,11 @@ class SchedulePrinter:
         self.rooms = rooms
         self.teachers = teachers
         self.timeslots = timeslots
+        # Khóa sắp xếp tính sẵn một lần cho mỗi timeslot
+        self.timeslot_order: Dict[str, int] = {
+            timeslot_id: self._compute_timeslot_order(timeslot)
+            for timeslot_id, timeslot in timeslots.items()
+        }
 
     def print_schedule(self, schedule: Schedule, title: str = "LỊCH HỌC"):
         """In lịch học ra màn hình"""
@@ -114,20 +133,207 @@ class SchedulePrinter:
 
     def _get_timeslot_order(self, timeslot_id: str) -> int:
         """Lấy thứ tự của timeslot để sắp xếp"""
-        timeslot = self.timeslots.get(timeslot_id)
-        if not timeslot:
-            return 999
-        
-        day_order = {"Thứ 2": 0, "Thứ 3": 1, "Thứ 4": 2, "Thứ 5": 3, "Thứ 6": 4, "Thứ 7": 5}
-        day_index = day_order.get(timeslot.day, 99)
+        return self.timeslot_order.get(timeslot_id, 999)
+
+    @staticmethod
+    def _compute_timeslot_order(timeslot: Timeslot) -> int:
+        day_index = DAY_ORDER.get(timeslot.day, 99)
         # Sắp xếp: sáng trước, chiều sau
         session_order = 0 if timeslot.session == "Sáng" else 1 if timeslot.session == "Chiều" else timeslot.period
         return day_index * 100 + session_order * 10 + timeslot.period
 
     @staticmethod
     def _get_day_number(day: str) -> int:
-        day_order = {"Thứ 2": 0, "Thứ 3": 1, "Thứ 4": 2, "Thứ 5": 3, "Thứ 6": 4, "Thứ 7": 5, "Chủ nhật": 6}
-        return day_order.get(day, 99)
+        return DAY_ORDER.get(day, 99)
+
+    # ------------------------------------------------------------------
+    # Xuất lịch ra file
+    # ------------------------------------------------------------------
+
+    def iter_timetable_rows(self, schedule: Schedule, group_by: str = "teacher") -> Iterator[Dict]:
+        """
+        Duyệt các dòng thời khóa biểu theo nhóm (giáo viên, lớp hoặc phòng)
+
+        Chỉ sắp xếp danh sách assignment (khóa tính sẵn), các dòng được tạo
+        lần lượt khi duyệt nên không dựng toàn bộ dữ liệu xuất trong bộ nhớ.
+
+        Args:
+            schedule: Lịch cần xuất
+            group_by: "teacher", "class" hoặc "room"
+
+        Yields:
+            Dictionary theo EXPORT_FIELDS, nhóm liền nhau và theo thứ tự thời gian
+        """
+        if group_by not in GROUP_BY_OPTIONS:
+            raise ValueError(f"group_by phải là một trong {GROUP_BY_OPTIONS}, nhận được: {group_by}")
+
+        def group_key(assignment: Assignment) -> str:
+            if group_by == "teacher":
+                return assignment.teacher_id
+            if group_by == "room":
+                return assignment.room_id
+            course = self.courses.get(assignment.course_id)
+            return course.student_class if course else ""
+
+        order = self.timeslot_order
+        keyed = sorted(((group_key(a), order.get(a.timeslot_id, 999), a) for a in schedule.assignments),
+                       key=lambda item: (item[0], item[1]))
+
+        for key, _, assignment in keyed:
+            course = self.courses.get(assignment.course_id)
+            teacher = self.teachers.get(assignment.teacher_id)
+            room = self.rooms.get(assignment.room_id)
+            timeslot = self.timeslots.get(assignment.timeslot_id)
+            if not all([course, teacher, room, timeslot]):
+                continue
+
+            group_name = {"teacher": teacher.name, "room": room.name}.get(group_by, key)
+            yield {
+                "group": key,
+                "group_name": group_name,
+                "day": timeslot.day,
+                "session": timeslot.session,
+                "period": timeslot.period,
+                "time": timeslot.time,
+                "course_id": assignment.course_id,
+                "course": course.name,
+                "student_class": course.student_class,
+                "teacher_id": assignment.teacher_id,
+                "teacher": teacher.name,
+                "room_id": assignment.room_id,
+                "room": room.name,
+                "timeslot_id": assignment.timeslot_id,
+            }
+
+    def export_csv(self, schedule: Schedule, path: str, group_by: str = "teacher") -> int:
+        """
+        Xuất thời khóa biểu theo nhóm ra file CSV
+
+        Returns:
+            Số dòng đã ghi
+        """
+        self._ensure_parent_dir(path)
+        count = 0
+        # utf-8-sig để Excel đọc đúng tiếng Việt
+        with open(path, "w", newline="", encoding="utf-8-sig", buffering=EXPORT_BUFFER_SIZE) as f:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            for row in self.iter_timetable_rows(schedule, group_by):
+                writer.writerow(row)
+                count += 1
+        return count
+
+    def export_jsonl(self, schedule: Schedule, path: str, group_by: str = "teacher") -> int:
+        """
+        Xuất thời khóa biểu theo nhóm ra file JSON Lines (mỗi dòng một buổi học)
+
+        Returns:
+            Số dòng đã ghi
+        """
+        self._ensure_parent_dir(path)
+        count = 0
+        with open(path, "w", encoding="utf-8", buffering=EXPORT_BUFFER_SIZE) as f:
+            for row in self.iter_timetable_rows(schedule, group_by):
+                f.write(json.dumps(row, ensure_ascii=False))
+                f.write("\n")
+                count += 1
+        return count
+
+    def export_ics(self, schedule: Schedule, directory: str, group_by: str = "teacher",
+                   week_start: Optional[datetime.date] = None, weeks: int = 15) -> List[str]:
+        """
+        Xuất mỗi nhóm (giáo viên, lớp hoặc phòng) thành một file iCalendar
+
+        Mỗi buổi học là một VEVENT lặp lại hằng tuần (RRULE) với giờ địa phương.
+
+        Args:
+            schedule: Lịch cần xuất
+            directory: Thư mục chứa các file .ics
+            group_by: "teacher", "class" hoặc "room"
+            week_start: Ngày bất kỳ trong tuần học đầu tiên (mặc định: tuần hiện tại)
+            weeks: Số tuần lặp lại
+
+        Returns:
+            Danh sách đường dẫn các file đã ghi
+        """
+        os.makedirs(directory, exist_ok=True)
+        week_start = week_start or datetime.date.today()
+        monday = week_start - datetime.timedelta(days=week_start.weekday())
+        stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+        paths: List[str] = []
+        f = None
+        current_group = None
+        try:
+            for row in self.iter_timetable_rows(schedule, group_by):
+                if row["group"] != current_group:
+                    if f is not None:
+                        f.write("END:VCALENDAR\r\n")
+                        f.close()
+                    current_group = row["group"]
+                    path = os.path.join(directory, f"{group_by}_{self._safe_filename(current_group)}.ics")
+                    paths.append(path)
+                    f = open(path, "w", encoding="utf-8", newline="", buffering=EXPORT_BUFFER_SIZE)
+                    f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//UEH//Xep Lich Mon Hoc//VI\r\n"
+                            "CALSCALE:GREGORIAN\r\n")
+                    f.write(self._ics_line("X-WR-CALNAME", f"Lịch học - {row['group_name']}"))
+
+                times = self._parse_time_range(row["time"])
+                if times is None:
+                    continue
+                date = monday + datetime.timedelta(days=DAY_ORDER.get(row["day"], 0))
+                start = datetime.datetime.combine(date, times[0]).strftime("%Y%m%dT%H%M%S")
+                end = datetime.datetime.combine(date, times[1]).strftime("%Y%m%dT%H%M%S")
+                f.write("BEGIN:VEVENT\r\n")
+                f.write(self._ics_line("UID", f"{row['course_id']}-{row['timeslot_id']}-{group_by}-{row['group']}@xeplich"))
+                f.write(f"DTSTAMP:{stamp}\r\nDTSTART:{start}\r\nDTEND:{end}\r\n")
+                f.write(f"RRULE:FREQ=WEEKLY;COUNT={weeks}\r\n")
+                f.write(self._ics_line("SUMMARY", f"{row['course']} - {row['student_class']}"))
+                f.write(self._ics_line("LOCATION", row["room"]))
+                f.write(self._ics_line("DESCRIPTION", f"Giáo viên: {row['teacher']}"))
+                f.write("END:VEVENT\r\n")
+            if f is not None:
+                f.write("END:VCALENDAR\r\n")
+        finally:
+            if f is not None:
+                f.close()
+        return paths
+
+    @staticmethod
+    def _ics_line(name: str, value: str) -> str:
+        """Một dòng iCalendar đã escape và gập dòng theo 75 octet (RFC 5545)"""
+        value = (value.replace("\\", "\\\\").replace(";", "\\;")
+                 .replace(",", "\\,").replace("\n", "\\n"))
+        line = f"{name}:{value}"
+        parts = []
+        current = ""
+        for ch in line:
+            limit = 75 if not parts else 74  # Dòng gập bắt đầu bằng một dấu cách
+            if len((current + ch).encode("utf-8")) > limit:
+                parts.append(current)
+                current = ""
+            current += ch
+        parts.append(current)
+        return "\r\n ".join(parts) + "\r\n"
+
+    @staticmethod
+    def _parse_time_range(text: str) -> Optional[Tuple[datetime.time, datetime.time]]:
+        """Tách chuỗi "07:00 - 11:30" thành (giờ bắt đầu, giờ kết thúc)"""
+        match = re.match(r"\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})", text or "")
+        if not match:
+            return None
+        h1, m1, h2, m2 = (int(g) for g in match.groups())
+        return datetime.time(h1, m1), datetime.time(h2, m2)
+
+    @staticmethod
+    def _safe_filename(name: str) -> str:
+        return re.sub(r"[^\w.-]+", "_", name).strip("_") or "unknown"
+
+    @staticmethod
+    def _ensure_parent_dir(path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
 
     def print_statistics(self, schedule: Schedule):
         """In thống kê về lịch học"""
@@ -0,0 +1,168 @@
+"""
+Cache kết quả trên đĩa theo nội dung (content-addressed)
+
+Khóa là SHA-256 của dạng JSON chuẩn hóa của bài toán đã tải (môn học, phòng,
+giáo viên, timeslot) cùng tên solver, tham số và seed. Mỗi kết quả là một file
+JSON chứa lịch, số liệu và checksum của phần dữ liệu để phát hiện file hỏng.
+Tổng dung lượng được giới hạn: file ít được dùng gần đây nhất (theo mtime) bị
+xóa trước.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+from core.model import Schedule, Assignment
+
+
+DEFAULT_CACHE_DIR = os.path.join("results", "cache")
+CACHE_FORMAT_VERSION = 1
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+class ResultCache:
+    """Lớp cache kết quả solver trên đĩa"""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            directory: Thư mục chứa các file cache
+            max_bytes: Tổng dung lượng tối đa của cache
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(courses, rooms, teachers, timeslots, solver: str,
+                 params: Optional[Dict[str, Any]] = None, seed: Optional[int] = None) -> str:
+        """
+        Tạo khóa cache từ bài toán và cấu hình solver
+
+        Thứ tự phần tử trong các dictionary được giữ nguyên (thứ tự timeslot quyết
+        định bitmask, thứ tự duyệt quyết định kết quả với cùng seed).
+        """
+        problem = {
+            "courses": [dataclasses.asdict(c) for c in courses.values()],
+            "rooms": [dataclasses.asdict(r) for r in rooms.values()],
+            "teachers": [dataclasses.asdict(t) for t in teachers.values()],
+            "timeslots": [dataclasses.asdict(t) for t in timeslots.values()],
+        }
+        config = {"version": CACHE_FORMAT_VERSION, "solver": solver,
+                  "params": params or {}, "seed": seed}
+        digest = hashlib.sha256()
+        digest.update(_canonical_json(problem).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(_canonical_json(config).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Tuple[Schedule, Dict[str, Any]]]:
+        """
+        Tra cứu kết quả
+
+        Returns:
+            (lịch, số liệu) nếu có và hợp lệ, None nếu không có. File hỏng
+            (checksum sai, JSON lỗi, khóa không khớp) bị xóa và xem như không có.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            payload = entry["payload"]
+            checksum = hashlib.sha256(_canonical_json(payload).encode("utf-8")).hexdigest()
+            if entry.get("key") != key or entry.get("checksum") != checksum:
+                raise ValueError("checksum không khớp")
+            schedule = Schedule([Assignment(**item) for item in payload["assignments"]])
+            metrics = payload["metrics"]
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (ValueError, KeyError, TypeError):
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # Cập nhật mtime để đánh dấu vừa được dùng (LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return schedule, metrics
+
+    def put(self, key: str, schedule: Schedule, metrics: Optional[Dict[str, Any]] = None):
+        """Lưu kết quả (ghi nguyên tử qua file tạm) rồi dọn cache nếu vượt dung lượng"""
+        payload = {
+            "assignments": [{"course_id": a.course_id, "room_id": a.room_id,
+                             "teacher_id": a.teacher_id, "timeslot_id": a.timeslot_id}
+                            for a in schedule.assignments],
+            "metrics": metrics or {},
+        }
+        entry = {"key": key, "payload": payload,
+                 "checksum": hashlib.sha256(_canonical_json(payload).encode("utf-8")).hexdigest()}
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self._evict()
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            self._remove(path)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {"entries": len(entries), "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+    def _entries(self):
+        """Danh sách (đường dẫn, kích thước, mtime) các file cache"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Xóa các file ít được dùng gần đây nhất cho tới khi dưới max_bytes"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            self._remove(path)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,471 @@
+"""
+Dịch vụ HTTP cục bộ để giải bài toán xếp lịch
+
+Nhận bài toán dạng JSON (cùng định dạng với các file trong data/), đưa vào
+hàng đợi có giới hạn và giải bằng một pool process (BacktrackingSolver hoặc
+GWOSolver). Tiến trình của từng job được gửi về qua một multiprocessing.Queue.
+Chỉ dùng thư viện chuẩn (http.server), mặc định chỉ lắng nghe trên 127.0.0.1.
+
+Endpoints:
+    POST   /jobs              Gửi bài toán, trả 202 và id job (503 khi hàng đợi đầy)
+    GET    /jobs              Danh sách job
+    GET    /jobs/<id>         Trạng thái, tiến trình và số liệu của job
+    GET    /jobs/<id>/result  Lịch của job (danh sách assignment)
+    DELETE /jobs/<id>         Hủy job đang chờ trong hàng đợi
+    GET    /health            Tình trạng hàng đợi và pool
+
+Chạy: python -m utils.service --port 8765
+"""
+
+import argparse
+import collections.abc
+import inspect
+import json
+import math
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+
+from core.evaluator import check_soft_weights
+from utils.batch import SOLVERS, schedule_to_json, solve_problem
+from utils.loader import parse_problem
+
+
+MAX_BODY_BYTES = 16 * 1024 * 1024  # Kích thước tối đa của một bài toán gửi lên
+PROGRESS_INTERVAL = 0.2  # Khoảng cách tối thiểu (giây) giữa hai lần gửi tiến trình
+RESERVED_PARAMS = ("verbose", "time_limit", "progress_callback")  # Do dịch vụ tự đặt
+
+_progress_queue = None  # Hàng đợi tiến trình trong process worker
+
+
+def _init_worker(progress_queue):
+    """Khởi tạo process worker: giữ hàng đợi tiến trình dùng chung"""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _solver_parameters(solver: str) -> Tuple[Dict[str, Any], Dict[str, Tuple[str, ...]]]:
+    """
+    Kiểu các tham số của solve() của solver và các tham số chỉ nhận một tập giá trị
+
+    Returns:
+        ({tên tham số: annotation}, {tên tham số: các giá trị hợp lệ})
+    """
+    if solver == "gwo":
+        from core.gwo import GWOSolver as solver_class
+        choices = {"init_method": solver_class.INIT_METHODS,
+                   "search_mode": solver_class.SEARCH_MODES,
+                   "repair": solver_class.REPAIR_MODES}
+    elif solver == "lns":
+        from core.lns import LNSSolver as solver_class
+        choices = {"methods": solver_class.DESTROY_METHODS}
+    else:
+        from core.backtracking import BacktrackingSolver as solver_class
+        choices = {}
+    hints = get_type_hints(solver_class.solve)
+    parameters = {name: hints.get(name, Any)
+                  for name in inspect.signature(solver_class.solve).parameters if name != "self"}
+    return parameters, choices
+
+
+def _matches_type(value: Any, annotation: Any) -> bool:
+    """Giá trị JSON có khớp với annotation của tham số hay không"""
+    if annotation is Any:
+        return True
+    if annotation is type(None):
+        return value is None
+    origin = get_origin(annotation)
+    if origin is Union:
+        return any(_matches_type(value, arg) for arg in get_args(annotation))
+    if origin in (list, tuple, collections.abc.Sequence):
+        args = get_args(annotation)
+        return isinstance(value, list) and (not args or all(_matches_type(item, args[0]) for item in value))
+    if origin is dict:
+        key_type, value_type = get_args(annotation) or (Any, Any)
+        return isinstance(value, dict) and all(_matches_type(k, key_type) and _matches_type(v, value_type)
+                                               for k, v in value.items())
+    if annotation is bool:
+        return isinstance(value, bool)
+    if annotation is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    if annotation is float:
+        return (isinstance(value, (int, float)) and not isinstance(value, bool)
+                and math.isfinite(value))
+    if annotation is str:
+        return isinstance(value, str)
+    # Object (Schedule, Callable, ...): không truyền được qua JSON
+    return False
+
+
+def _validate_params(solver: str, params: Dict[str, Any]) -> Optional[str]:
+    """
+    Kiểm tra params trước khi đưa vào hàng đợi
+
+    Chỉ nhận các tham số có trong chữ ký solve() của solver, không nhận các
+    tham số dịch vụ tự đặt (RESERVED_PARAMS). Giá trị phải khớp với kiểu khai
+    báo (số thực phải hữu hạn; tham số nhận object như seed_schedules, initial
+    không truyền được qua JSON) và thuộc tập giá trị hợp lệ với các tham số
+    dạng lựa chọn (search_mode, repair, init_method, methods).
+
+    Returns:
+        Thông báo lỗi, None nếu hợp lệ
+    """
+    parameters, choices = _solver_parameters(solver)
+    for key, value in params.items():
+        if key in RESERVED_PARAMS:
+            return f"Tham số {key} do dịch vụ tự đặt, không được truyền trong params"
+        if key not in parameters:
+            return f"Tham số không hợp lệ cho {solver}: {key}"
+        if not _matches_type(value, parameters[key]):
+            return f"Giá trị của tham số {key} không đúng kiểu: {value!r}"
+        if key in choices:
+            values = value if isinstance(value, list) else [value]
+            invalid = [item for item in values if item not in choices[key]]
+            if invalid:
+                return f"Giá trị không hợp lệ cho {key}: {invalid[0]!r} (chọn trong {list(choices[key])})"
+    return None
+
+
+def _run_solve_job(job_id: str, problem: Dict[str, Any], solver: str, params: Dict[str, Any],
+                   seed: Optional[int], time_limit: Optional[float],
+                   soft_weights: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Giải một job trong process worker (hàm cấp module để pickle được)"""
+    _progress_queue.put((job_id, "started", None))
+    teachers, rooms, courses, timeslots = parse_problem(problem)
+    last_report = [0.0]
+
+    def report(metrics: Dict) -> None:
+        now = time.time()
+        if now - last_report[0] >= PROGRESS_INTERVAL:
+            last_report[0] = now
+            _progress_queue.put((job_id, "progress", dict(metrics)))
+
+    metrics, schedule = solve_problem(teachers, rooms, courses, timeslots, solver,
+                                      params, seed, time_limit, report, soft_weights=soft_weights)
+    return {"metrics": metrics,
+            "schedule": schedule_to_json(schedule) if schedule else None}
+
+
+@dataclass
+class SolveJob:
+    """Trạng thái của một job trong dịch vụ"""
+    id: str
+    solver: str
+    params: Dict[str, Any]
+    seed: Optional[int]
+    time_limit: float
+    soft_weights: Optional[Dict[str, float]] = None
+    status: str = "queued"  # queued, running, done, failed, cancelled
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Optional[Dict[str, Any]] = None
+    metrics: Optional[Dict[str, Any]] = None
+    schedule: Optional[List[Dict[str, str]]] = None
+    error: Optional[str] = None
+    future: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "solver": self.solver, "params": self.params, "seed": self.seed,
+                "time_limit": self.time_limit, "soft_weights": self.soft_weights,
+                "status": self.status,
+                "created_at": self.created_at, "started_at": self.started_at,
+                "finished_at": self.finished_at, "progress": self.progress,
+                "metrics": self.metrics, "error": self.error}
+
+
+class SolveService:
+    """Lớp quản lý hàng đợi job và pool process giải"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 8,
+                 default_time_limit: float = 30.0, max_time_limit: float = 300.0,
+                 max_finished_jobs: int = 100):
+        """
+        Args:
+            max_workers: Số process giải song song
+            max_pending: Số job tối đa đang chờ hoặc đang chạy (vượt quá thì từ chối)
+            default_time_limit: Giới hạn thời gian mặc định cho mỗi job (giây)
+            max_time_limit: Giới hạn thời gian lớn nhất một request được yêu cầu
+            max_finished_jobs: Số job đã xong được giữ lại để tra cứu
+        """
+        self.max_pending = max_pending
+        self.default_time_limit = default_time_limit
+        self.max_time_limit = max_time_limit
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs: "OrderedDict[str, SolveJob]" = OrderedDict()
+        self.lock = threading.Lock()
+
+        context = multiprocessing.get_context("spawn")
+        self.progress_queue = context.Queue()
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                            initializer=_init_worker,
+                                            initargs=(self.progress_queue,))
+        self.max_workers = max_workers
+        self._listener = threading.Thread(target=self._listen_progress, daemon=True)
+        self._listener.start()
+
+    def submit(self, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Nhận một bài toán và đưa vào hàng đợi
+
+        Args:
+            payload: {"solver", "params", "seed", "time_limit", "soft_weights" ({tên kernel:
+                     trọng số}, xem ScheduleEvaluator), "teachers", "rooms", "courses", "timeslots"}
+
+        Returns:
+            (HTTP status, body): 202 nếu đã nhận, 400 nếu dữ liệu sai, 503 nếu hàng đợi đầy
+        """
+        solver = payload.get("solver", "backtracking")
+        params = payload.get("params") or {}
+        seed = payload.get("seed")
+        if solver not in SOLVERS:
+            return 400, {"error": f"Solver không hợp lệ: {solver} (chọn một trong {list(SOLVERS)})"}
+        if not isinstance(params, dict):
+            return 400, {"error": "params phải là một object"}
+        error = _validate_params(solver, params)
+        if error:
+            return 400, {"error": error}
+        if seed is not None and not isinstance(seed, int):
+            return 400, {"error": "seed phải là số nguyên"}
+        soft_weights = payload.get("soft_weights")
+        if soft_weights is not None:
+            if not isinstance(soft_weights, dict):
+                return 400, {"error": "soft_weights phải là một object {tên ràng buộc mềm: trọng số}"}
+            try:
+                check_soft_weights(soft_weights)
+            except ValueError as e:
+                return 400, {"error": str(e)}
+        try:
+            time_limit = float(payload.get("time_limit", self.default_time_limit))
+        except (TypeError, ValueError):
+            return 400, {"error": "time_limit phải là số"}
+        if not math.isfinite(time_limit):
+            return 400, {"error": "time_limit phải là số hữu hạn"}
+        if time_limit <= 0:
+            return 400, {"error": "time_limit phải lớn hơn 0"}
+        time_limit = min(time_limit, self.max_time_limit)
+
+        problem = {key: payload.get(key) for key in ("teachers", "rooms", "courses", "timeslots")}
+        try:
+            parse_problem(problem)  # Kiểm tra sớm để báo lỗi 400 thay vì job thất bại
+        except (KeyError, TypeError, ValueError) as e:
+            return 400, {"error": f"Dữ liệu bài toán không hợp lệ: {type(e).__name__}: {e}"}
+
+        with self.lock:
+            if self.active_count() >= self.max_pending:
+                return 503, {"error": "Hàng đợi đầy, vui lòng thử lại sau",
+                             "pending": self.active_count()}
+            job = SolveJob(uuid.uuid4().hex, solver, params, seed, time_limit, soft_weights)
+            self.jobs[job.id] = job
+            job.future = self.executor.submit(_run_solve_job, job.id, problem, solver,
+                                              params, seed, time_limit, soft_weights)
+        job.future.add_done_callback(lambda future, job_id=job.id: self._on_done(job_id, future))
+        return 202, job.to_dict()
+
+    def active_count(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status in ("queued", "running"))
+
+    def get(self, job_id: str) -> Optional[SolveJob]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def cancel(self, job_id: str) -> Tuple[int, Dict[str, Any]]:
+        """
+        Hủy job đang chờ chưa được chuyển cho worker
+
+        Job đang chạy (hoặc đã nằm trong hàng đợi nội bộ của pool) không hủy
+        được và sẽ dừng theo time_limit của nó.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return 404, {"error": "Không tìm thấy job"}
+        if job.status == "queued" and job.future.cancel():
+            return 200, job.to_dict()
+        return 409, {"error": f"Không hủy được job ở trạng thái {job.status}"}
+
+    def health(self) -> Dict[str, Any]:
+        with self.lock:
+            counts: Dict[str, int] = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"workers": self.max_workers, "max_pending": self.max_pending,
+                    "pending": self.active_count(), "jobs": counts}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.progress_queue.put(None)
+        self._listener.join(timeout=1)
+
+    def _listen_progress(self):
+        """Thread đọc sự kiện tiến trình từ các process worker"""
+        while True:
+            event = self.progress_queue.get()
+            if event is None:
+                break
+            job_id, kind, data = event
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if job is None or job.status not in ("queued", "running"):
+                    continue
+                if kind == "started":
+                    job.status = "running"
+                    job.started_at = time.time()
+                else:
+                    job.progress = data
+
+    def _on_done(self, job_id: str, future):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            job.finished_at = time.time()
+            try:
+                outcome = future.result()
+                job.metrics = outcome["metrics"]
+                job.schedule = outcome["schedule"]
+                job.status = "done"
+            except CancelledError:
+                job.status = "cancelled"
+            except Exception as e:
+                job.status = "failed"
+                job.error = f"{type(e).__name__}: {e}"
+            self._evict_finished()
+
+    def _evict_finished(self):
+        """Chỉ giữ max_finished_jobs job đã xong gần nhất"""
+        finished = [job_id for job_id, job in self.jobs.items()
+                    if job.status not in ("queued", "running")]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job_id]
+
+
+class SolveRequestHandler(BaseHTTPRequestHandler):
+    """Xử lý request HTTP, chuyển cho SolveService của server"""
+
+    server_version = "ScheduleSolveService/1.0"
+
+    @property
+    def service(self) -> SolveService:
+        return self.server.service
+
+    def do_GET(self):
+        parts = self._path_parts()
+        if parts == ["health"]:
+            self._send_json(200, self.service.health())
+        elif parts == ["jobs"]:
+            self._send_json(200, {"jobs": self.service.list_jobs()})
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.service.get(parts[1])
+            if job is None:
+                self._send_json(404, {"error": "Không tìm thấy job"})
+            elif len(parts) == 2:
+                self._send_json(200, job.to_dict())
+            elif parts[2] != "result":
+                self._send_json(404, {"error": "Không tìm thấy đường dẫn"})
+            elif job.status != "done":
+                self._send_json(409, {"error": f"Job đang ở trạng thái {job.status}", "status": job.status})
+            else:
+                self._send_json(200, {"id": job.id, "metrics": job.metrics, "assignments": job.schedule})
+        else:
+            self._send_json(404, {"error": "Không tìm thấy đường dẫn"})
+
+    def do_POST(self):
+        if self._path_parts() != ["jobs"]:
+            self._send_json(404, {"error": "Không tìm thấy đường dẫn"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length <= 0:
+            self._send_json(411, {"error": "Thiếu Content-Length"})
+            return
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {"error": f"Bài toán vượt quá {MAX_BODY_BYTES} byte"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"JSON không hợp lệ: {e}"})
+            return
+        if not isinstance(payload, dict):
+            self._send_json(400, {"error": "Body phải là một object JSON"})
+            return
+
+        status, body = self.service.submit(payload)
+        headers = {"Retry-After": "5"} if status == 503 else {}
+        if status == 202:
+            headers["Location"] = f"/jobs/{body['id']}"
+        self._send_json(status, body, headers)
+
+    def do_DELETE(self):
+        parts = self._path_parts()
+        if len(parts) == 2 and parts[0] == "jobs":
+            self._send_json(*self.service.cancel(parts[1]))
+        else:
+            self._send_json(404, {"error": "Không tìm thấy đường dẫn"})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _path_parts(self) -> List[str]:
+        return [part for part in self.path.split("?", 1)[0].split("/") if part]
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def create_server(service: SolveService, host: str = "127.0.0.1", port: int = 8765,
+                  verbose: bool = False) -> ThreadingHTTPServer:
+    """Tạo HTTP server gắn với service (port=0 để chọn cổng trống)"""
+    server = ThreadingHTTPServer((host, port), SolveRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dịch vụ HTTP cục bộ giải bài toán xếp lịch")
+    parser.add_argument("--host", default="127.0.0.1", help="Địa chỉ lắng nghe (mặc định chỉ localhost)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="Số process giải song song")
+    parser.add_argument("--max-pending", type=int, default=8,
+                        help="Số job tối đa đang chờ hoặc đang chạy")
+    parser.add_argument("--default-time-limit", type=float, default=30.0, metavar="SEC")
+    parser.add_argument("--max-time-limit", type=float, default=300.0, metavar="SEC")
+    parser.add_argument("--verbose", action="store_true", help="In log từng request")
+    args = parser.parse_args()
+
+    service = SolveService(args.workers, args.max_pending, args.default_time_limit, args.max_time_limit)
+    server = create_server(service, args.host, args.port, args.verbose)
+    print(f"  Dịch vụ xếp lịch đang chạy tại http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
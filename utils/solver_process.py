@@ -0,0 +1,129 @@
+"""
+Chạy solver trong một process riêng và truyền tiến trình qua hàng đợi
+
+Solver là tác vụ nặng CPU: chạy trong thread của process Tk sẽ tranh GIL với
+giao diện. SolverProcess chạy solver trong process con, gửi các sự kiện
+("progress", metrics), ("done", schedule, elapsed) hoặc ("error", message)
+qua multiprocessing.Queue để GUI đọc bằng after() và có thể hủy bất kỳ lúc nào.
+"""
+
+import multiprocessing
+import queue
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+PROGRESS_INTERVAL = 0.05  # Khoảng cách tối thiểu (giây) giữa hai sự kiện tiến trình
+
+
+def _solver_worker(algo: str, data: Tuple, params: Dict[str, Any], seed: Optional[int],
+                   polish: bool, soft_weights: Optional[Dict[str, float]], events) -> None:
+    """Hàm chạy trong process con (cấp module để dùng được với spawn)"""
+    from core.backtracking import BacktrackingSolver
+    from core.evaluator import ScheduleEvaluator
+    from core.gwo import GWOSolver
+
+    courses, rooms, teachers, timeslots = data
+    last_report = [0.0]
+
+    def report(metrics: Dict) -> None:
+        # Giới hạn tần suất để không làm ngập hàng đợi khi mỗi vòng lặp rất nhanh
+        now = time.time()
+        if now - last_report[0] >= PROGRESS_INTERVAL:
+            last_report[0] = now
+            events.put(("progress", dict(metrics)))
+
+    try:
+        if seed is not None:
+            random.seed(seed)
+        start_time = time.time()
+        evaluator = ScheduleEvaluator(courses, rooms, teachers, timeslots, weights=soft_weights)
+        if algo == "gwo":
+            solver = GWOSolver(courses, rooms, teachers, timeslots, evaluator)
+            schedule = solver.solve(verbose=False, progress_callback=report, **params)
+            if solver.history:
+                events.put(("progress", dict(solver.history[-1])))
+        else:
+            solver = BacktrackingSolver(courses, rooms, teachers, timeslots)
+            schedule = solver.solve(verbose=False, **params)
+        if polish and schedule:
+            from core.local_search import LocalSearchPolisher
+            polisher = LocalSearchPolisher(courses, rooms, teachers, timeslots, evaluator)
+            schedule = polisher.polish(schedule, seed=seed)
+        events.put(("done", schedule, time.time() - start_time))
+    except Exception as e:
+        events.put(("error", str(e)))
+
+
+class SolverProcess:
+    """Lớp điều khiển một lần chạy solver trong process con"""
+
+    def __init__(self, algo: str, data: Tuple, params: Optional[Dict[str, Any]] = None,
+                 seed: Optional[int] = None, polish: bool = False,
+                 soft_weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            algo: "backtracking" hoặc "gwo"
+            data: (courses, rooms, teachers, timeslots)
+            params: Tham số truyền cho solver.solve
+            seed: Seed ngẫu nhiên của process con (None: không đặt seed)
+            polish: Đánh bóng lịch tìm được bằng LocalSearchPolisher trước khi gửi "done"
+            soft_weights: Trọng số ràng buộc mềm cho fitness của GWO và đánh bóng
+        """
+        # spawn: process con không kế thừa trạng thái Tk của process cha
+        context = multiprocessing.get_context("spawn")
+        self.events = context.Queue()
+        self.process = context.Process(target=_solver_worker,
+                                       args=(algo, data, params or {}, seed, polish, soft_weights,
+                                             self.events),
+                                       daemon=True)
+        self.finished = False
+
+    def start(self):
+        self.process.start()
+
+    def poll(self, max_events: int = 1000) -> List[Tuple]:
+        """
+        Lấy các sự kiện đang chờ mà không chặn
+
+        Nếu process con đã kết thúc mà không gửi "done"/"error" (bị kill, lỗi
+        khi import, ...) thì trả về một sự kiện "error".
+        """
+        events = []
+        while len(events) < max_events:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            events.append(event)
+            if event[0] in ("done", "error"):
+                self.finished = True
+                self.process.join(timeout=1)
+                break
+
+        if not events and not self.finished and not self.process.is_alive():
+            # Đọc lần cuối: sự kiện có thể tới ngay trước khi process kết thúc
+            try:
+                events.append(self.events.get(timeout=0.5))
+                self.finished = events[-1][0] in ("done", "error")
+            except queue.Empty:
+                pass
+            if not self.finished:
+                self.finished = True
+                events.append(("error", f"Process solver kết thúc bất thường "
+                                        f"(exit code {self.process.exitcode})"))
+        return events
+
+    @property
+    def is_running(self) -> bool:
+        return not self.finished
+
+    def cancel(self):
+        """Dừng process con ngay lập tức"""
+        self.finished = True
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(timeout=1)
+        self.events.close()
+        self.events.cancel_join_thread()
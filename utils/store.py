@@ -0,0 +1,164 @@
+"""
+Lưu trữ kết quả xếp lịch vào SQLite
+
+Mỗi lần chạy (run) được lưu cùng metadata (solver, seed, tham số, fitness,
+thời gian chạy). Các assignment được đánh chỉ mục theo giáo viên, phòng,
+lớp và timeslot để truy vấn nhanh, và có thể tải lại thành Schedule.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+from core.model import Schedule, Assignment, Course
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    solver TEXT NOT NULL,
+    seed INTEGER,
+    params TEXT NOT NULL DEFAULT '{}',
+    fitness REAL,
+    elapsed REAL,
+    valid INTEGER,
+    assigned INTEGER,
+    note TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS assignments (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    course_id TEXT NOT NULL,
+    room_id TEXT NOT NULL,
+    teacher_id TEXT NOT NULL,
+    timeslot_id TEXT NOT NULL,
+    student_class TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_assignments_run ON assignments(run_id);
+CREATE INDEX IF NOT EXISTS idx_assignments_teacher ON assignments(teacher_id, run_id);
+CREATE INDEX IF NOT EXISTS idx_assignments_room ON assignments(room_id, run_id);
+CREATE INDEX IF NOT EXISTS idx_assignments_class ON assignments(student_class, run_id);
+CREATE INDEX IF NOT EXISTS idx_assignments_timeslot ON assignments(timeslot_id, run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs(created_at);
+"""
+
+DEFAULT_STORE_PATH = os.path.join("results", "schedules.db")
+
+
+class ScheduleStore:
+    """Lớp lưu trữ và truy vấn lịch học trong SQLite"""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        """
+        Args:
+            path: Đường dẫn file SQLite (":memory:" để dùng bộ nhớ)
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if path != ":memory:" and directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save(self, schedule: Schedule, solver: str, courses: Dict[str, Course],
+             params: Optional[Dict[str, Any]] = None, seed: Optional[int] = None,
+             fitness: Optional[float] = None, elapsed: Optional[float] = None,
+             valid: Optional[bool] = None, note: str = "") -> int:
+        """
+        Lưu một kết quả
+
+        Args:
+            schedule: Lịch cần lưu
+            solver: Tên solver ("backtracking", "gwo", ...)
+            courses: Dictionary các môn học (để lưu lớp phục vụ truy vấn)
+            params: Tham số solver
+            seed: Seed ngẫu nhiên
+            fitness: Điểm fitness
+            elapsed: Thời gian chạy (giây)
+            valid: Lịch có hợp lệ và hoàn chỉnh hay không
+            note: Ghi chú
+
+        Returns:
+            ID của run vừa lưu
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (created_at, solver, seed, params, fitness, elapsed, valid, "
+                "assigned, note) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), solver, seed, json.dumps(params or {}, ensure_ascii=False),
+                 fitness, elapsed, None if valid is None else int(valid),
+                 len(schedule.assignments), note))
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO assignments (run_id, course_id, room_id, teacher_id, timeslot_id, "
+                "student_class) VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, a.course_id, a.room_id, a.teacher_id, a.timeslot_id,
+                  courses[a.course_id].student_class if a.course_id in courses else "")
+                 for a in schedule.assignments])
+        return run_id
+
+    def load(self, run_id: int) -> Optional[Schedule]:
+        """Tải lại lịch của một run, None nếu không tồn tại"""
+        if self.get_run(run_id) is None:
+            return None
+        return Schedule(self.query(run_id=run_id))
+
+    def get_run(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """Metadata của một run"""
+        row = self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return self._run_to_dict(row) if row else None
+
+    def list_runs(self, limit: int = 20, solver: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Danh sách các run gần nhất"""
+        sql = "SELECT * FROM runs"
+        args: List[Any] = []
+        if solver:
+            sql += " WHERE solver = ?"
+            args.append(solver)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        args.append(limit)
+        return [self._run_to_dict(row) for row in self.conn.execute(sql, args)]
+
+    def query(self, run_id: Optional[int] = None, teacher_id: Optional[str] = None,
+              room_id: Optional[str] = None, student_class: Optional[str] = None,
+              timeslot_id: Optional[str] = None) -> List[Assignment]:
+        """
+        Truy vấn assignment theo các chỉ mục (các điều kiện được kết hợp bằng AND)
+
+        Returns:
+            Danh sách Assignment khớp
+        """
+        filters = {"run_id": run_id, "teacher_id": teacher_id, "room_id": room_id,
+                   "student_class": student_class, "timeslot_id": timeslot_id}
+        conditions = [(column, value) for column, value in filters.items() if value is not None]
+        sql = "SELECT course_id, room_id, teacher_id, timeslot_id FROM assignments"
+        if conditions:
+            sql += " WHERE " + " AND ".join(f"{column} = ?" for column, _ in conditions)
+        sql += " ORDER BY rowid"
+        rows = self.conn.execute(sql, [value for _, value in conditions])
+        return [Assignment(row[0], row[1], row[2], row[3]) for row in rows]
+
+    def delete(self, run_id: int):
+        """Xóa một run và các assignment của nó"""
+        with self.conn:
+            self.conn.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+
+    @staticmethod
+    def _run_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        run = dict(row)
+        run["params"] = json.loads(run["params"]) if run["params"] else {}
+        if run["valid"] is not None:
+            run["valid"] = bool(run["valid"])
+        return run
@@ -0,0 +1,142 @@
+"""
+View model của lịch học cho GUI
+
+Được dựng một lần cho mỗi kết quả: các dòng đã định dạng và sắp xếp, chỉ
+mục theo giáo viên/phòng/lớp/ngày và chỉ mục đảo (inverted index) theo từ
+để tìm kiếm không phải duyệt và định dạng lại toàn bộ lịch mỗi lần gõ phím.
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+from core.model import Schedule
+from utils.printer import SchedulePrinter
+
+
+# Thứ tự cột trong overview_tree
+OVERVIEW_COLUMNS = ('Môn Học', 'Giáo Viên', 'Phòng', 'Thời Gian', 'Lớp')
+
+
+class ScheduleViewModel:
+    """Lớp view model của một lịch học"""
+
+    def __init__(self, schedule: Schedule, printer: SchedulePrinter):
+        self.printer = printer
+        self.rows: List[Tuple[str, str, str, str, str]] = []
+        self.row_keys: List[Dict[str, str]] = []
+        self.searchable: List[str] = []
+        self.by_teacher: Dict[str, List[int]] = {}
+        self.by_room: Dict[str, List[int]] = {}
+        self.by_class: Dict[str, List[int]] = {}
+        self.by_day: Dict[str, List[int]] = {}
+        self.teacher_rows: Dict[str, List[Tuple[str, str, str, str, str]]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._build(schedule)
+        # Thứ tự hiển thị hiện tại (mặc định theo thời gian)
+        self.order: List[int] = list(range(len(self.rows)))
+        self._rank: List[int] = list(self.order)
+
+    def _build(self, schedule: Schedule):
+        courses = self.printer.courses
+        teachers = self.printer.teachers
+        rooms = self.printer.rooms
+        timeslots = self.printer.timeslots
+
+        sorted_assignments = sorted(schedule.assignments,
+                                    key=lambda a: self.printer._get_timeslot_order(a.timeslot_id))
+        teacher_items: Dict[str, List[Tuple[Tuple[int, int], Tuple]]] = {}
+
+        for assignment in sorted_assignments:
+            course = courses.get(assignment.course_id)
+            teacher = teachers.get(assignment.teacher_id)
+            room = rooms.get(assignment.room_id)
+            timeslot = timeslots.get(assignment.timeslot_id)
+            if not all([course, teacher, room, timeslot]):
+                continue
+
+            session = timeslot.session if timeslot.session else f"Tiết {timeslot.period}"
+            row = (course.name, teacher.name, room.name,
+                   f"{timeslot.day}, {session} ({timeslot.time})", course.student_class)
+            index = len(self.rows)
+            self.rows.append(row)
+            self.row_keys.append({"course_id": assignment.course_id,
+                                  "teacher_id": assignment.teacher_id,
+                                  "room_id": assignment.room_id,
+                                  "timeslot_id": assignment.timeslot_id})
+
+            self.by_teacher.setdefault(assignment.teacher_id, []).append(index)
+            self.by_room.setdefault(assignment.room_id, []).append(index)
+            self.by_class.setdefault(course.student_class, []).append(index)
+            self.by_day.setdefault(timeslot.day, []).append(index)
+
+            searchable = (" ".join(row) + " " + timeslot.day).lower()
+            self.searchable.append(searchable)
+            for token in self.tokenize(searchable):
+                self._postings.setdefault(token, set()).add(index)
+
+            # Dòng cho tab lịch giáo viên: (Thứ, Tiết, Môn Học, Phòng, Thời Gian)
+            teacher_items.setdefault(assignment.teacher_id, []).append((
+                (SchedulePrinter._get_day_number(timeslot.day), timeslot.period),
+                (timeslot.day, f"Tiết {timeslot.period} ({timeslot.session})",
+                 course.name, room.name, timeslot.time)))
+
+        for teacher_id, items in teacher_items.items():
+            items.sort(key=lambda item: item[0])
+            self.teacher_rows[teacher_id] = [values for _, values in items]
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Tách chuỗi thành các từ thường (bỏ dấu câu đơn giản)"""
+        for ch in ",()-":
+            text = text.replace(ch, " ")
+        return text.lower().split()
+
+    def search(self, text: str) -> List[int]:
+        """
+        Tìm các dòng khớp với từ khóa
+
+        Chỉ mục đảo thu hẹp ứng viên (mỗi từ truy vấn phải là chuỗi con của
+        một từ trong dòng, chỉ quét từ điển các từ), sau đó kiểm tra cả cụm
+        từ khóa như một chuỗi con trên các ứng viên còn lại.
+
+        Returns:
+            Chỉ số các dòng khớp, theo thứ tự hiển thị hiện tại (xem sort_by)
+        """
+        text = text.lower()
+        if not text.strip():
+            return list(self.order)
+        query_tokens = self.tokenize(text)
+        if not query_tokens:
+            return [i for i in self.order if text in self.searchable[i]]
+
+        result: Optional[Set[int]] = None
+        for query in query_tokens:
+            matched: Set[int] = set()
+            for token, postings in self._postings.items():
+                if query in token:
+                    matched |= postings
+            result = matched if result is None else result & matched
+            if not result:
+                return []
+        return self.in_order(i for i in result if text in self.searchable[i])
+
+    def in_order(self, indices) -> List[int]:
+        """Sắp các chỉ số dòng theo thứ tự hiển thị hiện tại"""
+        return sorted(indices, key=self._rank.__getitem__)
+
+    def sort_by(self, column: str, descending: bool = False):
+        """
+        Đổi thứ tự hiển thị theo một cột của overview (không đụng tới Treeview)
+
+        Cột 'Thời Gian' sắp xếp theo thời gian thực (thứ tự gốc) thay vì chữ.
+        """
+        if column == 'Thời Gian':
+            self.order = list(range(len(self.rows)))
+            if descending:
+                self.order.reverse()
+        else:
+            col = OVERVIEW_COLUMNS.index(column)
+            # Sắp xếp ổn định: cùng giá trị thì giữ thứ tự thời gian
+            self.order = sorted(range(len(self.rows)), key=lambda i: self.rows[i][col],
+                                reverse=descending)
+        self._rank = [0] * len(self.rows)
+        for position, row_index in enumerate(self.order):
+            self._rank[row_index] = position